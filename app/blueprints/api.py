@@ -8,6 +8,9 @@ from ssk.blueprints.api_handler import ApiHandler
 
 bp = Blueprint('lapi', __name__, url_prefix='/lapi')
 
+# app calls can be sent through /api/<v>/batch as well
+ApiHandler.register_batch("lecho", ApiHandler.get_echo)
+
 
 @bp.route('/<string:a_version>/echo/<string:a_key>', methods=['POST'])
 def echo(a_version, a_key):
@@ -3,28 +3,17 @@
 # SPDX-License-Identifier: MIT
 #
 
+from ssk.logic.bus_logic import BusLogic
 from ssk.logic.cmd.root_cmd import RootCmd
-from ssk.globals.job_mgr import JobMgr
 
 
-class AppLogic:
-    _job_mgr = None
+class AppLogic(BusLogic):
+    # this is a default logic, the id is read from the class, so templates do not build the logic
+    LG_ID = 0
 
     @staticmethod
     def get_instance():
         return AppLogic()
 
-    def get_id(self):
-        # this is a default logic
-        return 0
-
-    def __init__(self):
-        self._job_mgr = JobMgr()
-
-    def get_job_mgr(self):
-        return self._job_mgr
-
     def get_root_cmd(self):
         return RootCmd()
-
-
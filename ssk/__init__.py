@@ -22,6 +22,8 @@ import uuid
 from .config import Config, get_log_level
 from .globals.cmd_processor import CmdProcessor
 from .globals.app_settings import AppSettings
+from .globals.access_log import AccessLog
+from .globals.presence_tracker import PresenceTracker
 from flask_login import logout_user
 from flask_login.signals import user_logged_in, user_logged_out
 
@@ -51,10 +53,12 @@ def _patched_hash_password(self, password):
     return _original_usermanager_hash_password(self, truncate_password(password))
 UserManager.hash_password = _patched_hash_password
 
+from .logic.bus_logic import BusLogic
 from .logic.jobs.db_cleanup_job import DbCleanupJob
 from .logic.jobs.db_stat_job import DbStatJob
 from .logic.jobs.health_check_job import HealthCheckJob
 from .logic.jobs.page_stat_job import PageStatJob
+from .globals.principal_cache import Principal, PrincipalCache
 from .models.audit import Audit
 from .ssk_consts import SSK_ADMIN_GROUP
 
@@ -78,6 +82,7 @@ def user_logged_in(sender, user, **extra):
             user.num_of_logins = 1
 
         user.loggedin = 1
+        PresenceTracker.touch(user.id, user.last_login)
 
         get_db().session.add(user)
         get_db().session.commit()
@@ -85,6 +90,11 @@ def user_logged_in(sender, user, **extra):
 
 @user_logged_out.connect_via(ANY)
 def user_logged_out(sender, user, **extra):
+    # a gate closing the site logs out the cached principal, the row is saved
+    if isinstance(user, Principal):
+        user = user.get_user()
+    PrincipalCache.invalidate_user(user.id)
+
     user.loggedin = 0
     get_db().session.add(user)
     get_db().session.commit()
@@ -104,24 +114,37 @@ def internal_server_error(e):
     return render_template('500.html', error_id=my_error_id), 500
 
 
+def get_logic_id():
+    # the default id is a class attribute, logics overriding get_id() are built once to read it
+    my_bus_logic = current_app.bus_logic
+    if getattr(my_bus_logic, "get_id", None) is BusLogic.get_id:
+        return my_bus_logic.LG_ID
+
+    return get_logic().get_id()
+
+
 def set_meta():
+    # built once per process, db_version_check and the upgrades reset it through reset_meta
     from ssk.models.version import Version
 
-    if "DB_CURR" not in current_app.config.keys() or "SSK_DB_CURR" not in current_app.config.keys():
-        my_version_record = get_db().session.query(Version).order_by(Version.id.desc()).first()
-        current_app.config["SSK_DB_CURR"] = my_version_record.ssk_version
-        current_app.config["DB_CURR"] = my_version_record.db_version
+    if current_app.ssk_meta is None:
+        if "DB_CURR" not in current_app.config.keys() or "SSK_DB_CURR" not in current_app.config.keys():
+            my_version_record = get_db().session.query(Version).order_by(Version.id.desc()).first()
+            current_app.config["SSK_DB_CURR"] = my_version_record.ssk_version
+            current_app.config["DB_CURR"] = my_version_record.db_version
 
-    return {"meta": {"APP_NAME": current_app.config["USER_APP_NAME"],
-                     "APP_PROFILE": current_app.config["PROFILE"],
-                     "LG_VERSION": get_logic().get_id(),
-                     "APP_VERSION": current_app.config["USER_APP_VERSION"],
-                     "SSK_VERSION": current_app.config["SSK_VER"],
-                     "DB_VERSION": current_app.config["DB_CURR"],
-                     "SSK_DB_VERSION": current_app.config["SSK_DB_CURR"],
-                     "LATEST_DB_VERSION": current_app.config["DB_MODEL_VERSION"],
-                     "LATEST_SSK_DB_VERSION": current_app.config["SSK_DB_MODEL_VERSION"],
-                     }}
+        current_app.ssk_meta = {"APP_NAME": current_app.config["USER_APP_NAME"],
+                                "APP_PROFILE": current_app.config["PROFILE"],
+                                "LG_VERSION": get_logic_id(),
+                                "APP_VERSION": current_app.config["USER_APP_VERSION"],
+                                "SSK_VERSION": current_app.config["SSK_VER"],
+                                "DB_VERSION": current_app.config["DB_CURR"],
+                                "SSK_DB_VERSION": current_app.config["SSK_DB_CURR"],
+                                "LATEST_DB_VERSION": current_app.config["DB_MODEL_VERSION"],
+                                "LATEST_SSK_DB_VERSION": current_app.config["SSK_DB_MODEL_VERSION"],
+                                }
+
+    return {"meta": current_app.ssk_meta}
 
 
 def start_apigate():
@@ -130,10 +153,47 @@ def start_apigate():
     ApiGate.load()
 
 
+def start_access_log():
+    AccessLog.start(an_app=current_app._get_current_object(),
+                    a_max_size=current_app.config["ACCESS_LOG_MAX_BUFFER"],
+                    a_batch_size=current_app.config["ACCESS_LOG_BATCH_SIZE"],
+                    an_interval=current_app.config["ACCESS_LOG_FLUSH_SECS"])
+
+
+def start_presence_tracker():
+    PresenceTracker.start(an_app=current_app._get_current_object(),
+                          an_interval=current_app.config["PRESENCE_FLUSH_SECS"])
+
+
+def start_process_metrics():
+    from .globals.process_metrics import ProcessMetrics
+    ProcessMetrics.start(an_app=current_app._get_current_object(),
+                         an_interval=current_app.config["STATUS_SAMPLE_SECS"])
+
+
+def start_job_pool():
+    my_size = current_app.config["JOB_PROCESS_POOL_SIZE"]
+
+    if my_size > 0:
+        from .globals.job_pool import JobPool
+        current_app.logger.info("starting job pool with {} processes".format(my_size))
+        JobPool.start(an_app=current_app._get_current_object(), a_size=my_size)
+
+
+def start_job_events():
+    from .globals.job_events import JobEvents
+    JobEvents.init(a_history=current_app.config["JOB_EVENTS_HISTORY"],
+                   a_max_topics=current_app.config["JOB_EVENTS_MAX_TOPICS"],
+                   a_max_streams=current_app.config["JOB_EVENTS_MAX_STREAMS"])
+
+
 def start_settings():
     from .globals.app_settings import AppSettings
     from .globals.setting_parser import SettingParser
 
+    AppSettings.init(a_check_ms=current_app.config["SETTINGS_CHECK_MS"],
+                     a_max_users=current_app.config["SETTINGS_CACHE_USERS"])
+
     my_admin_email = current_app.config["ADMIN_EMAIL"]
     my_value = current_app.config["WEBSITE_OPEN"]
 
@@ -144,22 +204,17 @@ def after_request(response):
     if current_app.config["LOG_ALL_REQUESTS"]:
         my_response = int((time.time() - g.start) * 1000)
         if my_response > current_app.config["LOG_SLOWER_THAN"] or response.status_code >= 400:
-            from ssk.models.access import Access
-            my_access = Access()
-            my_access.remote_addr = request.remote_addr
-            my_access.method = request.method
-            my_access.protocol = request.scheme
-            my_access.path = request.full_path[:250]
-            my_access.response = response.status
-
-            my_access.response_time = my_response
-            my_access.user = ""
-
+            my_user = ""
             if not current_user.is_anonymous:
-                my_access.user = current_user.username
+                my_user = current_user.username
 
-            get_db().session.add(my_access)
-            get_db().session.commit()
+            AccessLog.log({"remote_addr": request.remote_addr,
+                           "method": request.method,
+                           "protocol": request.scheme,
+                           "path": request.full_path[:250],
+                           "response": response.status,
+                           "response_time": my_response,
+                           "user": my_user})
 
     return response
 
@@ -177,20 +232,32 @@ def every_request():
                 logout_user()
                 flash('Sorry, we are currently closed for the maintenance', 'error')
         else:
-            from ssk.models.all_ssk_db import User
-            my_user.last_access = datetime.now()
-
-            get_db().session.add(my_user)
-            get_db().session.commit()
+            PresenceTracker.touch(my_user.id)
 
 
 def start_cmd_processor():
-    my_max_collectors = current_app.config["MAX_COLLECTORS"]
+    # MAX_COLLECTORS set with conf set wins over the config and resizes the pool while running
+    my_max_collectors = AppSettings().get_setting("MAX_COLLECTORS")
+    if my_max_collectors is None:
+        my_max_collectors = current_app.config["MAX_COLLECTORS"]
 
     if my_max_collectors > 0:
         CmdProcessor.start(a_job_mgr=get_logic().get_job_mgr(),
                            a_logger=current_app.logger,
-                           a_max_collectors=my_max_collectors)
+                           a_max_collectors=my_max_collectors,
+                           a_max_depth=current_app.config["CMD_QUEUE_MAX_DEPTH"],
+                           a_min_collectors=current_app.config["MIN_COLLECTORS"],
+                           an_idle_secs=current_app.config["COLLECTOR_IDLE_SECS"])
+
+        AppSettings.listen("MAX_COLLECTORS", resize_cmd_processor)
+
+
+def resize_cmd_processor(a_max_collectors):
+    # a removed MAX_COLLECTORS setting falls back to the config
+    if a_max_collectors is None:
+        a_max_collectors = current_app.config["MAX_COLLECTORS"]
+
+    CmdProcessor.resize(a_max_collectors)
 
 
 def exec_cmd(a_cmd):
@@ -314,12 +381,22 @@ def init_ssk(an_app, a_bus_logic, a_db_upgrader, a_testing):
 
     my_app.context_processor(set_meta)
 
+    from .json_codec import JsonCodec
+    JsonCodec.init(my_app.config["JSON_ENCODER"])
+
     from .models.user import User
     from .models.user import UserInvitation
     from flask_user import UserManager, EmailManager
     my_app.user_manager = UserManager(my_app, func_db, User, UserInvitationClass=UserInvitation)
     my_app.user_manager.email_manager = EmailManager(my_app)
+    PrincipalCache.init(a_ttl=my_app.config["PRINCIPAL_CACHE_SECS"],
+                        a_max_entries=my_app.config["PRINCIPAL_CACHE_SIZE"])
+    my_app.login_manager.user_loader(PrincipalCache.load)
+
+    from .globals.page_cache import PageCache
+    PageCache.init(a_max_pages=my_app.config["PAGE_CACHE_SIZE"])
     my_app.meta = {"PROFILE": os.getenv("FLASK_ENV", None)}
+    my_app.ssk_meta = None
 
     from .blueprints import home
     my_app.register_blueprint(home.bp)
@@ -346,9 +423,19 @@ def start_ssk(an_app, a_testing):
             from .db import db_version_check
             db_version_check()
 
+        # registry of jobs is process wide, reload it for this app
+        from .globals.job_mgr import JobMgr
+        JobMgr.reset()
+
         if not a_testing:
+            # the pool forks first, before the other background threads start
+            start_job_pool()
             start_cmd_processor()
         start_apigate()
+        start_access_log()
+        start_presence_tracker()
+        start_job_events()
+        start_process_metrics()
         # it has to be after db init
         start_scheduler()
         start_settings()
@@ -6,7 +6,7 @@
 
 import os.path
 
-from flask import (Blueprint, current_app, send_file)
+from flask import (Blueprint, current_app, send_file, request)
 from flask import render_template
 from flask_login import current_user
 from flask_user import roles_required
@@ -15,6 +15,7 @@ from .. import get_db
 from ..models.audit import Audit
 from ..utils import get_timestamp_str
 from ..ssk_consts import SSK_ADMIN_GROUP
+from ..json_codec import JsonCodec
 
 from ssk.blueprints.admin_handler import AdminHandler
 
@@ -59,6 +60,14 @@ def system_chart():
     return render_template(my_file, system_status=my_to_plot, admin_group_name=SSK_ADMIN_GROUP)
 
 
+@bp.route('/system_series', methods=['GET'])
+@roles_required(SSK_ADMIN_GROUP)
+def system_series():
+    my_series = AdminHandler.system_series(request.args)
+
+    return JsonCodec.stream(my_series)
+
+
 @bp.route('/system_perf', methods=['GET'])
 @roles_required(SSK_ADMIN_GROUP)
 def system_perf():
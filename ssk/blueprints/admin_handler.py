@@ -6,7 +6,7 @@
 
 from datetime import datetime, timedelta
 
-from statistics import mean
+from flask import current_app
 
 from ssk import AppSettings, get_db
 from ssk.utils import now
@@ -16,6 +16,7 @@ class AdminHandler(object):
     PAGE_CLOSED = "ssk/closed.html"
     PAGE_SYSTEM_CHART = "ssk/system_chart.html"
     PAGE_SYSTEM_STATS = "ssk/system_stats.html"
+    STATS_DAYS = 21
 
     @staticmethod
     def system_chart():
@@ -24,39 +25,58 @@ class AdminHandler(object):
         if AppSettings().get_setting("LOGIN_OFF"):
             return AdminHandler.PAGE_CLOSED, my_to_plot
 
-        from ..models.status import Status
-        my_now = datetime.now()
-        my_threshold = my_now - timedelta(minutes=360)
-        my_session = get_db().session
-        my_records = my_session.query(Status).filter(Status.created > my_threshold).order_by(Status.id.asc()).all()
-
-        my_times = [my_tmp_item.created for my_tmp_item in my_records]
-        my_res_time = [my_tmp_item.response_time for my_tmp_item in my_records]
-        my_mem = [my_tmp_item.mem for my_tmp_item in my_records]
-        my_users_active = [my_tmp_item.users_active for my_tmp_item in my_records]
-
+        # the page fetches the points from system_series
         my_res_time_ds = {"label": "Response Times",
-                          "data": my_res_time,
+                          "metric": "response_time",
+                          "data": [],
                           "fill": False,
                           "borderColor": 'rgba(100, 153, 255 , 0.6)',
                           }
 
         my_mem_ds = {"label": "Memory",
-                     "data": my_mem,
+                     "metric": "mem",
+                     "data": [],
                      "fill": False,
                      "borderColor": 'rgba(204, 153, 255 , 0.6)',
                      }
 
         my_users_ds = {"label": "Users",
-                       "data": my_users_active,
+                       "metric": "users_active",
+                       "data": [],
                        "fill": False,
                        "borderColor": 'rgb(201, 204, 63, 0.6)',
                        }
 
-        my_to_plot = {"labels": my_times, "datasets": [my_res_time_ds, my_mem_ds, my_users_ds]}
+        my_to_plot = {"labels": [], "datasets": [my_res_time_ds, my_mem_ds, my_users_ds]}
 
         return AdminHandler.PAGE_SYSTEM_CHART, my_to_plot
 
+    @staticmethod
+    def system_series(a_args):
+        # json points for the admin charts, ?source=status&minutes=360&bucket=60 or ?source=stats&days=21
+        if AppSettings().get_setting("LOGIN_OFF"):
+            return {"labels": [], "series": {}}
+
+        from ..logic.time_series import TimeSeries
+
+        my_max_points = current_app.config["TIME_SERIES_MAX_POINTS"]
+
+        if a_args.get("source", "status") == "stats":
+            my_days = min(a_args.get("days", AdminHandler.STATS_DAYS, type=int), my_max_points)
+
+            return TimeSeries.page_stats(now(), max(my_days, 1))
+
+        my_minutes = a_args.get("minutes", current_app.config["SYSTEM_CHART_MINUTES"], type=int)
+        my_bucket = a_args.get("bucket", current_app.config["SYSTEM_CHART_BUCKET_SECS"], type=int)
+        my_metrics = a_args.get("metrics", None)
+        if my_metrics is not None:
+            my_metrics = my_metrics.split(",")
+
+        my_to = datetime.now()
+        my_from = my_to - timedelta(minutes=max(my_minutes, 1))
+
+        return TimeSeries.status(my_from, my_to, my_bucket, my_max_points, my_metrics)
+
     @staticmethod
     def system_stats():
         my_to_plot = {"labels": [], "datasets": [{}, {}, {}]}
@@ -71,7 +91,7 @@ class AdminHandler(object):
         my_recent_db_stats = DBStats.get_since(my_from)
 
         my_db_stats = {}
-        my_all_db_tables = []
+        my_all_db_tables = {}
         for my_tmp_db_stat in my_recent_db_stats:
             my_day = my_tmp_db_stat.created.strftime("%Y-%m-%d")
 
@@ -80,65 +100,42 @@ class AdminHandler(object):
 
             my_db_stats[my_day][my_tmp_db_stat.table] = my_tmp_db_stat.counter
 
-            if my_tmp_db_stat.table not in my_all_db_tables:
-                my_all_db_tables.append(my_tmp_db_stat.table)
+            my_all_db_tables[my_tmp_db_stat.table] = None
 
+        my_all_db_tables = list(my_all_db_tables.keys())
         my_all_db_days = list(my_db_stats.keys())
 
-        # page stats
+        # page stats of the last STATS_DAYS days only
         from ssk.models.stats import Stats
-        my_page_stats = Stats.get_all()
+        from ..logic.time_series import TimeSeries
+        my_page_stats = get_db().session.query(Stats) \
+            .filter(Stats.day.in_(TimeSeries.get_days(my_now, AdminHandler.STATS_DAYS))).all()
 
         my_daily_stats = {}
         my_daily_perf = {}
-        my_all_pages = []
-        my_all_days = []
-
-        my_per_day = {}
+        my_all_pages = {}
 
         for my_tmp_stat in my_page_stats:
-            if my_tmp_stat.path not in my_all_pages:
-                my_all_pages.append(my_tmp_stat.path)
-
-            if my_tmp_stat.day not in my_per_day.keys():
-                my_per_day[my_tmp_stat.day] = []
-
-            my_per_day[my_tmp_stat.day].append(my_tmp_stat.mean_response_time)
+            my_all_pages[my_tmp_stat.path] = None
 
-            if my_tmp_stat.day not in my_all_days:
-                my_all_days.append(my_tmp_stat.day)
-
-            if my_tmp_stat.day not in my_daily_stats.keys():
+            if my_tmp_stat.day not in my_daily_stats:
                 my_daily_stats[my_tmp_stat.day] = {}
                 my_daily_perf[my_tmp_stat.day] = {}
 
             my_daily_stats[my_tmp_stat.day][my_tmp_stat.path] = my_tmp_stat.hits
-            my_daily_perf[my_tmp_stat.day][my_tmp_stat.path] = round(my_tmp_stat.mean_response_time)
-
-            if len(my_all_days) > 21:
-                break
-
-        my_days = list(my_per_day.keys())
-        my_days.reverse()
-        my_labels = my_days
+            my_daily_perf[my_tmp_stat.day][my_tmp_stat.path] = round(my_tmp_stat.mean_response_time or 0)
 
-        my_mean_rt = []
-
-        for my_tmp_item in my_days:
-            my_all_rts = my_per_day[my_tmp_item]
-            if len(my_all_rts) > 0:
-                my_mean_rt.append(mean(my_all_rts))
-            else:
-                my_mean_rt.append(0)
+        my_all_days = sorted(my_daily_stats.keys(), key=lambda a_day: datetime.strptime(a_day, "%Y-%m-%d"))
+        my_all_pages = list(my_all_pages.keys())
 
+        # the page fetches the points from system_series
         my_res_time_ds = {"label": "Response Time",
-                          "data": my_mean_rt,
+                          "metric": "mean_response_time",
+                          "data": [],
                           "borderColor": 'rgba(100, 153, 255 , 0.6)',
                           }
 
-        my_to_plot = {"labels": my_labels, "datasets": [my_res_time_ds]}
-
-        my_all_days.reverse()
+        my_to_plot = {"labels": [], "datasets": [my_res_time_ds]}
 
         my_ret_val = {"plot": my_to_plot,
                       "stats": my_daily_stats,
@@ -4,19 +4,55 @@
 #
 
 
-from flask import Blueprint, request
+from flask import Blueprint, request, g, Response
 
 from ssk.blueprints.api_handler import ApiHandler
+from ssk.globals.rate_limiter import RateLimiter
+from ssk.json_codec import JsonCodec
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
 
-@bp.route('/<string:a_version>/status/<string:a_key>', methods=['POST'])
+@bp.after_request
+def add_rate_limit_headers(a_response):
+    for my_tmp_name, my_tmp_value in RateLimiter.get_headers(g.get("api_rate", None)).items():
+        a_response.headers[my_tmp_name] = my_tmp_value
+
+    return a_response
+
+
+@bp.route('/<string:a_version>/status/<string:a_key>', methods=['GET', 'POST'])
 def status(a_version, a_key):
-    return ApiHandler.status(a_version, a_key)
+    my_response = JsonCodec.response(*ApiHandler.status(a_version, a_key))
+
+    # GET with If-None-Match gets 304 until the next sample
+    my_etag = g.get("api_etag", None)
+    if my_etag is not None:
+        my_response.set_etag(my_etag)
+        my_response = my_response.make_conditional(request)
+
+    return my_response
 
 
 @bp.route('/<string:a_version>/echo/<string:a_key>', methods=['POST'])
 def echo(a_version, a_key):
-    return ApiHandler.echo(request, a_version, a_key)
+    my_response, my_ret_val = ApiHandler.echo(request, a_version, a_key)
+
+    # the echo itself is plain text, errors are json
+    if my_ret_val == 200:
+        return Response(my_response, status=my_ret_val, mimetype="text/plain")
+
+    return JsonCodec.response(my_response, my_ret_val)
+
+
+@bp.route('/<string:a_version>/batch/<string:a_key>', methods=['POST'])
+def batch(a_version, a_key):
+    my_ret_val, my_calls = ApiHandler.batch(request, a_version, a_key)
+    if my_ret_val != 200:
+        return JsonCodec.response(my_calls, my_ret_val)
+
+    my_results = ApiHandler.run_batch(a_version, a_key, my_calls)
+    if request.args.get("stream", "") in ["1", "true"] or JsonCodec.NDJSON_MIMETYPE in request.headers.get("Accept", ""):
+        return JsonCodec.stream_lines(my_results)
 
+    return JsonCodec.stream_object("results", my_results)
@@ -4,79 +4,190 @@
 #
 
 
-import os
-
-import psutil
-
-from flask import current_app
-import json
+from flask import current_app, g
 
 from ssk.globals.api_gate import ApiGate
+from ssk.globals.process_metrics import ProcessMetrics
+from ssk.json_codec import JsonCodec
 from ssk.utils import get_safe_string
 
 
 class ApiHandler(object):
     API_ERROR_TEMPLATE = "%s key %s version %s code %s message %s"
 
+    BATCH_ROUTE = "batch"
+    # encoded into INVALID_BATCH, see ApiGate.RESPONSES
+    RESPONSES = {"INVALID_BATCH": {"code": 50, "mesg": "invalid batch"}}
+    UNKNOWN_CALL = {"code": 60, "mesg": "unknown call"}
+    CALL_FAILED = {"code": 70, "mesg": "call failed"}
+
+    # batch calls by name, handler(a_version, a_key, a_params) returns (data, http code)
+    _batch_handlers = {}
+
     @staticmethod
-    def status(a_version, a_key):
-        my_response = ApiGate.TOO_BUSY
-        my_mesg = ""
+    def register_batch(a_name, a_handler):
+        ApiHandler._batch_handlers[a_name] = a_handler
+
+    @staticmethod
+    def get_batch_handler(a_name):
+        return ApiHandler._batch_handlers.get(a_name, None)
+
+    @staticmethod
+    def take_token(a_key, a_route, a_tokens=1):
+        # the decision is kept for the blueprint, which turns it into X-RateLimit-* headers
+        my_decision = ApiGate.take_token(a_key, a_route, a_tokens=a_tokens)
+        g.api_rate = my_decision
+
+        return my_decision.allowed
+
+    @staticmethod
+    def admit(a_key, ignore_open=False):
+        # key and active session checks shared by all api calls, returns (http code, message)
+        my_mesg = ApiGate.TOO_BUSY
         my_ret_val = 400
 
+        ApiGate.sync_if_due()
         if ApiGate.is_active_now(a_key):
             my_mesg = ApiGate.DONE
             my_ret_val = 200
         elif ApiGate.num_active_keys() < current_app.config["MAX_ACTIVE_KEYS"]:
-            # this call works even if api is closed
-            if ApiGate.is_valid(current_app, a_key, ignore_open=True):
+            if ApiGate.is_valid(current_app, a_key, ignore_open=ignore_open):
                 my_mesg = ApiGate.DONE
                 my_ret_val = 200
             else:
                 my_mesg = ApiGate.INVALID_KEY
 
+        return my_ret_val, my_mesg
+
+    @staticmethod
+    def log_error(a_route, a_version, a_key, a_ret_val, a_mesg):
+        current_app.logger.error(ApiHandler.API_ERROR_TEMPLATE, a_route,
+                                 get_safe_string(a_key),
+                                 get_safe_string(a_version),
+                                 a_ret_val,
+                                 get_safe_string(a_mesg))
+
+    @staticmethod
+    def get_status(a_version, a_key, a_params):
+        return ProcessMetrics.get_snapshot().data, 200
+
+    @staticmethod
+    def get_echo(a_version, a_key, a_params):
+        my_ret_val = "I can't hear you"
+        if isinstance(a_params, dict) and "echo" in a_params.keys():
+            my_ret_val = get_safe_string(a_params["echo"])
+
+        return my_ret_val, 200
+
+    @staticmethod
+    def status(a_version, a_key):
+        my_response = ApiGate.TOO_BUSY
+
+        # this call works even if api is closed
+        my_ret_val, my_mesg = ApiHandler.admit(a_key, ignore_open=True)
+
+        if my_ret_val == 200 and not ApiHandler.take_token(a_key, "status"):
+            my_response = ApiGate.RATE_LIMITED
+            my_mesg = ApiGate.RATE_LIMITED
+            my_ret_val = 429
+
         if my_ret_val == 200:
-            my_process = psutil.Process(os.getpid())
-            my_mem = round(my_process.memory_info().rss / (1024 ** 2), 2)
-            my_data = {"mem": my_mem}
+            # the snapshot is encoded by the sampler, its etag lets the blueprint answer conditional requests
+            my_snapshot = ProcessMetrics.get_snapshot()
+            g.api_etag = my_snapshot.etag
 
-            my_response = json.dumps(my_data)
+            my_response = my_snapshot.body
         else:
-            current_app.logger.error(ApiHandler.API_ERROR_TEMPLATE, "status",
-                                     get_safe_string(a_key),
-                                     get_safe_string(a_version),
-                                     my_ret_val,
-                                     get_safe_string(my_mesg))
+            ApiHandler.log_error("status", a_version, a_key, my_ret_val, my_mesg)
 
         return my_response, my_ret_val
 
     @staticmethod
     def echo(a_request, a_version, a_key):
         my_response = ApiGate.TOO_BUSY
-        my_mesg = ""
-        my_ret_val = 400
 
-        if ApiGate.is_active_now(a_key):
-            my_mesg = ApiGate.DONE
-            my_ret_val = 200
-        elif ApiGate.num_active_keys() < current_app.config["MAX_ACTIVE_KEYS"]:
-            if ApiGate.is_valid(current_app, a_key):
-                my_mesg = ApiGate.DONE
-                my_ret_val = 200
-            else:
-                my_mesg = ApiGate.INVALID_KEY
+        my_ret_val, my_mesg = ApiHandler.admit(a_key)
 
-        if my_ret_val == 200:
-            my_content = a_request.json
+        if my_ret_val == 200 and not ApiHandler.take_token(a_key, "echo"):
+            my_response = ApiGate.RATE_LIMITED
+            my_mesg = ApiGate.RATE_LIMITED
+            my_ret_val = 429
 
-            my_response = "I can't hear you"
-            if "echo" in my_content.keys():
-                my_response = get_safe_string(my_content["echo"])
+        if my_ret_val == 200:
+            my_response, _ = ApiHandler.get_echo(a_version, a_key, a_request.json)
         else:
-            current_app.logger.error(ApiHandler.API_ERROR_TEMPLATE, "echo",
-                                     get_safe_string(a_key),
-                                     get_safe_string(a_version),
-                                     my_ret_val,
-                                     get_safe_string(my_mesg))
+            ApiHandler.log_error("echo", a_version, a_key, my_ret_val, my_mesg)
 
         return my_response, my_ret_val
+
+    @staticmethod
+    def get_calls(a_content):
+        # the list of {"id", "call", "params"} sub-calls, None when the body is not a valid batch
+        if not isinstance(a_content, dict) or not isinstance(a_content.get("calls", None), list):
+            return None
+
+        my_calls = a_content["calls"]
+        if len(my_calls) == 0 or len(my_calls) > current_app.config["API_BATCH_MAX_CALLS"]:
+            return None
+
+        for my_tmp_call in my_calls:
+            if not isinstance(my_tmp_call, dict) or not isinstance(my_tmp_call.get("call", None), str):
+                return None
+
+        return my_calls
+
+    @staticmethod
+    def run_call(a_version, a_key, a_call):
+        # one sub-call, the key tokens were taken for the whole batch, the call takes one of its route bucket;
+        # g.api_rate is left alone, the headers of a streamed batch are sent before the calls run
+        my_name = a_call["call"]
+        my_result = {"id": a_call.get("id", None), "call": my_name}
+
+        my_handler = ApiHandler.get_batch_handler(my_name)
+        if my_handler is None:
+            my_result.update({"code": 404, "data": ApiHandler.UNKNOWN_CALL})
+        elif not ApiGate.take_token(a_key, my_name, a_key_bucket=False).allowed:
+            my_result.update({"code": 429, "data": ApiGate.RATE_LIMITED_CODE})
+        else:
+            try:
+                my_data, my_code = my_handler(a_version, a_key, a_call.get("params", None))
+                my_result.update({"code": my_code, "data": my_data})
+            except Exception as problem:
+                current_app.logger.error("batch call {} failed {}".format(get_safe_string(my_name), problem))
+                my_result.update({"code": 500, "data": ApiHandler.CALL_FAILED})
+
+        return my_result
+
+    @staticmethod
+    def batch(a_request, a_version, a_key):
+        # returns (http code, error message or the sub-call list), the blueprint runs and encodes the calls
+        my_ret_val, my_mesg = ApiHandler.admit(a_key)
+
+        my_calls = None
+        if my_ret_val == 200:
+            my_calls = ApiHandler.get_calls(a_request.get_json(silent=True))
+            if my_calls is None:
+                my_ret_val = 400
+                my_mesg = ApiHandler.INVALID_BATCH
+            elif not ApiHandler.take_token(a_key, ApiHandler.BATCH_ROUTE, a_tokens=len(my_calls)):
+                # a batch costs one key token per call, taken before the response starts
+                my_ret_val = 429
+                my_mesg = ApiGate.RATE_LIMITED
+
+        if my_ret_val != 200:
+            ApiHandler.log_error(ApiHandler.BATCH_ROUTE, a_version, a_key, my_ret_val, my_mesg)
+            return my_ret_val, my_mesg
+
+        return my_ret_val, my_calls
+
+    @staticmethod
+    def run_batch(a_version, a_key, a_calls):
+        for my_tmp_call in a_calls:
+            yield ApiHandler.run_call(a_version, a_key, my_tmp_call)
+
+
+ApiHandler.register_batch("status", ApiHandler.get_status)
+ApiHandler.register_batch("echo", ApiHandler.get_echo)
+
+
+JsonCodec.add_constants(ApiHandler, ApiHandler.RESPONSES)
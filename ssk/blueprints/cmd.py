@@ -9,6 +9,7 @@ from flask_user import roles_required
 
 from ssk.ssk_consts import SSK_ADMIN_GROUP
 from ssk.blueprints.cmd_handler import CmdHandler
+from ssk.json_codec import JsonCodec
 
 bp = Blueprint('cmd', __name__, url_prefix='/cmd')
 
@@ -24,4 +25,4 @@ def terminal():
 @bp.route('/cmd', methods=['POST'])
 @roles_required(SSK_ADMIN_GROUP)
 def cmd():
-    return CmdHandler.cmd_post(request)
+    return JsonCodec.response(CmdHandler.cmd_post(request))
@@ -7,7 +7,7 @@
 from flask import current_app
 from flask_login import current_user
 import uuid
-import json
+from ssk.json_codec import JsonCodec
 from ssk.lg import get_logic
 
 
@@ -38,4 +38,4 @@ class CmdHandler(object):
 
         my_response = {"jsonrpc": "2.0", "result": my_mesg, "id": 3}
 
-        return json.dumps(my_response)
+        return JsonCodec.dumps(my_response)
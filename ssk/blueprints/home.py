@@ -3,8 +3,8 @@
 # SPDX-License-Identifier: MIT
 #
 
-import csv
 import os
+from urllib.parse import urlencode
 
 from flask import (Blueprint, request, Response, send_file, current_app)
 from flask import render_template
@@ -12,6 +12,10 @@ from flask import render_template
 from ssk.forms.contact_form import ContactForm
 from ssk.ssk_consts import SSK_ADMIN_GROUP
 from ssk.globals.web_gate import WebGate
+from ssk.globals.job_events import JobEvents
+from ssk.globals.notes_catalogue import NotesCatalogue
+from ssk.globals.page_cache import PageCache
+from ssk.json_codec import JsonCodec
 
 from ssk.lg import get_logic
 
@@ -20,6 +24,8 @@ from ssk.blueprints.home_handler import HomeHandler
 
 bp = Blueprint('home', __name__, url_prefix='/ssk')
 
+NOTES_MAX_PAGE_SIZE = 100
+
 
 @bp.route('/closed', methods=['GET'])
 def closed():
@@ -44,21 +50,91 @@ def tasks():
     return render_template(my_file, tasks=my_tasks, admin_group_name=SSK_ADMIN_GROUP)
 
 
-@bp.route('/blog/<string:note>', methods=['GET'])
-def blog(note):
+@bp.route('/tasks_list', methods=['GET'])
+def tasks_list():
     if WebGate.is_closed():
         return WebGate.render_closed()
 
-    my_note_path = "local/notes/{}.html".format(note)
-    try:
-        my_form = ContactForm()
-        my_form.source = "note {}".format(note)
+    return JsonCodec.stream_object("tasks", HomeHandler.tasks_list())
+
 
-        return render_template("local/notebook.html",
-                           toshow=my_note_path,
+def get_notes_path():
+    return "{}/local/notes".format(current_app.jinja_loader.searchpath[0])
+
+
+def render_note(a_note, a_note_path):
+    my_form = ContactForm()
+    my_form.source = "note {}".format(a_note)
+
+    return render_template("local/notebook.html",
+                           toshow=a_note_path,
                            form=my_form,
                            message=None,
                            admin_group_name=SSK_ADMIN_GROUP)
+
+
+def get_int_arg(a_name, a_default, a_max=None):
+    try:
+        my_ret_val = max(int(request.args.get(a_name, a_default)), 1)
+    except ValueError:
+        my_ret_val = a_default
+
+    if a_max is not None:
+        my_ret_val = min(my_ret_val, a_max)
+
+    return my_ret_val
+
+
+def get_posts_args():
+    # the filters and paging of /blog_posts, clamped, other parameters are ignored
+    my_filters = {"q": request.args.get("q", None),
+                  "label": request.args.get("label", None),
+                  "from": request.args.get("from", None),
+                  "to": request.args.get("to", None)}
+    my_filters = {my_tmp_key: my_tmp_value.strip() for my_tmp_key, my_tmp_value in my_filters.items()
+                  if my_tmp_value is not None and len(my_tmp_value.strip()) > 0}
+
+    if "q" in my_filters:
+        # the words are matched in any order and case
+        my_filters["q"] = " ".join(sorted(set(my_filters["q"].lower().split())))
+
+    my_per_page = get_int_arg("per_page", current_app.config["NOTES_PAGE_SIZE"], a_max=NOTES_MAX_PAGE_SIZE)
+    my_page = get_int_arg("page", 1)
+
+    return my_filters, my_page, my_per_page
+
+
+def render_posts(a_meta_path, a_filters, a_page, a_per_page):
+    NotesCatalogue.load(a_meta_path)
+
+    my_posts, my_total = NotesCatalogue.find(a_query=a_filters.get("q", None),
+                                             a_label=a_filters.get("label", None),
+                                             a_from=a_filters.get("from", None),
+                                             a_to=a_filters.get("to", None),
+                                             a_page=a_page,
+                                             a_per_page=a_per_page)
+
+    return render_template("ssk/posts.html",
+                           posts=my_posts,
+                           total=my_total,
+                           page=a_page,
+                           pages=max((my_total + a_per_page - 1) // a_per_page, 1),
+                           per_page=a_per_page,
+                           filters=a_filters,
+                           labels=NotesCatalogue.get_all_labels(),
+                           admin_group_name=SSK_ADMIN_GROUP)
+
+
+@bp.route('/blog/<string:note>', methods=['GET'])
+def blog(note):
+    if WebGate.is_closed():
+        return WebGate.render_closed()
+
+    my_note_path = "local/notes/{}.html".format(note)
+    try:
+        return PageCache.respond("blog/{}".format(note),
+                                 "{}/{}.html".format(get_notes_path(), note),
+                                 lambda: render_note(note, my_note_path))
     except Exception as err:
         current_app.logger.error(f"ERROR: note not found {my_note_path} {err}")
 
@@ -70,21 +146,17 @@ def blog_posts():
     if WebGate.is_closed():
         return WebGate.render_closed()
 
-    my_template_path = current_app.jinja_loader.searchpath[0]
-    my_meta_path = "{}/local/notes/meta.csv".format(my_template_path)
+    my_meta_path = "{}/meta.csv".format(get_notes_path())
 
-    my_posts = []
-    with open(my_meta_path) as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=',')
-        line_count = 0
-        for row in csv_reader:
-            if line_count > 0:
-                my_posts.append({"note": row[1], "title": row[2], "subtitle": row[3], "created": row[4], "labels": row[5]})
-            line_count += 1
+    my_filters, my_page, my_per_page = get_posts_args()
 
-    return render_template("ssk/posts.html",
-                           posts=my_posts,
-                           admin_group_name=SSK_ADMIN_GROUP)
+    # every page and filter is a page of its own
+    my_key = "blog_posts?{}".format(urlencode(sorted(my_filters.items()) + [("page", my_page),
+                                                                             ("per_page", my_per_page)]))
+
+    return PageCache.respond(my_key,
+                             my_meta_path,
+                             lambda: render_posts(my_meta_path, my_filters, my_page, my_per_page))
 
 
 @bp.route('/tasks_action', methods=['POST'])
@@ -102,13 +174,44 @@ def task_log_download(a_tid):
         return send_file(my_logfile, as_attachment=True)
 
 
-@bp.route('/progress/<string:a_thread_id>')
+@bp.route('/progress/<string:a_thread_id>', methods=['GET'])
 def progress(a_thread_id):
-    def generate(a_job_tracker, a_tid):
-        my_progress = a_job_tracker.get_progress(a_tid)
-        yield "data:" + str(my_progress) + "\n\n"
+    if not JobEvents.open_stream():
+        return Response("too many progress streams", status=503, headers={"Retry-After": "10"})
 
-    return Response(generate(get_logic().get_job_mgr(), a_thread_id), mimetype='text/event-stream')
+    my_heartbeat = current_app.config["JOB_EVENTS_HEARTBEAT_SECS"]
+    my_last_id = request.headers.get("Last-Event-ID", "0")
+    my_last_id = int(my_last_id) if my_last_id.isdigit() else 0
+
+    try:
+        my_progress = get_logic().get_job_mgr().get_progress(a_thread_id)
+    except Exception:
+        JobEvents.close_stream()
+        raise
+
+    def generate(a_tid, a_progress, a_last_id):
+        # snapshot first, then everything the job publishes until it is stopped or done
+        yield "retry: 5000\ndata:" + str(a_progress) + "\n\n"
+
+        my_finished = not JobEvents.has_topic(a_tid)
+        while not my_finished:
+            my_events, my_finished = JobEvents.wait(a_tid, a_last_id, my_heartbeat)
+
+            if len(my_events) == 0 and not my_finished:
+                yield ": heartbeat\n\n"
+
+            for my_tmp_id, my_tmp_event, my_tmp_data in my_events:
+                a_last_id = my_tmp_id
+                my_data = "\n".join("data: " + my_tmp_line for my_tmp_line in str(my_tmp_data).splitlines())
+                yield "id: {}\nevent: {}\n{}\n\n".format(my_tmp_id, my_tmp_event, my_data)
+
+    my_response = Response(generate(a_thread_id, my_progress, my_last_id),
+                           mimetype='text/event-stream',
+                           headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # the server closes the response even when the body never starts, e.g. HEAD or an early disconnect
+    my_response.call_on_close(JobEvents.close_stream)
+
+    return my_response
 
 
 @bp.route('/about', methods=['GET'])
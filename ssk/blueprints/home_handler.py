@@ -16,6 +16,23 @@ class HomeHandler(object):
     PAGE_NOTES = "ssk/notes.html"
     PAGE_ABOUT = "ssk/about.html"
 
+    @staticmethod
+    def get_task(a_job):
+        return {"tid": a_job.task_id,
+                "name": a_job.name,
+                "details": a_job.started.strftime("%d-%b-%Y %H:%M:%S"),
+                "status": a_job.status,
+                "prog": a_job.progress}
+
+    @staticmethod
+    def tasks_list():
+        # the same tasks as tasks(), yielded one by one for the streamed json list
+        if AppSettings().get_setting("LOGIN_OFF") or current_user.is_anonymous:
+            return
+
+        for my_temp_task in get_logic().get_job_mgr().iter_jobs_by_user(current_user.id):
+            yield HomeHandler.get_task(my_temp_task)
+
     @staticmethod
     def tasks():
         my_tasks = []
@@ -27,11 +44,7 @@ class HomeHandler(object):
             my_jobs = get_logic().get_job_mgr().get_all_jobs_by_user(current_user.id)
 
             for my_temp_task in my_jobs:
-                my_tasks.append({"tid": my_temp_task.task_id,
-                                 "name": my_temp_task.name,
-                                 "details": my_temp_task.started.strftime("%d-%b-%Y %H:%M:%S"),
-                                 "status": my_temp_task.status,
-                                 "prog": my_temp_task.progress})
+                my_tasks.append(HomeHandler.get_task(my_temp_task))
 
         return HomeHandler.PAGE_TASKS, my_tasks
 
@@ -57,11 +70,7 @@ class HomeHandler(object):
             my_jobs = get_logic().get_job_mgr().get_all_jobs_by_user(current_user.id)
 
             for my_temp_task in my_jobs:
-                my_tasks.append({"tid": my_temp_task.task_id,
-                                 "name": my_temp_task.name,
-                                 "details": my_temp_task.started.strftime("%d-%b-%Y %H:%M:%S"),
-                                 "status": my_temp_task.status,
-                                 "prog": my_temp_task.progress})
+                my_tasks.append(HomeHandler.get_task(my_temp_task))
 
         return HomeHandler.PAGE_TASKS, my_tasks
 
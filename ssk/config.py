@@ -34,3 +34,76 @@ class Config(object):
 
     ADMIN_NAME = "admin"
     USER_FREE_NAME = "user_free"
+
+    # write-behind access log
+    ACCESS_LOG_MAX_BUFFER = 10000
+    ACCESS_LOG_BATCH_SIZE = 500
+    ACCESS_LOG_FLUSH_SECS = 5
+
+    # last_access write-behind
+    PRESENCE_FLUSH_SECS = 60
+
+    # live job progress streams
+    JOB_EVENTS_HISTORY = 200
+    JOB_EVENTS_MAX_TOPICS = 1000
+    JOB_EVENTS_MAX_STREAMS = 100
+    JOB_EVENTS_HEARTBEAT_SECS = 15
+
+    # job progress is written to the job table at most this often, or when it moved by the delta
+    JOB_PROGRESS_FLUSH_SECS = 2
+    JOB_PROGRESS_MIN_DELTA = 5
+
+    # settings are cached per process, the setting_version counter is read at most every SETTINGS_CHECK_MS
+    SETTINGS_CHECK_MS = 1000
+    SETTINGS_CACHE_USERS = 1000
+
+    # GET requests take the logged in user from a per process cache, entries live PRINCIPAL_CACHE_SECS, 0 turns it off
+    PRINCIPAL_CACHE_SECS = 10
+    PRINCIPAL_CACHE_SIZE = 5000
+
+    # rendered notes and post list kept per process for anonymous visitors, 0 turns it off
+    PAGE_CACHE_SIZE = 256
+
+    # notes listed per /ssk/blog_posts page, per_page in the query may ask for up to 100
+    NOTES_PAGE_SIZE = 20
+
+    # command workers scale between MIN_COLLECTORS and the MAX_COLLECTORS setting,
+    # workers idle for COLLECTOR_IDLE_SECS above the minimum stop
+    MIN_COLLECTORS = 1
+    COLLECTOR_IDLE_SECS = 60
+
+    # queued commands above this are rejected, 0 is unbounded; system jobs are never rejected
+    CMD_QUEUE_MAX_DEPTH = 1000
+
+    # processes running jobs with CPU_BOUND set, 0 runs them on the command threads
+    JOB_PROCESS_POOL_SIZE = 0
+
+    # seconds HealthCheckJob waits for ROOT_URL
+    HEALTH_PROBE_TIMEOUT = 5
+
+    # admin charts, buckets are widened to stay under TIME_SERIES_MAX_POINTS
+    TIME_SERIES_MAX_POINTS = 500
+    SYSTEM_CHART_MINUTES = 360
+    SYSTEM_CHART_BUCKET_SECS = 60
+
+    # api keys, activity and the open flag; "shared" keeps them in a sqlite file seen by all workers on the host
+    API_GATE_BACKEND = "local"
+    API_GATE_SHARED_FILE = "/tmp/ssk_api_gate.sqlite"
+    # seconds between polls for api keys changed by other workers
+    API_GATE_SYNC_SECS = 5
+
+    # api token buckets, rate is tokens per second and burst the bucket size, tiers are Subs names
+    # keys without a listed tier get API_RATE_LIMIT_DEFAULT, None means unlimited
+    API_RATE_LIMITS = {"Free": {"rate": 2, "burst": 20},
+                       "Pro": {"rate": 20, "burst": 200}}
+    API_RATE_LIMIT_DEFAULT = {"rate": 2, "burst": 20}
+    API_ROUTE_RATE_LIMITS = {}
+
+    # maximum number of sub-calls in one /api/<v>/batch request
+    API_BATCH_MAX_CALLS = 100
+
+    # seconds between process metrics samples served by /api/<v>/status
+    STATUS_SAMPLE_SECS = 5
+
+    # "auto" encodes api, cmd and admin json with orjson when it is installed, "json" always uses the stdlib
+    JSON_ENCODER = "auto"
@@ -119,6 +119,14 @@ def db_version_check():
             my_desc = "IMP DB {} == {}: No Action".format(my_db_version.db_version,
                                                           my_req_db_ver)
 
+    if not my_stop:
+        try:
+            my_missing = find_missing_indexes()
+            if len(my_missing) > 0:
+                current_app.logger.warning("DB indexes missing {}, upgrade the SSK DB".format(", ".join(my_missing)))
+        except Exception as a_problem:
+            current_app.logger.warning("DB index check failed {}".format(a_problem))
+
     my_audit = Audit()
     my_audit.by_user = "SYSTEM"
     my_audit.category = "START"
@@ -130,10 +138,67 @@ def db_version_check():
     get_db().session.add(my_audit)
     get_db().session.commit()
 
+    my_db_version = get_version()
+    reset_meta(my_db_version.db_version, my_db_version.ssk_version)
+
     if my_stop:
         raise (SystemExit())
 
 
+def get_indexed_tables():
+    # tables with secondary indexes and the engine of their bind
+    from .models.access import Access
+    from .models.stats import Stats
+    from .models.db_stats import DBStats
+    from .models.status import Status
+    from .models.job import Job
+    from .models.audit import Audit
+    from .models.setting import Setting
+    from .models.apikey import ApiKey
+
+    my_ret_val = []
+    for my_tmp_model in [Access, Stats, DBStats, Status, Job, Audit, Setting, ApiKey]:
+        my_engine = func_db.engines[getattr(my_tmp_model, "__bind_key__", None)]
+        my_ret_val.append((my_engine, my_tmp_model.__table__))
+
+    return my_ret_val
+
+
+def find_missing_indexes():
+    from sqlalchemy import inspect
+
+    my_ret_val = []
+    for my_tmp_engine, my_tmp_table in get_indexed_tables():
+        my_existing = [my_tmp_index["name"] for my_tmp_index in inspect(my_tmp_engine).get_indexes(my_tmp_table.name)]
+
+        for my_tmp_index in my_tmp_table.indexes:
+            if my_tmp_index.name not in my_existing:
+                my_ret_val.append(my_tmp_index.name)
+
+    return my_ret_val
+
+
+def create_missing_indexes(a_tables=None):
+    # indexes of a_tables, table names, or of every indexed table
+    my_ret_val = []
+    for my_tmp_engine, my_tmp_table in get_indexed_tables():
+        if a_tables is not None and my_tmp_table.name not in a_tables:
+            continue
+
+        for my_tmp_index in my_tmp_table.indexes:
+            my_tmp_index.create(bind=my_tmp_engine, checkfirst=True)
+            my_ret_val.append(my_tmp_index.name)
+
+    return my_ret_val
+
+
+def reset_meta(a_db_version, a_ssk_version):
+    # template metadata is built again by the next render, with the versions just written or checked
+    current_app.config["DB_CURR"] = a_db_version
+    current_app.config["SSK_DB_CURR"] = a_ssk_version
+    current_app.ssk_meta = None
+
+
 def get_version():
     from .models.version import Version
 
@@ -152,6 +217,8 @@ def set_version(a_version):
             my_connection.execute(text(my_sql))
             my_connection.commit()
 
+        reset_meta(a_version, my_db_version.ssk_version)
+
 
 def set_ssk_version(a_version):
     from sqlalchemy import text
@@ -165,6 +232,8 @@ def set_ssk_version(a_version):
             my_connection.execute(text(my_sql))
             my_connection.commit()
 
+        reset_meta(my_db_version.db_version, a_version)
+
 
 def upgrade_imp_db(a_from, a_to):
     my_functions = current_app.db_upgrader.get_upgrade_functions()
@@ -365,7 +434,12 @@ def db_init():
     my_pro_subs.users.append(my_pro_user)
     my_pro_subs.users.append(my_admin_user)
 
+    # ver 12
+    from .models.setting import SettingVersion
+    my_setting_version = SettingVersion(id=1, version=0)
+
     func_db.session.add(my_version)
+    func_db.session.add(my_setting_version)
     func_db.session.add(my_admin_user)
     func_db.session.add(my_free_user)
     func_db.session.add(my_pro_user)
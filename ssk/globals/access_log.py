@@ -0,0 +1,148 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import atexit
+from collections import deque
+from datetime import datetime
+from threading import Thread, Lock, Event
+
+from sqlalchemy import insert
+
+
+class AccessLog:
+    # write-behind buffer for logdb.access
+    # requests only append a dict, the flusher thread bulk inserts in batches
+    _buffer = deque()
+    _lock = Lock()
+    _wakeup = Event()
+    _app = None
+    _flusher = None
+    _running = False
+    _at_exit = False
+
+    _max_size = 10000
+    _batch_size = 500
+    _interval = 5
+
+    _enqueued = 0
+    _dropped = 0
+    _flushed = 0
+    _batches = 0
+    _failed = 0
+
+    @staticmethod
+    def start(an_app, a_max_size, a_batch_size, an_interval):
+        AccessLog._app = an_app
+        AccessLog._max_size = a_max_size
+        AccessLog._batch_size = a_batch_size
+        AccessLog._interval = an_interval
+
+        if AccessLog._flusher is None or not AccessLog._flusher.is_alive():
+            AccessLog._running = True
+            AccessLog._flusher = Thread(target=AccessLog.process_flush, daemon=True)
+            AccessLog._flusher.start()
+
+        if not AccessLog._at_exit:
+            atexit.register(AccessLog.stop)
+            AccessLog._at_exit = True
+
+    @staticmethod
+    def stop():
+        AccessLog._running = False
+        AccessLog._wakeup.set()
+
+        if AccessLog._flusher is not None:
+            AccessLog._flusher.join(timeout=AccessLog._interval + 1)
+            AccessLog._flusher = None
+
+        return AccessLog.flush()
+
+    @staticmethod
+    def log(a_record):
+        # the time of the request, not of the flush that inserts it seconds later
+        a_record.setdefault("created", datetime.now())
+
+        with AccessLog._lock:
+            if len(AccessLog._buffer) >= AccessLog._max_size:
+                AccessLog._dropped += 1
+                return False
+
+            AccessLog._buffer.append(a_record)
+            AccessLog._enqueued += 1
+            my_size = len(AccessLog._buffer)
+
+        if my_size >= AccessLog._batch_size:
+            AccessLog._wakeup.set()
+
+        return True
+
+    @staticmethod
+    def take_batch():
+        with AccessLog._lock:
+            my_cnt = min(len(AccessLog._buffer), AccessLog._batch_size)
+            my_batch = [AccessLog._buffer.popleft() for _ in range(my_cnt)]
+
+        return my_batch
+
+    @staticmethod
+    def flush():
+        if AccessLog._app is None:
+            return 0
+
+        from ..db import get_db
+        from ..models.access import Access
+
+        my_total = 0
+        with AccessLog._app.app_context():
+            my_batch = AccessLog.take_batch()
+
+            while len(my_batch) > 0:
+                try:
+                    get_db().session.execute(insert(Access), my_batch)
+                    get_db().session.commit()
+
+                    my_total += len(my_batch)
+                    AccessLog._flushed += len(my_batch)
+                    AccessLog._batches += 1
+                except Exception as e:
+                    get_db().session.rollback()
+                    AccessLog._failed += len(my_batch)
+                    AccessLog._app.logger.error("access log flush of {} records failed {}".format(len(my_batch), e))
+
+                my_batch = AccessLog.take_batch()
+
+        return my_total
+
+    @staticmethod
+    def process_flush():
+        my_last_dropped = 0
+
+        while AccessLog._running:
+            AccessLog._wakeup.wait(timeout=AccessLog._interval)
+            AccessLog._wakeup.clear()
+
+            try:
+                AccessLog.flush()
+            except Exception as e:
+                AccessLog._app.logger.error("access log flusher error {}".format(e))
+
+            if AccessLog._dropped > my_last_dropped:
+                AccessLog._app.logger.warning("access log buffer full, {} records dropped so far".format(AccessLog._dropped))
+                my_last_dropped = AccessLog._dropped
+
+    @staticmethod
+    def buffer_len():
+        return len(AccessLog._buffer)
+
+    @staticmethod
+    def stats():
+        return {"buffered": len(AccessLog._buffer),
+                "max": AccessLog._max_size,
+                "enqueued": AccessLog._enqueued,
+                "flushed": AccessLog._flushed,
+                "batches": AccessLog._batches,
+                "dropped": AccessLog._dropped,
+                "failed": AccessLog._failed}
@@ -4,41 +4,137 @@
 #
 
 
-from time import time
-import json
+from datetime import datetime, timedelta, timezone
+from time import time, monotonic
 import uuid
 
+from flask import current_app
+
 from ..globals.app_settings import AppSettings
+from ..globals.api_gate_store import LocalApiGateStore, SqliteApiGateStore
+from ..globals.rate_limiter import RateLimiter
+from ..json_codec import JsonCodec
 from ..models.apikey import ApiKey
 from ..utils import get_safe_string
 
 
 class ApiGate:
-    DONE = json.dumps({"code": 0, "mesg": "ok"})
-    INVALID_KEY = json.dumps({"code": 10, "mesg": "invalid api key"})
-    TOO_BUSY = json.dumps({"code": 20, "mesg": "maximum active sessions exceeded"})
-    CLOSED = json.dumps({"code": 30, "mesg": "API is temporarily disabled"})
-
-    __allowed = None
-    __active = None
+    # constant responses are encoded once into DONE, INVALID_KEY, ... and again by JsonCodec.init
+    RATE_LIMITED_CODE = {"code": 40, "mesg": "rate limit exceeded"}
+    RESPONSES = {"DONE": {"code": 0, "mesg": "ok"},
+                 "INVALID_KEY": {"code": 10, "mesg": "invalid api key"},
+                 "TOO_BUSY": {"code": 20, "mesg": "maximum active sessions exceeded"},
+                 "CLOSED": {"code": 30, "mesg": "API is temporarily disabled"},
+                 "RATE_LIMITED": RATE_LIMITED_CODE}
+
+    LOCAL = "local"
+    SHARED = "shared"
+
+    __store = LocalApiGateStore()
     __timeout = None
-    __open = False
+    __watermark = datetime(1970, 1, 1)
+    __synced_at = 0
+
+    @staticmethod
+    def get_store(a_backend, a_path):
+        # local keeps the state per process, shared lets all workers on a host see the same keys and flags
+        if a_backend == ApiGate.SHARED:
+            return SqliteApiGateStore(a_path)
+
+        return LocalApiGateStore()
 
     @staticmethod
-    def init():
+    def init(a_store=None):
         my_app_settings = AppSettings()
 
         ApiGate.__timeout = my_app_settings.get_setting("API_ACTIVE_NOW")
-        ApiGate.__active = {}
-        ApiGate.__allowed = {}
+
+        if a_store is None:
+            a_store = ApiGate.get_store(current_app.config["API_GATE_BACKEND"],
+                                        current_app.config["API_GATE_SHARED_FILE"])
+        ApiGate.__store = a_store
+        # the api starts closed, the shared flag would otherwise outlive a restart
+        ApiGate.__store.set_open(False)
+
+        RateLimiter.init(current_app.config["API_RATE_LIMITS"],
+                         current_app.config["API_RATE_LIMIT_DEFAULT"],
+                         current_app.config["API_ROUTE_RATE_LIMITS"])
 
     @staticmethod
     def load():
-        my_keys = ApiKey.get_all_active()
+        # full reload, later changes are picked up by sync from the watermark taken before reading
+        my_watermark = ApiKey.get_last_update() or datetime(1970, 1, 1)
+
+        my_keys = {}
+        my_tiers = {}
+        for my_tmp_key, my_tmp_id, _, my_tmp_subs, _ in ApiKey.get_subs():
+            my_keys[my_tmp_key] = ApiGate.get_description(my_tmp_id)
+            my_names = my_tiers.setdefault(my_tmp_key, [])
+            if my_tmp_subs is not None:
+                my_names.append(my_tmp_subs)
+
+        ApiGate.__store.load_keys(my_keys)
+        RateLimiter.set_tiers(my_tiers)
 
-        ApiGate.__allowed = {}
-        for my_tmp_key in my_keys:
-            ApiGate.__allowed[my_tmp_key.key] = "key driver {}".format(my_tmp_key.id)
+        ApiGate.__watermark = my_watermark
+        ApiGate.__synced_at = monotonic()
+
+    @staticmethod
+    def get_description(a_id):
+        return "key driver {}".format(a_id)
+
+    @staticmethod
+    def apply(a_rows):
+        # adds, removes or re-tiers the keys in a_rows (ApiKey.get_subs rows) in place
+        my_changes = {}
+        for my_tmp_key, my_tmp_id, my_tmp_active, my_tmp_subs, _ in a_rows:
+            my_change = my_changes.setdefault(my_tmp_key, [my_tmp_id, my_tmp_active, []])
+            if my_tmp_subs is not None:
+                my_change[2].append(my_tmp_subs)
+
+        for my_tmp_key, (my_tmp_id, my_tmp_active, my_tmp_names) in my_changes.items():
+            if my_tmp_active:
+                ApiGate.__store.add_key(my_tmp_key, ApiGate.get_description(my_tmp_id))
+                RateLimiter.set_tier(my_tmp_key, my_tmp_names)
+            else:
+                ApiGate.__store.remove_key(my_tmp_key)
+                RateLimiter.remove_key(my_tmp_key)
+
+        return len(my_changes)
+
+    @staticmethod
+    def refresh_key(a_key):
+        # applies the current state of one key after this process changed it
+        return ApiGate.apply(ApiKey.get_subs(a_key=a_key))
+
+    @staticmethod
+    def sync():
+        # applies keys changed since the watermark; updated is written by the db with a resolution of
+        # one second, so the last second before the watermark is read, and applied, again
+        my_rows = ApiKey.get_subs(a_since=ApiGate.__watermark - timedelta(seconds=1))
+        for my_tmp_row in my_rows:
+            ApiGate.__watermark = ApiGate.get_later(ApiGate.__watermark, my_tmp_row[4])
+        ApiGate.__synced_at = monotonic()
+
+        return ApiGate.apply(my_rows)
+
+    @staticmethod
+    def get_later(a_watermark, a_when):
+        # backends with timestamptz return aware values, the epoch seed is naive; naive values are UTC
+        if a_when is None:
+            return a_watermark
+
+        if a_when.tzinfo is not None and a_watermark.tzinfo is None:
+            a_watermark = a_watermark.replace(tzinfo=timezone.utc)
+        elif a_when.tzinfo is None and a_watermark.tzinfo is not None:
+            a_watermark = a_watermark.astimezone(timezone.utc).replace(tzinfo=None)
+
+        return max(a_watermark, a_when)
+
+    @staticmethod
+    def sync_if_due():
+        if monotonic() - ApiGate.__synced_at >= current_app.config["API_GATE_SYNC_SECS"]:
+            ApiGate.sync()
 
     @staticmethod
     def get_new_key():
@@ -61,66 +157,67 @@ class ApiGate:
             get_db().session.add(my_api_key)
             get_db().session.commit()
 
-            ApiGate.load()
+            ApiGate.refresh_key(my_api_key.key)
             my_ret_val = my_api_key.key
 
         return my_ret_val
 
     @staticmethod
     def active_now():
-        my_now = time()
-        my_threshold = my_now - ApiGate.__timeout
-
-        my_values = ApiGate.__active.values()
-        my_active = list(filter(lambda my_key: my_key > my_threshold, my_values))
+        my_threshold = time() - ApiGate.__timeout
 
-        return my_active
+        return ApiGate.__store.active_since(my_threshold)
 
     @staticmethod
     def is_active_now(a_key):
         my_retval = False
 
-        if ApiGate.__active is not None and a_key in ApiGate.__active.keys():
-            my_ts = ApiGate.__active[a_key]
+        my_ts = ApiGate.__store.last_seen(a_key)
+        if my_ts is not None:
             my_retval = (my_ts > time() - ApiGate.__timeout)
 
         if my_retval:
-            ApiGate.__active[a_key] = time()
+            ApiGate.__store.touch(a_key, time())
 
         return my_retval
 
     @staticmethod
     def num_active_keys():
-        if ApiGate.__active is None:
+        if ApiGate.__timeout is None:
             return 0
 
-        return len(ApiGate.active_now())
+        return ApiGate.__store.num_active(time() - ApiGate.__timeout)
 
     @staticmethod
-    def num_total_keys():
-        if ApiGate.__allowed is None:
-            return 0
+    def eviction_stats():
+        return ApiGate.__store.eviction_stats()
 
-        return len(ApiGate.__allowed.keys())
+    @staticmethod
+    def num_total_keys():
+        return ApiGate.__store.num_keys()
 
     @staticmethod
     def set_open(a_flag):
-        ApiGate.__open = a_flag
+        ApiGate.__store.set_open(a_flag)
 
     @staticmethod
     def is_open():
-        return ApiGate.__open
+        return ApiGate.__store.is_open()
+
+    @staticmethod
+    def take_token(a_key, a_route, a_tokens=1, a_key_bucket=True):
+        # RateDecision for a_tokens calls of a_route with a_key, rejected calls use no token
+        return RateLimiter.take(a_key, a_route, a_tokens=a_tokens, a_key_bucket=a_key_bucket)
 
     @staticmethod
     def is_valid(an_app, a_key, ignore_open=False):
         my_ret_val = False
 
         if ApiGate.is_open() or ignore_open:
-            if ApiGate.__allowed is not None:
-                my_ret_val = a_key in ApiGate.__allowed.keys()
+            my_ret_val = ApiGate.__store.has_key(a_key)
 
-                if my_ret_val:
-                    ApiGate.__active[a_key] = time()
+            if my_ret_val:
+                ApiGate.__store.touch(a_key, time())
 
             if not my_ret_val:
                 an_app.logger.info("api key rejected %s", get_safe_string(a_key))
@@ -130,3 +227,6 @@ class ApiGate:
             an_app.logger.debug("api is closed")
 
         return my_ret_val
+
+
+JsonCodec.add_constants(ApiGate, ApiGate.RESPONSES)
@@ -0,0 +1,292 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from time import time
+
+
+class EvictionStats:
+    # expired keys dropped by this process, the rate is per minute over the last WINDOW_SECS
+    WINDOW_SECS = 300
+
+    def __init__(self):
+        self.total = 0
+        self._minutes = deque()
+
+    def add(self, a_count, a_ts):
+        if a_count <= 0:
+            return
+
+        self.total += a_count
+
+        my_minute = int(a_ts // 60)
+        if len(self._minutes) > 0 and self._minutes[-1][0] == my_minute:
+            self._minutes[-1][1] += a_count
+        else:
+            self._minutes.append([my_minute, a_count])
+
+    def per_minute(self, a_ts):
+        my_window = EvictionStats.WINDOW_SECS // 60
+        my_first = int(a_ts // 60) - my_window
+        while len(self._minutes) > 0 and self._minutes[0][0] <= my_first:
+            self._minutes.popleft()
+
+        return sum(my_tmp_count for _, my_tmp_count in self._minutes) / my_window
+
+    def as_dict(self, a_ts):
+        return {"evicted": self.total, "per_minute": round(self.per_minute(a_ts), 2)}
+
+
+class ApiGateStore(ABC):
+    # where ApiGate keeps allowed keys, key activity and the open flag
+
+    @abstractmethod
+    def load_keys(self, a_keys):
+        # replaces all allowed keys with a_keys {key: description}
+        ...
+
+    @abstractmethod
+    def add_key(self, a_key, a_description):
+        ...
+
+    @abstractmethod
+    def remove_key(self, a_key):
+        ...
+
+    @abstractmethod
+    def has_key(self, a_key):
+        ...
+
+    @abstractmethod
+    def num_keys(self):
+        ...
+
+    @abstractmethod
+    def touch(self, a_key, a_ts):
+        ...
+
+    @abstractmethod
+    def last_seen(self, a_key):
+        ...
+
+    @abstractmethod
+    def active_since(self, a_threshold):
+        # last seen timestamps newer than a_threshold
+        ...
+
+    @abstractmethod
+    def num_active(self, a_threshold):
+        # number of keys seen after a_threshold, expired keys are evicted on the way
+        ...
+
+    @abstractmethod
+    def evict(self, a_threshold):
+        # drops keys not seen after a_threshold, returns how many
+        ...
+
+    @abstractmethod
+    def eviction_stats(self):
+        ...
+
+    @abstractmethod
+    def set_open(self, a_flag):
+        ...
+
+    @abstractmethod
+    def is_open(self):
+        ...
+
+
+class LocalApiGateStore(ApiGateStore):
+    # state of a single process, every worker has its own
+    # activity is kept in touch order, so expired keys are always at the front and eviction is amortised O(1)
+    def __init__(self):
+        self._allowed = {}
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = EvictionStats()
+        self._open = False
+
+    def load_keys(self, a_keys):
+        self._allowed = dict(a_keys)
+
+    def add_key(self, a_key, a_description):
+        self._allowed[a_key] = a_description
+
+    def remove_key(self, a_key):
+        self._allowed.pop(a_key, None)
+        with self._lock:
+            self._active.pop(a_key, None)
+
+    def has_key(self, a_key):
+        return a_key in self._allowed
+
+    def num_keys(self):
+        return len(self._allowed)
+
+    def touch(self, a_key, a_ts):
+        with self._lock:
+            self._active[a_key] = a_ts
+            self._active.move_to_end(a_key)
+
+    def last_seen(self, a_key):
+        return self._active.get(a_key, None)
+
+    def active_since(self, a_threshold):
+        self.evict(a_threshold)
+
+        with self._lock:
+            return list(self._active.values())
+
+    def num_active(self, a_threshold):
+        self.evict(a_threshold)
+
+        return len(self._active)
+
+    def evict(self, a_threshold):
+        my_ret_val = 0
+
+        with self._lock:
+            while len(self._active) > 0:
+                my_key = next(iter(self._active))
+                if self._active[my_key] > a_threshold:
+                    break
+
+                self._active.popitem(last=False)
+                my_ret_val += 1
+
+            self._evictions.add(my_ret_val, time())
+
+        return my_ret_val
+
+    def eviction_stats(self):
+        with self._lock:
+            return self._evictions.as_dict(time())
+
+    def set_open(self, a_flag):
+        self._open = a_flag
+
+    def is_open(self):
+        return self._open
+
+
+class SqliteApiGateStore(ApiGateStore):
+    # state shared by all workers on a host through one sqlite file in WAL mode
+    # reads are primary key lookups, activity writes are coalesced per key to one every TOUCH_SECS
+    # the active count is taken, and expired keys deleted, at most once every a_count_secs
+    TOUCH_SECS = 1.0
+
+    SCHEMA = ["create table if not exists allowed (key text primary key, description text) without rowid",
+              "create table if not exists active (key text primary key, ts real not null) without rowid",
+              "create index if not exists active_ts on active (ts)",
+              "create table if not exists flags (name text primary key, value integer) without rowid"]
+
+    def __init__(self, a_path, a_count_secs=TOUCH_SECS):
+        self._path = a_path
+        self._local = threading.local()
+        self._touched = {}
+        self._count_secs = a_count_secs
+        self._counted = (0, 0)
+        self._evictions = EvictionStats()
+
+        with self.get_connection() as my_connection:
+            for my_tmp_sql in SqliteApiGateStore.SCHEMA:
+                my_connection.execute(my_tmp_sql)
+
+    def get_connection(self):
+        # one connection per thread, reopened after a fork
+        my_connection = getattr(self._local, "connection", None)
+        if my_connection is None or self._local.pid != os.getpid():
+            my_connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+            my_connection.execute("pragma journal_mode=wal")
+            my_connection.execute("pragma synchronous=normal")
+
+            self._local.connection = my_connection
+            self._local.pid = os.getpid()
+            self._touched = {}
+
+        return my_connection
+
+    def load_keys(self, a_keys):
+        my_connection = self.get_connection()
+        my_connection.execute("begin immediate")
+        try:
+            my_connection.execute("delete from allowed")
+            my_connection.executemany("insert into allowed (key, description) values (?, ?)", list(a_keys.items()))
+            my_connection.execute("commit")
+        except Exception:
+            my_connection.execute("rollback")
+            raise
+
+    def add_key(self, a_key, a_description):
+        self.get_connection().execute("insert or replace into allowed (key, description) values (?, ?)",
+                                      (a_key, a_description))
+
+    def remove_key(self, a_key):
+        my_connection = self.get_connection()
+        my_connection.execute("delete from allowed where key = ?", (a_key,))
+        my_connection.execute("delete from active where key = ?", (a_key,))
+        self._touched.pop(a_key, None)
+
+    def has_key(self, a_key):
+        my_row = self.get_connection().execute("select 1 from allowed where key = ?", (a_key,)).fetchone()
+
+        return my_row is not None
+
+    def num_keys(self):
+        return self.get_connection().execute("select count(*) from allowed").fetchone()[0]
+
+    def touch(self, a_key, a_ts):
+        if a_ts - self._touched.get(a_key, 0) < SqliteApiGateStore.TOUCH_SECS:
+            return
+
+        self.get_connection().execute("insert or replace into active (key, ts) values (?, ?)", (a_key, a_ts))
+        self._touched[a_key] = a_ts
+
+    def last_seen(self, a_key):
+        my_row = self.get_connection().execute("select ts from active where key = ?", (a_key,)).fetchone()
+
+        return my_row[0] if my_row is not None else None
+
+    def active_since(self, a_threshold):
+        my_rows = self.get_connection().execute("select ts from active where ts > ?", (a_threshold,)).fetchall()
+
+        return [my_tmp_row[0] for my_tmp_row in my_rows]
+
+    def num_active(self, a_threshold):
+        my_now = time()
+        my_counted_at, my_count = self._counted
+        if my_now - my_counted_at < self._count_secs:
+            return my_count
+
+        self.evict(a_threshold)
+        my_count = self.get_connection().execute("select count(*) from active").fetchone()[0]
+        self._counted = (my_now, my_count)
+
+        return my_count
+
+    def evict(self, a_threshold):
+        my_cursor = self.get_connection().execute("delete from active where ts <= ?", (a_threshold,))
+        my_ret_val = max(my_cursor.rowcount, 0)
+        self._evictions.add(my_ret_val, time())
+
+        return my_ret_val
+
+    def eviction_stats(self):
+        return self._evictions.as_dict(time())
+
+    def set_open(self, a_flag):
+        self.get_connection().execute("insert or replace into flags (name, value) values ('open', ?)",
+                                      (1 if a_flag else 0,))
+
+    def is_open(self):
+        my_row = self.get_connection().execute("select value from flags where name = 'open'").fetchone()
+
+        return my_row is not None and my_row[0] == 1
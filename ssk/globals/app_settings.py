@@ -4,38 +4,152 @@
 #
 
 
+import time
+from collections import OrderedDict
+from threading import RLock
+
 from flask import current_app
 from sqlalchemy import and_
 from ..db import get_db
 from ssk.globals.setting_parser import SettingParser
 
+_MISSING = object()
+
 
 class AppSettings:
     ERROR_KEY_EMPTY = "Key cannot be empty"
 
+    # typed values of global settings by key and of user settings by (email, key), the latter in LRU order
+    # both are dropped when the setting_version counter moves, it is read at most every _check_secs
+    # so a conf set in another worker is seen without a restart
+    _lock = RLock()
     _globals = {}
+    _users = OrderedDict()
+    _max_users = 1000
+    _check_secs = 1.0
+    _checked_at = 0
+    _version = None
+    # bumped on every clear, a value read before a clear is not cached after it
+    _generation = 0
+
+    # key -> callbacks called with the new value when a system setting changes
+    _listeners = {}
+    _notified = {}
+
+    @staticmethod
+    def init(a_check_ms, a_max_users):
+        with AppSettings._lock:
+            AppSettings._check_secs = a_check_ms / 1000
+            AppSettings._max_users = a_max_users
+            AppSettings._version = None
+            AppSettings._checked_at = 0
+            AppSettings.clear()
+
+    @staticmethod
+    def clear():
+        with AppSettings._lock:
+            AppSettings._globals.clear()
+            AppSettings._users.clear()
+            AppSettings._generation += 1
+
+    @staticmethod
+    def check_version(a_force=False):
+        # returns True when the cache was dropped because the settings changed elsewhere
+        from ssk.models.setting import SettingVersion
+
+        my_now = time.monotonic()
+        if not a_force and my_now - AppSettings._checked_at < AppSettings._check_secs:
+            return False
+
+        AppSettings._checked_at = my_now
+        my_version = SettingVersion.get_version()
+
+        with AppSettings._lock:
+            if my_version == AppSettings._version:
+                return False
+
+            my_first = AppSettings._version is None
+            AppSettings._version = my_version
+            AppSettings.clear()
+
+        if not my_first:
+            AppSettings.notify_changed()
+
+        return True
+
+    @staticmethod
+    def changed():
+        # after a write in this process, other workers see the new version on their next check
+        from ssk.models.setting import SettingVersion
+
+        SettingVersion.bump()
+        AppSettings.clear()
+
+    @staticmethod
+    def listen(a_key, a_callback):
+        my_callbacks = AppSettings._listeners.setdefault(a_key, [])
+        if a_callback not in my_callbacks:
+            my_callbacks.append(a_callback)
+
+        AppSettings._notified[a_key] = AppSettings().get_setting(a_key)
+
+    @staticmethod
+    def notify(a_key, a_value):
+        AppSettings._notified[a_key] = a_value
+
+        for my_tmp_callback in AppSettings._listeners.get(a_key, []):
+            try:
+                my_tmp_callback(a_value)
+            except Exception as problem:
+                current_app.logger.error("setting {} listener failed {}".format(a_key, problem))
+
+    @staticmethod
+    def notify_changed():
+        # listened settings changed by another worker
+        for my_tmp_key in list(AppSettings._listeners.keys()):
+            my_value = AppSettings().get_setting(my_tmp_key)
+            if my_value != AppSettings._notified.get(my_tmp_key, None):
+                AppSettings.notify(my_tmp_key, my_value)
 
     def get_setting(self, a_key, an_owners_email=None):
-        from ssk.models.all_ssk_db import User
         from ssk.models.all_ssk_db import Setting
-        my_ret_val = None
+
+        AppSettings.check_version()
 
         if an_owners_email is not None:
-            my_user = User.get_by_email(an_owners_email)
-            if my_user is not None:
-                my_setting = Setting.get_by_owner_key(my_user.id, a_key)
+            my_cache_key = (an_owners_email, a_key)
+            my_cache = AppSettings._users
+        else:
+            my_cache_key = a_key
+            my_cache = AppSettings._globals
+
+        with AppSettings._lock:
+            my_ret_val = my_cache.get(my_cache_key, _MISSING)
+            if my_ret_val is not _MISSING:
+                if an_owners_email is not None:
+                    my_cache.move_to_end(my_cache_key)
+
+                return my_ret_val
 
-                if my_setting is not None:
-                    my_ret_val = SettingParser.parse(my_setting.type, my_setting.value)
+            my_generation = AppSettings._generation
+
+        my_ret_val = None
+        if an_owners_email is not None:
+            my_setting = Setting.get_by_owner_email_key(an_owners_email, a_key)
         else:
-            if a_key not in self._globals.keys():
-                my_setting = Setting.get_by_key(a_key)
+            my_setting = Setting.get_by_key(a_key)
 
-                if my_setting is not None:
-                    my_ret_val = SettingParser.parse(my_setting.type, my_setting.value)
-                    self._globals[a_key] = my_ret_val
-            else:
-                my_ret_val = self._globals[a_key]
+        if my_setting is not None:
+            my_ret_val = SettingParser.parse(my_setting.type, my_setting.value)
+
+        # missing settings are cached as None too
+        with AppSettings._lock:
+            if my_generation == AppSettings._generation:
+                my_cache[my_cache_key] = my_ret_val
+
+                if an_owners_email is not None:
+                    while len(my_cache) > AppSettings._max_users:
+                        my_cache.popitem(last=False)
 
         return my_ret_val
 
@@ -60,6 +174,7 @@ class AppSettings:
             if not my_setting.system:
                 get_db().session.delete(my_setting)
                 get_db().session.commit()
+                AppSettings.changed()
                 my_ret_val = True
                 my_ret_mesg = "OK: {} removed".format(a_key)
             else:
@@ -87,9 +202,7 @@ class AppSettings:
                 my_setting.system = a_value
                 get_db().session.add(my_setting)
                 get_db().session.commit()
-
-                if my_setting.system and a_key not in self._globals.keys():
-                    self._globals[a_key] = my_setting.value
+                AppSettings.changed()
 
                 my_ret_val = True
                 my_ret_mesg = "OK: {} system changed to {}".format(a_key, a_value)
@@ -157,9 +270,10 @@ class AppSettings:
 
             get_db().session.add(my_setting)
             get_db().session.commit()
+            AppSettings.changed()
 
             if my_setting.system:
-                self._globals[a_key] = my_value
+                AppSettings.notify(a_key, my_value)
 
             my_ret_val = True
             my_ret_mesg = "OK: {} changed from {} to {}".format(a_key, my_old_value, my_value)
@@ -171,6 +285,7 @@ class AppSettings:
 
             my_user.user_settings.append(my_setting)
             get_db().session.commit()
+            AppSettings.changed()
 
             my_ret_val = True
             my_ret_mesg = "OK: {} added. Value set to {}".format(a_key, my_value)
@@ -4,17 +4,60 @@
 #
 
 
-from threading import Thread
-from queue import Queue
+import time
+from threading import Thread, Lock
+
+from flask_login import current_user
+
+from .cmd_queue import CmdQueue
+
+
+class WorkerState:
+    # what one command worker is doing, for the pool report
+    def __init__(self, a_num):
+        self.num = a_num
+        self.thread = None
+        self.task_id = None
+        self.processed = 0
+        self.since = time.monotonic()
+
+    def set_busy(self, a_task_id):
+        self.task_id = a_task_id
+        self.since = time.monotonic()
+
+    def set_idle(self):
+        self.task_id = None
+        self.processed += 1
+        self.since = time.monotonic()
+
+    def is_busy(self):
+        return self.task_id is not None
+
+    def as_dict(self):
+        return {"worker": self.num,
+                "busy": self.is_busy(),
+                "task": self.task_id,
+                "processed": self.processed,
+                "secs": round(time.monotonic() - self.since, 1)}
 
 
 class CmdProcessor:
-    KILL_CMD = "k"
-    _cmd_queue = Queue()
+    # command workers scale between _min_workers and _max_workers with the queue depth,
+    # a worker idle for _idle_secs above the minimum retires, resize() moves the bounds at runtime
+    QUEUE_FULL = '[[ print "Error: command queue is full, try again later" ]]'
+    # seconds an idle worker waits before checking whether it should retire
+    POLL_SECS = 1
+
+    _cmd_queue = CmdQueue()
     _cmd_cnt = 0
     _job_mgr = None
     _logger = None
-    _workers = []
+    _lock = Lock()
+    _workers = {}
+    _next_num = 0
+    _min_workers = 0
+    _max_workers = 0
+    _idle_secs = 60
 
     @staticmethod
     def log(a_mesg, a_level="INFO"):
@@ -26,18 +69,18 @@ class CmdProcessor:
     @staticmethod
     def process_cmd(a_job_mgr, a_num, a_job_queue):
         CmdProcessor.log("starting command worker {}".format(a_num))
+        my_state = CmdProcessor._workers[a_num]
 
-        while True:
-            CmdProcessor.log("worker {} waiting for command".format(a_num))
+        while not CmdProcessor.retire(my_state):
+            my_cmd = a_job_queue.get(a_timeout=CmdProcessor.POLL_SECS)
 
-            my_cmd = a_job_queue.get()
-
-            if my_cmd == CmdProcessor.KILL_CMD:
-                raise SystemExit()
+            if my_cmd is None:
+                continue
 
             if a_job_mgr.is_queued(my_cmd.get_task_id()):
                 CmdProcessor.log("worker {} processing command {}".format(a_num, my_cmd.get_task_id()))
                 CmdProcessor._cmd_cnt += 1
+                my_state.set_busy(my_cmd.get_task_id())
                 try:
                     a_job_mgr.start_job(my_cmd)
                 except SystemExit:
@@ -45,38 +88,132 @@ class CmdProcessor:
                 except Exception as e:
                     CmdProcessor.log("worker {} processing command {} error {}".format(a_num, my_cmd.get_task_id(), e))
 
+                my_state.set_idle()
                 CmdProcessor.log("worker {} processing command {} ready".format(a_num, my_cmd.get_task_id()))
 
-            a_job_queue.task_done()
+        CmdProcessor.log("command worker {} stopped".format(a_num))
+
+    @staticmethod
+    def retire(a_state):
+        # True when the worker has to stop, it is removed from the pool then
+        with CmdProcessor._lock:
+            my_size = len(CmdProcessor._workers)
+            my_idle = not a_state.is_busy() and time.monotonic() - a_state.since >= CmdProcessor._idle_secs
+
+            if my_size > CmdProcessor._max_workers or (my_idle and my_size > CmdProcessor._min_workers):
+                CmdProcessor._workers.pop(a_state.num, None)
+                return True
+
+        return False
 
     @staticmethod
-    def start(a_job_mgr, a_logger, a_max_collectors):
+    def scale():
+        # adds workers up to the minimum, and for queued commands no idle worker can take, up to the maximum
+        with CmdProcessor._lock:
+            my_size = len(CmdProcessor._workers)
+            my_idle = sum(1 for my_tmp_state in CmdProcessor._workers.values() if not my_tmp_state.is_busy())
+            my_wanted = min(CmdProcessor._max_workers, my_size + max(0, CmdProcessor._cmd_queue.qsize() - my_idle))
+            my_wanted = max(my_wanted, CmdProcessor._min_workers)
+
+            for _ in range(my_size, my_wanted):
+                my_state = WorkerState(CmdProcessor._next_num)
+                CmdProcessor._next_num += 1
+
+                my_state.thread = Thread(target=CmdProcessor.process_cmd,
+                                         args=(CmdProcessor._job_mgr, my_state.num, CmdProcessor._cmd_queue))
+                CmdProcessor._workers[my_state.num] = my_state
+                my_state.thread.start()
+
+    @staticmethod
+    def start(a_job_mgr, a_logger, a_max_collectors, a_max_depth=0, a_min_collectors=None, an_idle_secs=60):
+        # without a_min_collectors the pool has a fixed size of a_max_collectors
         CmdProcessor._job_mgr = a_job_mgr
         CmdProcessor._logger = a_logger
+        CmdProcessor._cmd_queue.set_max_depth(a_max_depth)
+        CmdProcessor._idle_secs = an_idle_secs
         CmdProcessor.log("starting")
 
-        for my_tmp_idx in range(a_max_collectors):
-            worker = Thread(target=CmdProcessor.process_cmd, args=(a_job_mgr, my_tmp_idx, CmdProcessor._cmd_queue))
-            CmdProcessor._workers.append(worker)
-            worker.start()
+        if a_min_collectors is None:
+            a_min_collectors = a_max_collectors
+
+        CmdProcessor.resize(a_max_collectors, a_min_collectors)
+
+    @staticmethod
+    def resize(a_max_collectors, a_min_collectors=None):
+        # extra workers finish their command and retire within POLL_SECS
+        with CmdProcessor._lock:
+            CmdProcessor._max_workers = max(0, int(a_max_collectors))
+            if a_min_collectors is not None:
+                CmdProcessor._min_workers = max(0, int(a_min_collectors))
+            CmdProcessor._min_workers = min(CmdProcessor._min_workers, CmdProcessor._max_workers)
+
+        CmdProcessor.log("command workers min {} max {}".format(CmdProcessor._min_workers, CmdProcessor._max_workers))
+        CmdProcessor.scale()
 
     @staticmethod
     def stop():
-        for my_tmp_idx in range(len(CmdProcessor._workers)):
-            CmdProcessor.log("sending kill to worker {}".format(my_tmp_idx))
-            CmdProcessor._cmd_queue.put(CmdProcessor.KILL_CMD)
+        CmdProcessor.log("stopping {} command workers".format(CmdProcessor.pool_size()))
+        CmdProcessor.resize(0, 0)
 
     @staticmethod
-    def submit_cmd(a_cmd):
-        CmdProcessor._job_mgr.queue_job(a_cmd)
-        CmdProcessor._cmd_queue.put(a_cmd)
+    def pool_size():
+        return len(CmdProcessor._workers)
 
-        return CmdProcessor._cmd_queue.qsize()
+    @staticmethod
+    def pool_stats():
+        with CmdProcessor._lock:
+            my_workers = [my_tmp_state.as_dict() for my_tmp_state in CmdProcessor._workers.values()]
+
+        return {"size": len(my_workers),
+                "min": CmdProcessor._min_workers,
+                "max": CmdProcessor._max_workers,
+                "busy": sum(1 for my_tmp_worker in my_workers if my_tmp_worker["busy"]),
+                "workers": my_workers}
+
+    @staticmethod
+    def get_priority(a_cmd):
+        # jobs without an executor come from the system, e.g. the scheduler
+        if a_cmd.get_executor_id() is None:
+            return CmdQueue.SYSTEM
+
+        my_user = current_user._get_current_object()
+        if my_user is not None and not my_user.is_anonymous and my_user.id == a_cmd.get_executor_id():
+            if my_user.is_admin():
+                return CmdQueue.ADMIN
+
+        return CmdQueue.USER
+
+    @staticmethod
+    def submit_cmd(a_cmd, a_priority=None):
+        # raises queue.Full when the queue is at CMD_QUEUE_MAX_DEPTH, the job is not created then
+        if a_priority is None:
+            a_priority = CmdProcessor.get_priority(a_cmd)
+
+        # the slot is reserved first, so concurrent submits cannot go over the depth together
+        CmdProcessor._cmd_queue.reserve(a_priority)
+        try:
+            CmdProcessor._job_mgr.queue_job(a_cmd)
+        except Exception:
+            CmdProcessor._cmd_queue.release()
+            raise
+
+        my_ret_val = CmdProcessor._cmd_queue.put(a_cmd, a_priority, a_cmd.get_executor_id(), a_reserved=True)
+        CmdProcessor.scale()
+
+        return my_ret_val
 
     @staticmethod
     def cmd_queue_len():
         return CmdProcessor._cmd_queue.qsize()
 
+    @staticmethod
+    def max_depth():
+        return CmdProcessor._cmd_queue.get_max_depth()
+
+    @staticmethod
+    def queue_stats():
+        return CmdProcessor._cmd_queue.get_stats()
+
     @staticmethod
     def data_processed():
         return CmdProcessor._cmd_cnt
@@ -0,0 +1,128 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import time
+from collections import OrderedDict, deque
+from queue import Full
+from threading import Condition
+
+
+class ClassStats:
+    # queue-wait metrics of one priority class
+    def __init__(self):
+        self.submitted = 0
+        self.served = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+
+    def served_after(self, a_wait):
+        self.served += 1
+        self.wait_total += a_wait
+        self.wait_last = a_wait
+        self.wait_max = max(self.wait_max, a_wait)
+
+    def as_dict(self, a_queued):
+        my_avg = 0.0
+        if self.served > 0:
+            my_avg = self.wait_total / self.served
+
+        return {"queued": a_queued,
+                "submitted": self.submitted,
+                "served": self.served,
+                "rejected": self.rejected,
+                "wait_avg": round(my_avg, 3),
+                "wait_max": round(self.wait_max, 3),
+                "wait_last": round(self.wait_last, 3)}
+
+
+class CmdQueue:
+    # commands by priority class, round-robin over the executors within a class
+    # so one user with many queued jobs delays only their own jobs
+    SYSTEM = 0
+    ADMIN = 1
+    USER = 2
+    CLASSES = ["system", "admin", "user"]
+
+    def __init__(self, a_max_depth=0):
+        self._cond = Condition()
+        # one OrderedDict per class, executor id -> deque of (cmd, queued at)
+        self._lanes = [OrderedDict() for _ in CmdQueue.CLASSES]
+        self._sizes = [0 for _ in CmdQueue.CLASSES]
+        self._stats = [ClassStats() for _ in CmdQueue.CLASSES]
+        self._max_depth = a_max_depth
+        # slots taken by reserve and not yet filled by put
+        self._reserved = 0
+
+    def set_max_depth(self, a_max_depth):
+        # 0 means unbounded, system commands are never rejected
+        self._max_depth = a_max_depth
+
+    def get_max_depth(self):
+        return self._max_depth
+
+    def reserve(self, a_class):
+        # takes a slot for a command of a_class, raises Full when it would go over the depth limit;
+        # the slot is filled by put with a_reserved set, or given back by release
+        with self._cond:
+            if a_class != CmdQueue.SYSTEM and 0 < self._max_depth <= sum(self._sizes) + self._reserved:
+                self._stats[a_class].rejected += 1
+                raise Full("command queue is full ({} commands)".format(self._max_depth))
+
+            self._reserved += 1
+
+    def release(self):
+        with self._cond:
+            self._reserved -= 1
+
+    def put(self, a_cmd, a_class=USER, an_owner=None, a_reserved=False):
+        with self._cond:
+            if a_reserved:
+                self._reserved -= 1
+
+            my_lane = self._lanes[a_class]
+            if an_owner not in my_lane:
+                my_lane[an_owner] = deque()
+            my_lane[an_owner].append((a_cmd, time.monotonic()))
+
+            self._sizes[a_class] += 1
+            self._stats[a_class].submitted += 1
+            self._cond.notify()
+
+            return sum(self._sizes)
+
+    def get(self, a_timeout=None):
+        # highest class first, the executor served goes to the back of its class; None on timeout
+        with self._cond:
+            while sum(self._sizes) == 0:
+                if not self._cond.wait(a_timeout):
+                    return None
+
+            for my_tmp_class, my_tmp_lane in enumerate(self._lanes):
+                if self._sizes[my_tmp_class] == 0:
+                    continue
+
+                my_owner, my_items = next(iter(my_tmp_lane.items()))
+                my_cmd, my_queued_at = my_items.popleft()
+                if len(my_items) == 0:
+                    del my_tmp_lane[my_owner]
+                else:
+                    my_tmp_lane.move_to_end(my_owner)
+
+                self._sizes[my_tmp_class] -= 1
+                self._stats[my_tmp_class].served_after(time.monotonic() - my_queued_at)
+
+                return my_cmd
+
+    def qsize(self):
+        with self._cond:
+            return sum(self._sizes)
+
+    def get_stats(self):
+        with self._cond:
+            return {my_tmp_name: self._stats[my_tmp_class].as_dict(self._sizes[my_tmp_class])
+                    for my_tmp_class, my_tmp_name in enumerate(CmdQueue.CLASSES)}
@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+from collections import deque, OrderedDict
+from threading import Lock, Condition
+
+
+class JobTopic:
+    def __init__(self, a_lock, a_history):
+        self.events = deque(maxlen=a_history)
+        self.last_id = 0
+        self.finished = False
+        self.changed = Condition(a_lock)
+
+
+class JobEvents:
+    # in-process pub/sub of job progress, status and log lines
+    # every task has its own topic with a short history, so streams can resume from Last-Event-ID
+    PROGRESS = "message"
+    STATUS = "status"
+    LOG = "log"
+
+    _lock = Lock()
+    _topics = OrderedDict()
+    _streams = 0
+
+    _history = 200
+    _max_topics = 1000
+    _max_streams = 100
+
+    @staticmethod
+    def init(a_history, a_max_topics, a_max_streams):
+        JobEvents._history = a_history
+        JobEvents._max_topics = a_max_topics
+        JobEvents._max_streams = a_max_streams
+
+    @staticmethod
+    def publish(a_task_id, an_event, a_data, a_final=False):
+        with JobEvents._lock:
+            my_topic = JobEvents._topics.get(a_task_id, None)
+            if my_topic is None:
+                my_topic = JobTopic(JobEvents._lock, JobEvents._history)
+                JobEvents._topics[a_task_id] = my_topic
+                JobEvents.evict()
+
+            my_topic.last_id += 1
+            my_topic.events.append((my_topic.last_id, an_event, a_data))
+            my_topic.finished = my_topic.finished or a_final
+            my_topic.changed.notify_all()
+
+    @staticmethod
+    def evict():
+        # drops the oldest finished topics first, then the oldest at all
+        my_extra = len(JobEvents._topics) - JobEvents._max_topics
+        if my_extra <= 0:
+            return
+
+        my_finished = [my_tmp_id for my_tmp_id, my_tmp_topic in JobEvents._topics.items() if my_tmp_topic.finished]
+        for my_tmp_id in my_finished[:my_extra]:
+            JobEvents._topics.pop(my_tmp_id)
+
+        while len(JobEvents._topics) > JobEvents._max_topics:
+            JobEvents._topics.popitem(last=False)
+
+    @staticmethod
+    def has_topic(a_task_id):
+        return a_task_id in JobEvents._topics
+
+    @staticmethod
+    def wait(a_task_id, a_last_id, a_timeout):
+        # returns (events newer than a_last_id, finished flag), blocking up to a_timeout seconds
+        with JobEvents._lock:
+            my_topic = JobEvents._topics.get(a_task_id, None)
+            if my_topic is None:
+                return [], True
+
+            if a_last_id > my_topic.last_id:
+                # the id comes from an older topic, e.g. before a restart
+                a_last_id = 0
+
+            if my_topic.last_id <= a_last_id and not my_topic.finished:
+                my_topic.changed.wait(timeout=a_timeout)
+
+            my_events = [my_tmp_event for my_tmp_event in my_topic.events if my_tmp_event[0] > a_last_id]
+
+            return my_events, my_topic.finished
+
+    @staticmethod
+    def open_stream():
+        with JobEvents._lock:
+            if JobEvents._streams >= JobEvents._max_streams:
+                return False
+
+            JobEvents._streams += 1
+
+        return True
+
+    @staticmethod
+    def close_stream():
+        with JobEvents._lock:
+            JobEvents._streams -= 1
+
+    @staticmethod
+    def num_streams():
+        return JobEvents._streams
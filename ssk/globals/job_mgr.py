@@ -5,6 +5,8 @@
 
 
 import os
+from datetime import datetime
+from threading import RLock
 
 from flask import current_app
 from sqlalchemy.orm import exc
@@ -14,68 +16,150 @@ from ..logic.jobs.base_job import BaseJob
 from ..logic.jobs.empty_job import EmptyJob
 from ..models.job import Job
 from ..db import get_db
+from .job_events import JobEvents
 
 
 class JobMgr:
-    _queued_jobs = None
-    _active_jobs = None
+    # one registry of queued and active jobs per process
+    # all JobMgr instances share it, so creating a JobMgr does not touch the db
+    _queued_jobs = {}
+    _active_jobs = {}
+    # task ids loaded from the job table, another worker may run them, so the table has the last word
+    _recovered = set()
+    _loaded = False
+    _lock = RLock()
 
     def __init__(self):
-        # every thread has new g object, meaning also new JobMgr
-        # in case of a progress request from the gui, new thread needs to load jobs from the db
-        # to be able to monitor status
-        self._active_jobs = {}
+        if not JobMgr._loaded:
+            self.load()
+
+    @staticmethod
+    def reset():
+        # next JobMgr reloads the registry from the db
+        with JobMgr._lock:
+            JobMgr._active_jobs.clear()
+            JobMgr._queued_jobs.clear()
+            JobMgr._recovered.clear()
+            JobMgr._loaded = False
+
+    def load(self):
+        # recovers jobs left in the db, e.g. after a restart
+        my_active_jobs = {}
 
         my_all_jobs = get_db().session.query(Job).filter(Job.status == BaseJob.IN_PROG_STATUS).order_by(desc(Job.created)).all()
 
         for my_tmp_job in my_all_jobs:
-            my_tmp_task = EmptyJob(current_app, a_args=my_tmp_job.action)
-            my_tmp_task.set_executor_id(my_tmp_job.user_id)
-            my_tmp_task.set_task_id(my_tmp_job.task_id)
-            my_tmp_task.set_progress(my_tmp_job.progress)
-            my_tmp_task.set_logfile(my_tmp_job.logfile)
+            my_tmp_task = self.recover_job(my_tmp_job)
+            my_active_jobs[my_tmp_task.get_task_id()] = my_tmp_task
 
-            my_tmp_task.set_job_tracker(self)
-            self._active_jobs[my_tmp_task.get_task_id()] = my_tmp_task
-
-        self._queued_jobs = {}
+        my_queued_jobs = {}
 
         my_all_jobs = get_db().session.query(Job).filter(Job.status == BaseJob.QUEUED).order_by(desc(Job.created)).all()
 
         for my_tmp_job in my_all_jobs:
-            my_tmp_task = EmptyJob(current_app, a_args=my_tmp_job.action)
-            my_tmp_task.set_executor_id(my_tmp_job.user_id)
-            my_tmp_task.set_task_id(my_tmp_job.task_id)
-            my_tmp_task.set_progress(my_tmp_job.progress)
-            my_tmp_task.set_logfile(my_tmp_job.logfile)
-
-            my_tmp_task.set_job_tracker(self)
-            self._queued_jobs[my_tmp_task.get_task_id()] = my_tmp_task
+            my_tmp_task = self.recover_job(my_tmp_job)
+            my_queued_jobs[my_tmp_task.get_task_id()] = my_tmp_task
+
+        with JobMgr._lock:
+            JobMgr._active_jobs.clear()
+            JobMgr._active_jobs.update(my_active_jobs)
+            JobMgr._queued_jobs.clear()
+            JobMgr._queued_jobs.update(my_queued_jobs)
+            JobMgr._recovered.clear()
+            JobMgr._recovered.update(my_active_jobs.keys())
+            JobMgr._recovered.update(my_queued_jobs.keys())
+            JobMgr._loaded = True
+
+    def recover_job(self, a_job):
+        my_tmp_task = EmptyJob(current_app, a_args=a_job.action)
+        my_tmp_task.set_executor_id(a_job.user_id)
+        my_tmp_task.set_task_id(a_job.task_id)
+        # not set_progress, it would publish the progress and write it back
+        my_tmp_task._progress = a_job.progress
+        my_tmp_task.set_logfile(a_job.logfile)
+        my_tmp_task.set_job_tracker(self)
+
+        return my_tmp_task
+
+    def check_recovered(self, a_job_id):
+        # only the worker running a job updates its registry, a recovered one follows the job table
+        if a_job_id not in JobMgr._recovered:
+            return
+
+        my_db_job = Job.get_by_key(a_job_id)
+
+        with self._lock:
+            if my_db_job is None or my_db_job.status not in [BaseJob.IN_PROG_STATUS, BaseJob.QUEUED]:
+                self._active_jobs.pop(a_job_id, None)
+                self._queued_jobs.pop(a_job_id, None)
+                JobMgr._recovered.discard(a_job_id)
+            else:
+                my_job = self._queued_jobs.get(a_job_id, None) or self._active_jobs.get(a_job_id, None)
+                if my_job is not None:
+                    my_job._progress = my_db_job.progress
+                    if my_db_job.status == BaseJob.IN_PROG_STATUS and a_job_id in self._queued_jobs:
+                        self._active_jobs[a_job_id] = self._queued_jobs.pop(a_job_id)
 
     def total_active(self):
         return len(self._active_jobs)
 
+    @staticmethod
+    def num_active():
+        # same as total_active, without loading the registry
+        return len(JobMgr._active_jobs)
+
+    @staticmethod
+    def num_queued():
+        return len(JobMgr._queued_jobs)
+
     def total_queued(self):
         return len(self._queued_jobs)
 
     def is_active(self, a_job_id):
-        return a_job_id in self._active_jobs.keys()
+        self.check_recovered(a_job_id)
+
+        return a_job_id in self._active_jobs
 
     def is_queued(self, a_job_id):
-        return a_job_id in self._queued_jobs.keys()
+        self.check_recovered(a_job_id)
+
+        return a_job_id in self._queued_jobs
+
+    def get_job(self, a_job_id):
+        self.check_recovered(a_job_id)
+
+        my_ret_val = self._active_jobs.get(a_job_id, None)
+        if my_ret_val is None:
+            my_ret_val = self._queued_jobs.get(a_job_id, None)
+
+        return my_ret_val
+
+    def job_status_changed(self, a_job, a_status):
+        # called by BaseJob.set_status, keeps the registry in line with the job table
+        my_task_id = a_job.get_task_id()
+
+        with self._lock:
+            if a_status == BaseJob.QUEUED:
+                self._queued_jobs[my_task_id] = a_job
+            elif a_status == BaseJob.IN_PROG_STATUS:
+                self._queued_jobs.pop(my_task_id, None)
+                self._active_jobs[my_task_id] = a_job
+            else:
+                self._queued_jobs.pop(my_task_id, None)
+                self._active_jobs.pop(my_task_id, None)
 
     def queue_job(self, a_job):
         a_job.set_job_tracker(self)
-        self._queued_jobs[a_job.get_task_id()] = a_job
+        with self._lock:
+            self._queued_jobs[a_job.get_task_id()] = a_job
         a_job.queue()
 
         return a_job
 
     def start_job(self, a_job):
-        if a_job.get_task_id() in self._queued_jobs.keys():
-            self._queued_jobs.pop(a_job.get_task_id())
-
-        self._active_jobs[a_job.get_task_id()] = a_job
+        with self._lock:
+            self._queued_jobs.pop(a_job.get_task_id(), None)
+            self._active_jobs[a_job.get_task_id()] = a_job
         a_job.start()
 
         return a_job
@@ -94,6 +178,10 @@ class JobMgr:
 
         return my_all_jobs
 
+    def iter_jobs_by_user(self, a_user_id, a_batch=100):
+        # like get_all_jobs_by_user, fetched a_batch rows at a time for the streamed job list
+        return get_db().session.query(Job).filter(and_(Job.user_id == a_user_id)).order_by(desc(Job.created)).yield_per(a_batch)
+
     def get_all_jobs_by_user(self, a_user_id):
         my_all_jobs = get_db().session.query(Job).filter(and_(Job.user_id == a_user_id)).order_by(desc(Job.created)).all()
 
@@ -104,10 +192,16 @@ class JobMgr:
 
         if a_job_id != "-":
             my_ret_val = 100
+            self.check_recovered(a_job_id)
 
-            if self.is_active(a_job_id):
-                my_job = self._active_jobs[a_job_id]
+            my_job = self._active_jobs.get(a_job_id, None)
+            if my_job is not None:
                 my_ret_val = my_job.get_progress()
+            elif not self.is_queued(a_job_id):
+                # the job may run in another worker process
+                my_db_job = Job.get_by_key(a_job_id)
+                if my_db_job is not None and my_db_job.status in [BaseJob.IN_PROG_STATUS, BaseJob.QUEUED]:
+                    my_ret_val = my_db_job.progress
 
         return my_ret_val
 
@@ -124,40 +218,60 @@ class JobMgr:
         my_ret_val = False
         my_mesg = ""
 
-        if self.is_active(a_job_id):
-            my_job = self._active_jobs[a_job_id]
-            my_job.stop()
+        # a recovered job that ended meanwhile keeps its status
+        self.check_recovered(a_job_id)
 
-            self._active_jobs.pop(a_job_id)
+        with self._lock:
+            JobMgr._recovered.discard(a_job_id)
+            my_job = self._active_jobs.pop(a_job_id, None)
+            if my_job is None:
+                my_job = self._queued_jobs.pop(a_job_id, None)
 
-            my_ret_val = True
-        elif self.is_queued(a_job_id):
-            my_job = self._queued_jobs[a_job_id]
+        if my_job is not None:
             my_job.stop()
 
-            self._queued_jobs.pop(a_job_id)
-
+            my_ret_val = True
+        elif self.stop_db_job(a_job_id):
             my_ret_val = True
         else:
             my_mesg = "Error: Job {} Not Found".format(a_job_id)
 
         return my_ret_val, my_mesg
 
-    def finish_job(self, a_job_id):
-        my_ret_val = False
-        if self.is_active(a_job_id):
-            self._active_jobs.pop(a_job_id)
+    @staticmethod
+    def stop_db_job(a_job_id):
+        # the job runs or waits in another worker process, its persist_progress sees the status and cancels it
+        my_job = Job.get_by_key(a_job_id)
+        if my_job is None or my_job.status not in [BaseJob.IN_PROG_STATUS, BaseJob.QUEUED]:
+            return False
 
-            my_ret_val = True
+        my_job.status = BaseJob.STOPPED_STATUS
+        my_job.done = datetime.now()
+        get_db().session.add(my_job)
+        get_db().session.commit()
 
-        return my_ret_val
+        JobEvents.publish(a_job_id, JobEvents.STATUS, BaseJob.STOPPED_STATUS, a_final=True)
+
+        return True
+
+    def finish_job(self, a_job_id):
+        with self._lock:
+            my_job = self._active_jobs.pop(a_job_id, None)
+
+        return my_job is not None
 
     def stop_all(self, a_status):
         my_to_stop = {}
-        if a_status == BaseJob.IN_PROG_STATUS:
-            my_to_stop = dict(self._active_jobs)
-        if a_status == BaseJob.QUEUED:
-            my_to_stop = dict(self._queued_jobs)
+        with self._lock:
+            if a_status == BaseJob.IN_PROG_STATUS:
+                my_to_stop = dict(self._active_jobs)
+            if a_status == BaseJob.QUEUED:
+                my_to_stop = dict(self._queued_jobs)
+
+        # and the ones of other worker processes
+        if a_status in [BaseJob.IN_PROG_STATUS, BaseJob.QUEUED]:
+            for my_tmp_job in Job.query.filter_by(status=a_status).all():
+                my_to_stop.setdefault(my_tmp_job.task_id, None)
 
         my_cnt = 0
         for my_job_id in my_to_stop:
@@ -184,8 +298,13 @@ class JobMgr:
         from ..db import get_db
 
         try:
-            if not self.is_active(a_job_id) and not self.is_queued(a_job_id):
-                my_job = Job.get_by_key(a_job_id)
+            my_job = Job.get_by_key(a_job_id)
+
+            # the job may run or wait in another worker process
+            my_running = self.is_active(a_job_id) or self.is_queued(a_job_id) or \
+                (my_job is not None and my_job.status in [BaseJob.IN_PROG_STATUS, BaseJob.QUEUED])
+
+            if not my_running:
                 if my_job is not None:
                     if my_job.logfile is not None and os.path.exists(my_job.logfile):
                         try:
@@ -0,0 +1,185 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from queue import Empty
+from threading import Thread, Lock, RLock, Event
+
+from flask import current_app
+
+from .job_events import JobEvents
+
+
+class JobPool:
+    # worker processes for jobs with CPU_BOUND set, so they do not hold the GIL of the web worker
+    # the CmdProcessor thread waits for the result, status, start and done stay in this process;
+    # progress and log lines come back over a queue, stops reach the child through the job table
+    END = "end"
+
+    _lock = Lock()
+    # held while the executor is replaced, the relay thread never takes it
+    _start_lock = RLock()
+    _executor = None
+    _events = None
+    _relay = None
+    _running = False
+    _at_exit = False
+    _app = None
+    _size = 0
+
+    # task id -> job of this process, and the event set when the child sent its last event
+    _jobs = {}
+    _ends = {}
+
+    @staticmethod
+    def start(an_app, a_size):
+        with JobPool._start_lock:
+            JobPool.stop()
+
+            JobPool._app = an_app
+            JobPool._size = a_size
+
+            # fork keeps the app and its config, the job class is sent by name
+            my_context = multiprocessing.get_context("fork")
+            JobPool._events = my_context.Queue()
+            JobPool._executor = ProcessPoolExecutor(max_workers=a_size,
+                                                    mp_context=my_context,
+                                                    initializer=JobPool.init_worker,
+                                                    initargs=(an_app, JobPool._events))
+            # fork the workers now, before the process runs more threads
+            JobPool._executor.submit(int).result()
+
+            JobPool._running = True
+            JobPool._relay = Thread(target=JobPool.process_events, daemon=True)
+            JobPool._relay.start()
+
+            if not JobPool._at_exit:
+                atexit.register(JobPool.stop)
+                JobPool._at_exit = True
+
+    @staticmethod
+    def stop():
+        with JobPool._start_lock:
+            JobPool._running = False
+
+            if JobPool._relay is not None:
+                JobPool._events.put(None)
+                JobPool._relay.join(timeout=5)
+                JobPool._relay = None
+
+            if JobPool._executor is not None:
+                JobPool._executor.shutdown(wait=True, cancel_futures=True)
+                JobPool._executor = None
+
+    @staticmethod
+    def is_running():
+        return JobPool._running
+
+    @staticmethod
+    def get_size():
+        return JobPool._size
+
+    @staticmethod
+    def init_worker(an_app, an_events):
+        JobPool._app = an_app
+        JobPool._events = an_events
+
+        # connections opened by the parent must not be shared with it
+        from ..db import func_db
+        with an_app.app_context():
+            for my_tmp_engine in func_db.engines.values():
+                my_tmp_engine.dispose(close=False)
+
+    @staticmethod
+    def run_job(a_class, a_task_id, an_args, an_executor_id):
+        # runs in the worker process, returns the status the job ended with
+        from ..logic.jobs.base_job import BaseJob
+
+        my_ret_val = BaseJob.DONE_STATUS
+
+        with JobPool._app.app_context():
+            my_job = a_class(current_app, an_args)
+            my_job.set_task_id(a_task_id)
+            my_job.set_executor_id(an_executor_id)
+            my_job.set_relay(JobPool._events)
+
+            try:
+                my_job.work()
+            except SystemExit:
+                my_ret_val = BaseJob.STOPPED_STATUS
+            finally:
+                JobPool._events.put((a_task_id, JobPool.END, None, False))
+
+        return my_ret_val
+
+    @staticmethod
+    def run(a_job):
+        # runs a_job in the pool and waits for it, exceptions of the job are raised here
+        my_task_id = a_job.get_task_id()
+        my_end = Event()
+
+        with JobPool._start_lock:
+            my_executor = JobPool._executor
+
+        with JobPool._lock:
+            JobPool._jobs[my_task_id] = a_job
+            JobPool._ends[my_task_id] = my_end
+
+        try:
+            my_future = my_executor.submit(JobPool.run_job, type(a_job), my_task_id, a_job.get_args(),
+                                           a_job.get_executor_id())
+            my_ret_val = my_future.result()
+
+            # events of the child are published before the job is marked done
+            my_end.wait(timeout=5)
+        except BrokenProcessPool:
+            JobPool.restart(my_executor, my_task_id)
+            raise
+        finally:
+            with JobPool._lock:
+                JobPool._jobs.pop(my_task_id, None)
+                JobPool._ends.pop(my_task_id, None)
+
+        return my_ret_val
+
+    @staticmethod
+    def restart(a_broken, a_task_id):
+        # every job waiting on a broken pool gets BrokenProcessPool, only the first one restarts it;
+        # the new workers fork from a process already running the web and CmdProcessor threads,
+        # only the forking thread lives on in them, locks other threads held there stay locked
+        with JobPool._start_lock:
+            if JobPool._executor is not a_broken or not JobPool._running:
+                return
+
+            JobPool._app.logger.error("job pool broken by task {}, restarting".format(a_task_id))
+            JobPool.start(JobPool._app, JobPool._size)
+
+    @staticmethod
+    def process_events():
+        while JobPool._running:
+            try:
+                my_event = JobPool._events.get(timeout=1)
+            except (Empty, OSError, EOFError):
+                continue
+
+            if my_event is None:
+                break
+
+            my_task_id, my_kind, my_data, my_final = my_event
+            with JobPool._lock:
+                my_job = JobPool._jobs.get(my_task_id, None)
+                my_end = JobPool._ends.get(my_task_id, None)
+
+            if my_kind == JobPool.END:
+                if my_end is not None:
+                    my_end.set()
+            elif my_job is not None:
+                my_job.relayed(my_kind, my_data, my_final)
+            else:
+                JobEvents.publish(my_task_id, my_kind, my_data, a_final=my_final)
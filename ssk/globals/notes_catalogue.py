@@ -0,0 +1,136 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import csv
+import os
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from threading import Lock
+
+WORD_RE = re.compile(r"\w+")
+
+NotesIndex = namedtuple("NotesIndex", ["notes", "created", "by_created", "by_note", "by_label", "by_word"])
+
+
+class NotesCatalogue:
+    # meta.csv of the notes, loaded once and again when its mtime changes
+    # notes are listed in meta.csv order, with indexes by note, label, created date and
+    # words of the title, subtitle and labels
+    LABEL_SEP = "|"
+
+    _lock = Lock()
+    _path = None
+    _mtime = None
+
+    # replaced as a whole on reload, readers take it once
+    _index = NotesIndex(notes=[], created=[], by_created=[], by_note={}, by_label={}, by_word={})
+
+    @staticmethod
+    def load(a_path):
+        try:
+            my_mtime = os.path.getmtime(a_path)
+        except OSError:
+            my_mtime = None
+
+        with NotesCatalogue._lock:
+            if my_mtime is not None and a_path == NotesCatalogue._path and my_mtime == NotesCatalogue._mtime:
+                return
+
+            my_notes = []
+            with open(a_path) as csv_file:
+                csv_reader = csv.reader(csv_file, delimiter=',')
+                line_count = 0
+                for row in csv_reader:
+                    if line_count > 0:
+                        my_notes.append({"note": row[1].strip(),
+                                         "title": row[2].strip(),
+                                         "subtitle": row[3].strip(),
+                                         "created": row[4].strip(),
+                                         "labels": row[5].strip()})
+                    line_count += 1
+
+            NotesCatalogue._index = NotesCatalogue.index(my_notes)
+            NotesCatalogue._path = a_path
+            NotesCatalogue._mtime = my_mtime
+
+    @staticmethod
+    def index(a_notes):
+        # created dates sorted, with the position of their note, for date ranges
+        my_by_created = sorted(range(len(a_notes)), key=lambda a_pos: a_notes[a_pos]["created"])
+
+        my_by_note = {}
+        my_by_label = {}
+        my_by_word = {}
+        for my_tmp_pos, my_tmp_note in enumerate(a_notes):
+            my_by_note[my_tmp_note["note"]] = my_tmp_pos
+
+            for my_tmp_label in NotesCatalogue.get_labels(my_tmp_note):
+                my_by_label.setdefault(my_tmp_label, []).append(my_tmp_pos)
+
+            my_text = " ".join([my_tmp_note["title"], my_tmp_note["subtitle"], my_tmp_note["labels"]])
+            for my_tmp_word in WORD_RE.findall(my_text.lower()):
+                my_by_word.setdefault(my_tmp_word, set()).add(my_tmp_pos)
+
+        return NotesIndex(notes=a_notes,
+                          created=[a_notes[my_tmp_pos]["created"] for my_tmp_pos in my_by_created],
+                          by_created=my_by_created,
+                          by_note=my_by_note,
+                          by_label=my_by_label,
+                          by_word=my_by_word)
+
+    @staticmethod
+    def get_labels(a_note):
+        return [my_tmp_label.strip() for my_tmp_label in a_note["labels"].split(NotesCatalogue.LABEL_SEP)
+                if len(my_tmp_label.strip()) > 0]
+
+    @staticmethod
+    def get(a_note):
+        my_index = NotesCatalogue._index
+        my_pos = my_index.by_note.get(a_note, None)
+        if my_pos is None:
+            return None
+
+        return my_index.notes[my_pos]
+
+    @staticmethod
+    def get_all_labels():
+        return sorted(NotesCatalogue._index.by_label.keys())
+
+    @staticmethod
+    def size():
+        return len(NotesCatalogue._index.notes)
+
+    @staticmethod
+    def find(a_query=None, a_label=None, a_from=None, a_to=None, a_page=1, a_per_page=20):
+        # returns the notes of a_page and the number of notes matching
+        # a_query matches notes having all its words, a_from and a_to are inclusive created dates
+        my_index = NotesCatalogue._index
+        my_notes = my_index.notes
+        my_start = (max(a_page, 1) - 1) * a_per_page
+
+        my_matches = None
+        if a_from is not None or a_to is not None:
+            my_low = 0 if a_from is None else bisect_left(my_index.created, a_from)
+            my_high = len(my_index.created) if a_to is None else bisect_right(my_index.created, a_to)
+            my_matches = set(my_index.by_created[my_low:my_high])
+
+        if a_label is not None:
+            my_positions = set(my_index.by_label.get(a_label, []))
+            my_matches = my_positions if my_matches is None else my_matches & my_positions
+
+        if a_query is not None:
+            for my_tmp_word in WORD_RE.findall(a_query.lower()):
+                my_positions = my_index.by_word.get(my_tmp_word, set())
+                my_matches = set(my_positions) if my_matches is None else my_matches & my_positions
+
+        if my_matches is None:
+            # no filter, the page is a slice of the list
+            return my_notes[my_start:my_start + a_per_page], len(my_notes)
+
+        my_positions = sorted(my_matches)
+
+        return [my_notes[my_tmp_pos] for my_tmp_pos in my_positions[my_start:my_start + a_per_page]], len(my_positions)
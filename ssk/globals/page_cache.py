@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from threading import Lock
+
+from flask import request, make_response
+from flask_login import current_user
+
+PageEntry = namedtuple("PageEntry", ["mtime", "etag", "body"])
+
+
+class PageCache:
+    # rendered notes and the post list, keyed by page and the mtime of the file they are built from
+    # only anonymous views are cached, the layout shows the user and admin links otherwise
+    _lock = Lock()
+    _pages = OrderedDict()
+    _max_pages = 256
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def init(a_max_pages):
+        with PageCache._lock:
+            PageCache._max_pages = a_max_pages
+            PageCache._pages.clear()
+
+    @staticmethod
+    def get_mtime(a_path):
+        try:
+            return os.path.getmtime(a_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def get(a_key, a_mtime):
+        with PageCache._lock:
+            my_entry = PageCache._pages.get(a_key, None)
+            if my_entry is None or my_entry.mtime != a_mtime:
+                return None
+
+            PageCache._pages.move_to_end(a_key)
+
+        return my_entry
+
+    @staticmethod
+    def put(a_key, a_mtime, a_body):
+        my_etag = hashlib.sha1("{}:{}".format(a_key, a_mtime).encode("utf-8")).hexdigest()
+        my_entry = PageEntry(mtime=a_mtime, etag=my_etag, body=a_body)
+
+        with PageCache._lock:
+            PageCache._pages[a_key] = my_entry
+            PageCache._pages.move_to_end(a_key)
+
+            while len(PageCache._pages) > PageCache._max_pages:
+                PageCache._pages.popitem(last=False)
+
+        return my_entry
+
+    @staticmethod
+    def respond(a_key, a_path, a_render):
+        # a_render builds the page, it is called again only when the file at a_path changed
+        # pages whose file is missing are not cached, a_render decides what to show for them
+        my_mtime = PageCache.get_mtime(a_path)
+        if PageCache._max_pages <= 0 or my_mtime is None or not current_user.is_anonymous:
+            return a_render()
+
+        my_entry = PageCache.get(a_key, my_mtime)
+        if my_entry is None:
+            PageCache._misses += 1
+            my_entry = PageCache.put(a_key, my_mtime, a_render())
+        else:
+            PageCache._hits += 1
+
+        my_response = make_response(my_entry.body)
+        my_response.set_etag(my_entry.etag)
+        my_response.last_modified = datetime.fromtimestamp(my_mtime, tz=timezone.utc)
+        my_response.cache_control.public = True
+        my_response.cache_control.no_cache = True
+        my_response.vary.add("Cookie")
+
+        return my_response.make_conditional(request)
+
+    @staticmethod
+    def clear():
+        with PageCache._lock:
+            PageCache._pages.clear()
+
+    @staticmethod
+    def get_stats():
+        return {"pages": len(PageCache._pages), "hits": PageCache._hits, "misses": PageCache._misses}
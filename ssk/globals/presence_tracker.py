@@ -0,0 +1,130 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import atexit
+from datetime import datetime, timedelta
+from threading import Thread, Lock, Event
+
+from sqlalchemy import update
+
+
+class PresenceTracker:
+    # keeps last seen timestamps in memory
+    # and writes them to user.last_access with one bulk update per interval
+    ACTIVE_MINUTES = 15
+
+    _last_seen = {}
+    _dirty = set()
+    _lock = Lock()
+    _wakeup = Event()
+    _app = None
+    _flusher = None
+    _running = False
+    _at_exit = False
+    _interval = 60
+
+    @staticmethod
+    def start(an_app, an_interval):
+        PresenceTracker._app = an_app
+        PresenceTracker._interval = an_interval
+
+        if PresenceTracker._flusher is None or not PresenceTracker._flusher.is_alive():
+            PresenceTracker._running = True
+            PresenceTracker._flusher = Thread(target=PresenceTracker.process_flush, daemon=True)
+            PresenceTracker._flusher.start()
+
+        if not PresenceTracker._at_exit:
+            atexit.register(PresenceTracker.stop)
+            PresenceTracker._at_exit = True
+
+    @staticmethod
+    def stop():
+        PresenceTracker._running = False
+        PresenceTracker._wakeup.set()
+
+        if PresenceTracker._flusher is not None:
+            PresenceTracker._flusher.join(timeout=PresenceTracker._interval + 1)
+            PresenceTracker._flusher = None
+
+        return PresenceTracker.flush()
+
+    @staticmethod
+    def touch(a_user_id, a_when=None):
+        if a_when is None:
+            a_when = datetime.now()
+
+        with PresenceTracker._lock:
+            PresenceTracker._last_seen[a_user_id] = a_when
+            PresenceTracker._dirty.add(a_user_id)
+
+    @staticmethod
+    def last_seen(a_user_id):
+        return PresenceTracker._last_seen.get(a_user_id, None)
+
+    @staticmethod
+    def num_active(a_minutes=ACTIVE_MINUTES):
+        my_threshold = datetime.now() - timedelta(minutes=a_minutes)
+
+        with PresenceTracker._lock:
+            my_ret_val = sum(1 for my_tmp_ts in PresenceTracker._last_seen.values() if my_tmp_ts > my_threshold)
+
+        return my_ret_val
+
+    @staticmethod
+    def take_dirty():
+        with PresenceTracker._lock:
+            my_threshold = datetime.now() - timedelta(minutes=PresenceTracker.ACTIVE_MINUTES)
+            my_batch = [{"id": my_tmp_id, "last_access": PresenceTracker._last_seen[my_tmp_id]}
+                        for my_tmp_id in PresenceTracker._dirty]
+            PresenceTracker._dirty = set()
+
+            # nobody asks about users idle for longer than the active window
+            my_idle = [my_tmp_id for my_tmp_id, my_tmp_ts in PresenceTracker._last_seen.items()
+                       if my_tmp_ts <= my_threshold]
+            for my_tmp_id in my_idle:
+                PresenceTracker._last_seen.pop(my_tmp_id)
+
+        return my_batch
+
+    @staticmethod
+    def flush():
+        if PresenceTracker._app is None:
+            return 0
+
+        from ..db import get_db
+        from ..models.user import User
+
+        with PresenceTracker._app.app_context():
+            my_batch = PresenceTracker.take_dirty()
+
+            if len(my_batch) > 0:
+                try:
+                    get_db().session.execute(update(User), my_batch)
+                    get_db().session.commit()
+                except Exception as e:
+                    get_db().session.rollback()
+                    PresenceTracker._app.logger.error("presence flush of {} users failed {}".format(len(my_batch), e))
+
+                    # keep them for the next round unless a newer touch arrived meanwhile
+                    with PresenceTracker._lock:
+                        for my_tmp_item in my_batch:
+                            PresenceTracker._last_seen.setdefault(my_tmp_item["id"], my_tmp_item["last_access"])
+                            PresenceTracker._dirty.add(my_tmp_item["id"])
+
+                    return 0
+
+        return len(my_batch)
+
+    @staticmethod
+    def process_flush():
+        while PresenceTracker._running:
+            PresenceTracker._wakeup.wait(timeout=PresenceTracker._interval)
+            PresenceTracker._wakeup.clear()
+
+            try:
+                PresenceTracker.flush()
+            except Exception as e:
+                PresenceTracker._app.logger.error("presence flusher error {}".format(e))
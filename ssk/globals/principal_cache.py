@@ -0,0 +1,177 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import request, g
+
+from ..ssk_consts import SSK_ADMIN_GROUP
+
+PrincipalEntry = namedtuple("PrincipalEntry", ["id", "username", "email", "active", "email_confirmed_at",
+                                               "role_names", "loaded_at"])
+PrincipalRole = namedtuple("PrincipalRole", ["name"])
+
+
+class Principal:
+    # the logged in user as the request gates see it, built from a cached entry without a db query
+    # any other attribute, or setting one, loads the User row once per request
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, a_token, an_entry):
+        object.__setattr__(self, "_token", a_token)
+        object.__setattr__(self, "_entry", an_entry)
+        object.__setattr__(self, "roles", [PrincipalRole(my_tmp_name) for my_tmp_name in an_entry.role_names])
+
+    @property
+    def id(self):
+        return self._entry.id
+
+    @property
+    def username(self):
+        return self._entry.username
+
+    @property
+    def email(self):
+        return self._entry.email
+
+    @property
+    def active(self):
+        return self._entry.active
+
+    @property
+    def is_active(self):
+        return self._entry.active
+
+    @property
+    def email_confirmed_at(self):
+        return self._entry.email_confirmed_at
+
+    def get_id(self):
+        return self._token
+
+    def has_role(self, a_role):
+        return a_role in self._entry.role_names
+
+    def has_roles(self, *requirements):
+        # same rules as flask_user, a tuple is met by any of its roles
+        for my_tmp_requirement in requirements:
+            if isinstance(my_tmp_requirement, (list, tuple)):
+                if not any(my_tmp_role in self._entry.role_names for my_tmp_role in my_tmp_requirement):
+                    return False
+            elif my_tmp_requirement not in self._entry.role_names:
+                return False
+
+        return True
+
+    def is_admin(self):
+        return SSK_ADMIN_GROUP in self._entry.role_names
+
+    def get_user(self):
+        from ..db import get_db
+        from ..models.user import User
+
+        my_users = g.setdefault("ssk_principal_users", {})
+        if self._entry.id not in my_users:
+            my_users[self._entry.id] = get_db().session.get(User, self._entry.id)
+
+        return my_users[self._entry.id]
+
+    def __getattr__(self, a_name):
+        return getattr(self.get_user(), a_name)
+
+    def __setattr__(self, a_name, a_value):
+        setattr(self.get_user(), a_name, a_value)
+
+    def __repr__(self):
+        return self._entry.email
+
+
+class PrincipalCache:
+    # login tokens of recent sessions -> the user id, names, active flag and role names,
+    # kept for _ttl seconds so GET requests are gated without loading the User row and its roles
+    # GroupCmd and UserCmd drop the entries of the users they change, other workers follow within the ttl
+    _lock = Lock()
+    _entries = OrderedDict()
+    _ttl = 10
+    _max_entries = 5000
+    _hits = 0
+    _misses = 0
+
+    @staticmethod
+    def init(a_ttl, a_max_entries):
+        with PrincipalCache._lock:
+            PrincipalCache._ttl = a_ttl
+            PrincipalCache._max_entries = a_max_entries
+            PrincipalCache._entries.clear()
+
+    @staticmethod
+    def is_fast_path():
+        # flask_user account pages change and save the user, they always get the User row
+        return request.method in ("GET", "HEAD") and not (request.endpoint or "").startswith("user.")
+
+    @staticmethod
+    def load(a_token):
+        # flask_login user loader
+        from ..models.user import User
+
+        if PrincipalCache._ttl <= 0 or not PrincipalCache.is_fast_path():
+            return User.get_user_by_token(a_token)
+
+        my_now = time.monotonic()
+        with PrincipalCache._lock:
+            my_entry = PrincipalCache._entries.get(a_token, None)
+            if my_entry is not None and my_now - my_entry.loaded_at < PrincipalCache._ttl:
+                PrincipalCache._entries.move_to_end(a_token)
+                PrincipalCache._hits += 1
+                return Principal(a_token, my_entry)
+
+        PrincipalCache._misses += 1
+        my_user = User.get_user_by_token(a_token)
+        if my_user is not None:
+            PrincipalCache.put(a_token, my_user, my_now)
+
+        return my_user
+
+    @staticmethod
+    def put(a_token, a_user, a_now):
+        my_entry = PrincipalEntry(id=a_user.id,
+                                  username=a_user.username,
+                                  email=a_user.email,
+                                  active=a_user.active,
+                                  email_confirmed_at=a_user.email_confirmed_at,
+                                  role_names=frozenset(my_tmp_role.name for my_tmp_role in a_user.roles),
+                                  loaded_at=a_now)
+
+        with PrincipalCache._lock:
+            PrincipalCache._entries[a_token] = my_entry
+            PrincipalCache._entries.move_to_end(a_token)
+
+            while len(PrincipalCache._entries) > PrincipalCache._max_entries:
+                PrincipalCache._entries.popitem(last=False)
+
+    @staticmethod
+    def invalidate_user(a_user_id):
+        with PrincipalCache._lock:
+            my_tokens = [my_tmp_token for my_tmp_token, my_tmp_entry in PrincipalCache._entries.items()
+                         if my_tmp_entry.id == a_user_id]
+            for my_tmp_token in my_tokens:
+                PrincipalCache._entries.pop(my_tmp_token)
+
+    @staticmethod
+    def clear():
+        with PrincipalCache._lock:
+            PrincipalCache._entries.clear()
+
+    @staticmethod
+    def size():
+        return len(PrincipalCache._entries)
+
+    @staticmethod
+    def get_stats():
+        return {"entries": PrincipalCache.size(), "hits": PrincipalCache._hits, "misses": PrincipalCache._misses}
@@ -0,0 +1,115 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import atexit
+import os
+from collections import namedtuple
+from threading import Thread, Lock, Event
+from time import time
+
+import psutil
+
+from ..json_codec import JsonCodec
+
+MetricsSnapshot = namedtuple("MetricsSnapshot", ["data", "body", "etag"])
+
+
+class ProcessMetrics:
+    # samples process metrics on a background tick, so /api/<v>/status serves a ready snapshot
+    # instead of calling psutil per request; the body is encoded once per sample
+    _lock = Lock()
+    _wakeup = Event()
+    _sampler = None
+    _running = False
+    _at_exit = False
+    _interval = 5
+    _app = None
+
+    _process = None
+    _pid = None
+    _seq = 0
+    _snapshot = None
+
+    @staticmethod
+    def start(an_app, an_interval):
+        ProcessMetrics._app = an_app
+        ProcessMetrics._interval = an_interval
+        ProcessMetrics.sample()
+
+        if ProcessMetrics._sampler is None or not ProcessMetrics._sampler.is_alive():
+            ProcessMetrics._running = True
+            ProcessMetrics._sampler = Thread(target=ProcessMetrics.process_sample, daemon=True)
+            ProcessMetrics._sampler.start()
+
+        if not ProcessMetrics._at_exit:
+            atexit.register(ProcessMetrics.stop)
+            ProcessMetrics._at_exit = True
+
+    @staticmethod
+    def stop():
+        ProcessMetrics._running = False
+        ProcessMetrics._wakeup.set()
+
+        if ProcessMetrics._sampler is not None:
+            ProcessMetrics._sampler.join(timeout=ProcessMetrics._interval + 1)
+            ProcessMetrics._sampler = None
+
+    @staticmethod
+    def get_process():
+        # psutil keeps the cpu counters between calls, a new process object after a fork
+        if ProcessMetrics._process is None or ProcessMetrics._pid != os.getpid():
+            ProcessMetrics._pid = os.getpid()
+            ProcessMetrics._process = psutil.Process(ProcessMetrics._pid)
+            ProcessMetrics._process.cpu_percent(interval=None)
+
+        return ProcessMetrics._process
+
+    @staticmethod
+    def sample():
+        from .cmd_processor import CmdProcessor
+        from .job_mgr import JobMgr
+
+        with ProcessMetrics._lock:
+            my_process = ProcessMetrics.get_process()
+            with my_process.oneshot():
+                my_data = {"ts": round(time(), 3),
+                           "mem": round(my_process.memory_info().rss / (1024 ** 2), 2),
+                           "cpu": my_process.cpu_percent(interval=None),
+                           "threads": my_process.num_threads(),
+                           "cmd_queue": CmdProcessor.cmd_queue_len(),
+                           "jobs_active": JobMgr.num_active(),
+                           "jobs_queued": JobMgr.num_queued()}
+
+            ProcessMetrics._seq += 1
+            ProcessMetrics._snapshot = MetricsSnapshot(my_data,
+                                                       JsonCodec.dumps(my_data),
+                                                       "{}-{}".format(ProcessMetrics._pid, ProcessMetrics._seq))
+
+            return ProcessMetrics._snapshot
+
+    @staticmethod
+    def get_snapshot():
+        # sampled on demand until the sampler has run
+        my_snapshot = ProcessMetrics._snapshot
+        if my_snapshot is None or ProcessMetrics._pid != os.getpid():
+            my_snapshot = ProcessMetrics.sample()
+
+        return my_snapshot
+
+    @staticmethod
+    def process_sample():
+        while ProcessMetrics._running:
+            ProcessMetrics._wakeup.wait(timeout=ProcessMetrics._interval)
+            ProcessMetrics._wakeup.clear()
+
+            if not ProcessMetrics._running:
+                break
+
+            try:
+                ProcessMetrics.sample()
+            except Exception as e:
+                # the last snapshot stays served
+                ProcessMetrics._app.logger.error("process metrics sampler error {}".format(e))
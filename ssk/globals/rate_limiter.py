@@ -0,0 +1,173 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import math
+from collections import namedtuple
+from threading import Lock
+from time import monotonic
+
+RateDecision = namedtuple("RateDecision", ["allowed", "limit", "remaining", "reset", "retry_after"])
+
+
+class RateLimiter:
+    # token buckets per api key and per route, refilled lazily when a token is taken
+    # a key gets the limits of its subscription tier, a route bucket is shared by all keys
+    # buckets are guarded by striped locks, so calls for different keys rarely wait for each other
+    # the buckets live in the process, with several workers every worker enforces the limits on its own
+    KEY = "key"
+    ROUTE = "route"
+    STRIPES = 64
+
+    _stripes = [Lock() for _ in range(STRIPES)]
+    _buckets = {}
+    _tiers = {}
+
+    _tier_limits = {}
+    _default_limit = None
+    _route_limits = {}
+
+    @staticmethod
+    def init(a_tier_limits, a_default_limit, a_route_limits):
+        # limits are {"rate": tokens per second, "burst": bucket size}, None means unlimited
+        RateLimiter._tier_limits = dict(a_tier_limits or {})
+        RateLimiter._default_limit = a_default_limit
+        RateLimiter._route_limits = dict(a_route_limits or {})
+        RateLimiter._buckets = {}
+        RateLimiter._tiers = {}
+
+    @staticmethod
+    def set_tiers(a_tiers):
+        # a_tiers is {key: [subscription names]}, a key gets the most generous of its tiers
+        my_tiers = {}
+        for my_tmp_key, my_tmp_names in a_tiers.items():
+            my_tiers[my_tmp_key] = RateLimiter.get_best_tier(my_tmp_names)
+
+        # a reload keeps the buckets of keys that stay in the same tier
+        my_old_tiers = RateLimiter._tiers
+        RateLimiter._tiers = my_tiers
+        for my_tmp_key, my_tmp_tier in my_old_tiers.items():
+            if my_tiers.get(my_tmp_key, None) != my_tmp_tier or my_tmp_key not in my_tiers:
+                RateLimiter._buckets.pop((RateLimiter.KEY, my_tmp_key), None)
+
+    @staticmethod
+    def set_tier(a_key, a_names):
+        RateLimiter._tiers[a_key] = RateLimiter.get_best_tier(a_names)
+        RateLimiter._buckets.pop((RateLimiter.KEY, a_key), None)
+
+    @staticmethod
+    def remove_key(a_key):
+        RateLimiter._tiers.pop(a_key, None)
+        RateLimiter._buckets.pop((RateLimiter.KEY, a_key), None)
+
+    @staticmethod
+    def get_best_tier(a_names):
+        my_ret_val = None
+        my_best_rate = -1
+
+        for my_tmp_name in a_names:
+            my_limit = RateLimiter._tier_limits.get(my_tmp_name, None)
+            if my_limit is None:
+                continue
+
+            if my_limit["rate"] > my_best_rate:
+                my_ret_val = my_tmp_name
+                my_best_rate = my_limit["rate"]
+
+        return my_ret_val
+
+    @staticmethod
+    def get_key_limit(a_key):
+        my_tier = RateLimiter._tiers.get(a_key, None)
+
+        return RateLimiter._tier_limits.get(my_tier, RateLimiter._default_limit)
+
+    @staticmethod
+    def get_stripe(a_name):
+        return hash(a_name) % RateLimiter.STRIPES
+
+    @staticmethod
+    def refill(a_name, a_limit, a_now):
+        # returns the bucket [tokens, updated] topped up to a_now
+        my_bucket = RateLimiter._buckets.get(a_name, None)
+        if my_bucket is None:
+            my_bucket = RateLimiter._buckets.setdefault(a_name, [float(a_limit["burst"]), a_now])
+
+        my_bucket[0] = min(float(a_limit["burst"]), my_bucket[0] + (a_now - my_bucket[1]) * a_limit["rate"])
+        my_bucket[1] = a_now
+
+        return my_bucket
+
+    @staticmethod
+    def take(a_key, a_route, a_now=None, a_tokens=1, a_key_bucket=True):
+        # a_tokens from every bucket or none, a_key_bucket False takes them from the route bucket only
+        my_now = monotonic() if a_now is None else a_now
+
+        my_limits = []
+        my_key_limit = RateLimiter.get_key_limit(a_key) if a_key_bucket else None
+        if my_key_limit is not None:
+            my_limits.append(((RateLimiter.KEY, a_key), my_key_limit))
+        my_route_limit = RateLimiter._route_limits.get(a_route, None)
+        if my_route_limit is not None:
+            my_limits.append(((RateLimiter.ROUTE, a_route), my_route_limit))
+
+        if len(my_limits) == 0:
+            return RateDecision(True, None, None, 0, 0)
+
+        # both stripes are taken in a fixed order, so a token is only used when every bucket has one
+        my_locks = [RateLimiter._stripes[my_tmp_idx]
+                    for my_tmp_idx in sorted(set(RateLimiter.get_stripe(my_tmp_name) for my_tmp_name, _ in my_limits))]
+        for my_tmp_lock in my_locks:
+            my_tmp_lock.acquire()
+        try:
+            my_buckets = [RateLimiter.refill(my_tmp_name, my_tmp_limit, my_now)
+                          for my_tmp_name, my_tmp_limit in my_limits]
+
+            my_allowed = all(my_tmp_bucket[0] >= a_tokens for my_tmp_bucket in my_buckets)
+            if my_allowed:
+                for my_tmp_bucket in my_buckets:
+                    my_tmp_bucket[0] -= a_tokens
+
+            my_retry_after = 0
+            for my_tmp_bucket, (_, my_tmp_limit) in zip(my_buckets, my_limits):
+                if my_tmp_bucket[0] < a_tokens:
+                    my_retry_after = max(my_retry_after,
+                                         RateLimiter.get_wait(a_tokens - my_tmp_bucket[0], my_tmp_limit))
+
+            # the headers describe the first bucket, the key one when the key is limited
+            my_bucket = my_buckets[0]
+            my_limit = my_limits[0][1]
+            my_reset = RateLimiter.get_wait(my_limit["burst"] - my_bucket[0], my_limit)
+
+            return RateDecision(my_allowed, my_limit["burst"], int(my_bucket[0]), my_reset,
+                                my_retry_after if not my_allowed else 0)
+        finally:
+            for my_tmp_lock in reversed(my_locks):
+                my_tmp_lock.release()
+
+    @staticmethod
+    def get_wait(a_tokens, a_limit):
+        # whole seconds until a_tokens are refilled
+        if a_tokens <= 0:
+            return 0
+        if a_limit["rate"] <= 0:
+            return 60
+
+        return int(math.ceil(a_tokens / a_limit["rate"]))
+
+    @staticmethod
+    def get_headers(a_decision):
+        my_ret_val = {}
+
+        if a_decision is None or a_decision.limit is None:
+            return my_ret_val
+
+        my_ret_val["X-RateLimit-Limit"] = str(a_decision.limit)
+        my_ret_val["X-RateLimit-Remaining"] = str(a_decision.remaining)
+        my_ret_val["X-RateLimit-Reset"] = str(a_decision.reset)
+        if not a_decision.allowed:
+            my_ret_val["Retry-After"] = str(a_decision.retry_after)
+
+        return my_ret_val
@@ -0,0 +1,117 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+
+import json
+from types import GeneratorType
+
+# orjson is optional, the stdlib encoder is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from flask import Response, stream_with_context
+
+
+class JsonCodec:
+    # JSON encoding for the api, cmd and admin responses
+    # JSON_ENCODER "auto" uses orjson when it is installed, "json" always uses the stdlib module
+    MIMETYPE = "application/json"
+    NDJSON_MIMETYPE = "application/x-ndjson"
+
+    AUTO = "auto"
+    STDLIB = "json"
+
+    _fast = orjson is not None
+    # (class, {attribute name: object}) of the pre-encoded constant responses
+    _constants = []
+
+    @staticmethod
+    def init(an_encoder):
+        JsonCodec._fast = an_encoder != JsonCodec.STDLIB and orjson is not None
+
+        # the constants were encoded at import, before the encoder was picked
+        for my_tmp_class, my_tmp_constants in JsonCodec._constants:
+            JsonCodec.set_constants(my_tmp_class, my_tmp_constants)
+
+    @staticmethod
+    def add_constants(a_class, a_constants):
+        JsonCodec._constants.append((a_class, a_constants))
+        JsonCodec.set_constants(a_class, a_constants)
+
+    @staticmethod
+    def set_constants(a_class, a_constants):
+        for my_tmp_name, my_tmp_obj in a_constants.items():
+            setattr(a_class, my_tmp_name, JsonCodec.dumps(my_tmp_obj))
+
+    @staticmethod
+    def is_fast():
+        return JsonCodec._fast
+
+    @staticmethod
+    def encode(an_obj):
+        # returns bytes
+        if JsonCodec._fast:
+            return orjson.dumps(an_obj)
+
+        return json.dumps(an_obj).encode("utf-8")
+
+    @staticmethod
+    def dumps(an_obj):
+        return JsonCodec.encode(an_obj).decode("utf-8")
+
+    @staticmethod
+    def loads(a_data):
+        if JsonCodec._fast:
+            return orjson.loads(a_data)
+
+        return json.loads(a_data)
+
+    @staticmethod
+    def response(a_body, a_status=200, a_headers=None):
+        # a_body is sent as it is when already encoded, str or bytes, and encoded otherwise
+        if not isinstance(a_body, (str, bytes)):
+            a_body = JsonCodec.encode(a_body)
+
+        return Response(a_body, status=a_status, headers=a_headers, mimetype=JsonCodec.MIMETYPE)
+
+    @staticmethod
+    def encode_chunks(an_obj):
+        # dicts and lists are written member by member, anything else is encoded in one go
+        if isinstance(an_obj, dict):
+            yield b'{'
+            for my_tmp_idx, (my_tmp_key, my_tmp_value) in enumerate(an_obj.items()):
+                yield (b',' if my_tmp_idx > 0 else b'') + JsonCodec.encode(str(my_tmp_key)) + b':'
+                yield from JsonCodec.encode_chunks(my_tmp_value)
+            yield b'}'
+        elif isinstance(an_obj, (list, tuple, GeneratorType)):
+            yield b'['
+            for my_tmp_idx, my_tmp_item in enumerate(an_obj):
+                if my_tmp_idx > 0:
+                    yield b','
+                yield JsonCodec.encode(my_tmp_item)
+            yield b']'
+        else:
+            yield JsonCodec.encode(an_obj)
+
+    @staticmethod
+    def stream(an_obj, a_status=200):
+        # for large payloads, the response is never held as one string
+        return Response(stream_with_context(JsonCodec.encode_chunks(an_obj)), status=a_status, mimetype=JsonCodec.MIMETYPE)
+
+    @staticmethod
+    def stream_object(a_name, an_items, a_status=200):
+        # {"a_name": [items]} written item by item, an_items may be a generator
+        return JsonCodec.stream({a_name: an_items}, a_status)
+
+    @staticmethod
+    def stream_lines(an_items, a_status=200):
+        # one JSON document per line
+        def generate():
+            for my_tmp_item in an_items:
+                yield JsonCodec.encode(my_tmp_item) + b'\n'
+
+        return Response(stream_with_context(generate()), status=a_status, mimetype=JsonCodec.NDJSON_MIMETYPE)
@@ -8,6 +8,9 @@ from ..globals.job_mgr import JobMgr
 
 
 class BusLogic:
+    # shown as LG_VERSION, read from the class so templates do not build the logic
+    LG_ID = 0
+
     _job_mgr = None
 
     @staticmethod
@@ -16,7 +19,7 @@ class BusLogic:
 
     def get_id(self):
         # this is default logic
-        return 0
+        return self.LG_ID
 
     def __init__(self):
         self._job_mgr = JobMgr()
@@ -28,10 +28,13 @@ class ApiPrintCmd(AbstractCmd):
 
         my_template = "{} {} {} {} {}\n"
         my_apis = ApiKey.query.order_by(desc(ApiKey.created)).all()
-        my_mesg = my_mesg + "API gate:     {}\n#active keys: {} of {} total {}\n\n".format(my_status,
-                                                                                           len(ApiGate.active_now()),
-                                                                                           ApiGate.num_total_keys(),
-                                                                                           len(my_apis))
+        my_evictions = ApiGate.eviction_stats()
+        my_mesg = my_mesg + "API gate:     {}\n#active keys: {} of {} total {}\n".format(my_status,
+                                                                                         ApiGate.num_active_keys(),
+                                                                                         ApiGate.num_total_keys(),
+                                                                                         len(my_apis))
+        my_mesg = my_mesg + "#expired:     {} ({} per minute)\n\n".format(my_evictions["evicted"],
+                                                                          my_evictions["per_minute"])
 
         my_mesg = my_mesg + my_template.format(get_padding("db id", 6),
                                                get_padding("owner", 30),
@@ -125,7 +128,7 @@ class ApiDisableCmd(AbstractCmd):
                 my_api_key.active = False
                 get_db().session.add(my_api_key)
                 get_db().session.commit()
-                ApiGate.load()
+                ApiGate.refresh_key(my_key)
 
                 my_ret_val = True
                 my_ret_mesg = '[[ print "OK: api key {} disabled" ]]'.format(a_params[0])
@@ -154,7 +157,7 @@ class ApiEnableCmd(AbstractCmd):
                 my_api_key.active = True
                 get_db().session.add(my_api_key)
                 get_db().session.commit()
-                ApiGate.load()
+                ApiGate.refresh_key(my_key)
 
                 my_ret_val = True
                 my_ret_mesg = '[[ print "OK: api key {} enabled" ]]'.format(a_params[0])
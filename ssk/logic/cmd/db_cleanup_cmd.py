@@ -3,6 +3,8 @@
 # SPDX-License-Identifier: MIT
 #
 
+from queue import Full
+
 from flask import current_app
 
 from ssk.logic.cmd.abstract_cmd import AbstractCmd
@@ -21,15 +23,20 @@ class DbCleanupCmd(AbstractCmd):
         if len(a_params) == 0:
             if "DB_CLEANUP" in current_app.config.keys():
                 my_to_clean = current_app.config["DB_CLEANUP"]
-                my_mesg = '[[ print "OK: cleaning up '
-
-                for my_tmp_table in my_to_clean.keys():
-                    my_task = DbCleanupJob(current_app, a_args=["dbcleanup {}".format(my_tmp_table), my_tmp_table, my_to_clean[my_tmp_table]])
-                    CmdProcessor.submit_cmd(my_task)
-                    my_mesg += "{}, ".format(my_tmp_table)
-                    my_retval = my_task.get_task_id()
-
-                my_mesg += '" ]]'
+                my_queued = []
+
+                try:
+                    for my_tmp_table in my_to_clean.keys():
+                        my_task = DbCleanupJob(current_app, a_args=["dbcleanup {}".format(my_tmp_table), my_tmp_table, my_to_clean[my_tmp_table]])
+                        CmdProcessor.submit_cmd(my_task)
+                        my_queued.append(my_tmp_table)
+                        my_retval = my_task.get_task_id()
+
+                    my_mesg = '[[ print "OK: cleaning up {}, " ]]'.format(", ".join(my_queued))
+                except Full:
+                    # the tables queued before the queue filled up are cleaned
+                    my_mesg = '[[ print "Error: command queue is full, queued {} of {} tables: {}" ]]'.format(
+                        len(my_queued), len(my_to_clean), ", ".join(my_queued))
             else:
                 my_mesg = '[[ print "Error: DB_CLEANUP not set" ]]'
         else:
@@ -10,6 +10,7 @@ from .abstract_cmd import AbstractCmd
 from ...models.user import User, Role
 from ...utils import get_padding
 from ...db import get_db
+from ...globals.principal_cache import PrincipalCache
 
 
 class GroupPrintCmd(AbstractCmd):
@@ -74,6 +75,8 @@ class GroupAddCmd(AbstractCmd):
                 my_user = get_db().session.query(User).filter(User.email == my_user_name).first()
                 if my_user is not None:
                     my_user.roles.append(my_role)
+                    get_db().session.commit()
+                    PrincipalCache.invalidate_user(my_user.id)
 
                     my_ret_val = True
                     my_ret_mesg = '[[ print "OK: {} added to {}" ]]'.format(my_role_name, my_role.name)
@@ -106,6 +109,8 @@ class GroupDelCmd(AbstractCmd):
                 if my_user is not None:
                     if my_user.has_role(my_role.name):
                         my_user.roles.remove(my_role)
+                        get_db().session.commit()
+                        PrincipalCache.invalidate_user(my_user.id)
 
                         my_ret_val = True
                         my_ret_mesg = '[[ print "OK: {} removed from {}" ]]'.format(my_user_name, my_role_name)
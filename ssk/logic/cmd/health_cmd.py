@@ -8,6 +8,7 @@ from sqlalchemy import desc
 
 from .abstract_cmd import AbstractCmd
 from ...models.status import Status
+from ...globals.access_log import AccessLog
 from ...utils import get_padding
 
 
@@ -21,6 +22,14 @@ class HealthCmd(AbstractCmd):
         if len(a_param) == 0:
             my_mesg = '[[ print "\n'
 
+            my_access_log = AccessLog.stats()
+            my_mesg = my_mesg + "access log: buffered {} of {} flushed {} dropped {} failed {}\n\n".format(
+                my_access_log["buffered"],
+                my_access_log["max"],
+                my_access_log["flushed"],
+                my_access_log["dropped"],
+                my_access_log["failed"])
+
             my_template = "{} {} {} {} {} {} {} {} {} {} {} {}\n"
             my_status = Status.query.order_by(desc(Status.created)).limit(60)
             my_mesg = my_mesg + my_template.format(get_padding("api", 8),
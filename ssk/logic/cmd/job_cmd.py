@@ -4,6 +4,8 @@
 #
 
 
+from queue import Full
+
 from flask import current_app
 from sqlalchemy import desc
 
@@ -74,9 +76,12 @@ class JobRunCmd(AbstractCmd):
             my_args = a_params[0]
             my_task = EmptyJob(current_app, a_args=my_args)
 
-            CmdProcessor.submit_cmd(my_task)
-            my_mesg = '[[ print "OK: started job {} {}" ]]'.format(my_args, my_task.get_task_id())
-            my_retval = my_task.get_task_id()
+            try:
+                CmdProcessor.submit_cmd(my_task)
+                my_mesg = '[[ print "OK: started job {} {}" ]]'.format(my_args, my_task.get_task_id())
+                my_retval = my_task.get_task_id()
+            except Full:
+                my_mesg = CmdProcessor.QUEUE_FULL
         else:
             my_mesg = '[[ print "Error: action name is missing" ]]'
 
@@ -86,6 +91,84 @@ class JobRunCmd(AbstractCmd):
         return '[[ print "Usage: job start <action name>\nstarts a job" ]]'
 
 
+class JobQueueCmd(AbstractCmd):
+    def __init__(self):
+        super().__init__("queue")
+
+    def action(self, a_param: list):
+        from ssk.globals.cmd_processor import CmdProcessor
+
+        my_mesg = '[[ print "\n'
+
+        my_template = "{} {} {} {} {} {} {}\n"
+        my_mesg = my_mesg + my_template.format(get_padding("class", 8),
+                                               get_padding("queued", 8),
+                                               get_padding("served", 8),
+                                               get_padding("rejected", 9),
+                                               get_padding("avg wait", 10),
+                                               get_padding("max wait", 10),
+                                               get_padding("last wait", 10))
+
+        my_mesg = my_mesg + my_template.format("_" * 8, "_" * 8, "_" * 8, "_" * 9, "_" * 10, "_" * 10, "_" * 10)
+
+        for my_tmp_name, my_tmp_stats in CmdProcessor.queue_stats().items():
+            my_mesg = my_mesg + my_template.format(get_padding(my_tmp_name, 8),
+                                                   get_padding(my_tmp_stats["queued"], 8),
+                                                   get_padding(my_tmp_stats["served"], 8),
+                                                   get_padding(my_tmp_stats["rejected"], 9),
+                                                   get_padding("{:.3f}s".format(my_tmp_stats["wait_avg"]), 10),
+                                                   get_padding("{:.3f}s".format(my_tmp_stats["wait_max"]), 10),
+                                                   get_padding("{:.3f}s".format(my_tmp_stats["wait_last"]), 10))
+
+        my_mesg = my_mesg + "\n#queued: {} max depth: {}\n".format(CmdProcessor.cmd_queue_len(),
+                                                                     CmdProcessor.max_depth() or "unbounded")
+        my_mesg = my_mesg + '" ]]'
+
+        return True, my_mesg
+
+    def help(self, a_wrapped=True):
+        return '[[ print "Usage: job queue\nprints queue-wait metrics per priority class" ]]'
+
+
+class JobWorkersCmd(AbstractCmd):
+    def __init__(self):
+        super().__init__("workers")
+
+    def action(self, a_param: list):
+        from ssk.globals.cmd_processor import CmdProcessor
+
+        my_stats = CmdProcessor.pool_stats()
+        my_mesg = '[[ print "\n'
+
+        my_template = "{} {} {} {} {}\n"
+        my_mesg = my_mesg + my_template.format(get_padding("worker", 8),
+                                               get_padding("status", 8),
+                                               get_padding("for", 10),
+                                               get_padding("processed", 10),
+                                               get_padding("task id", 38))
+
+        my_mesg = my_mesg + my_template.format("_" * 8, "_" * 8, "_" * 10, "_" * 10, "_" * 38)
+
+        for my_tmp_worker in my_stats["workers"]:
+            my_status = "busy" if my_tmp_worker["busy"] else "idle"
+            my_mesg = my_mesg + my_template.format(get_padding(my_tmp_worker["worker"], 8),
+                                                   get_padding(my_status, 8),
+                                                   get_padding("{}s".format(my_tmp_worker["secs"]), 10),
+                                                   get_padding(my_tmp_worker["processed"], 10),
+                                                   get_padding(my_tmp_worker["task"] or "", 38))
+
+        my_mesg = my_mesg + "\n#workers: {} busy: {} min: {} max: {}\n".format(my_stats["size"],
+                                                                               my_stats["busy"],
+                                                                               my_stats["min"],
+                                                                               my_stats["max"])
+        my_mesg = my_mesg + '" ]]'
+
+        return True, my_mesg
+
+    def help(self, a_wrapped=True):
+        return '[[ print "Usage: job workers\nprints the command workers, busy or idle and for how long" ]]'
+
+
 class JobKillCmd(AbstractCmd):
     def __init__(self):
         super().__init__("kill")
@@ -145,6 +228,8 @@ class JobCmd(AbstractCmd):
         super().__init__("jobs")
         self.reg_cmd(["l", "list"], JobPrintCmd())
         self.reg_cmd(["r", "run"], JobRunCmd())
+        self.reg_cmd(["q", "queue"], JobQueueCmd())
+        self.reg_cmd(["w", "workers"], JobWorkersCmd())
         self.reg_cmd(["k", "kill"], JobKillCmd())
         self.reg_cmd(["d", "del"], JobDelCmd())
 
@@ -160,4 +245,4 @@ class JobCmd(AbstractCmd):
         return my_result, my_mesg
 
     def help(self, a_wrapped=True):
-        return '[[ print "Usage: job {list | run | kill | delete}" ]]'
+        return '[[ print "Usage: job {list | run | queue | workers | kill | delete}" ]]'
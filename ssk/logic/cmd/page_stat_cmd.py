@@ -4,6 +4,8 @@
 #
 
 
+from queue import Full
+
 from flask import current_app
 
 from ssk.logic.cmd.abstract_cmd import AbstractCmd
@@ -22,9 +24,12 @@ class PageStatCmd(AbstractCmd):
         if len(a_params) == 0:
             my_task = PageStatJob(current_app, a_args=["stats"])
 
-            CmdProcessor.submit_cmd(my_task)
-            my_mesg = '[[ print "OK: started job stats {}" ]]'.format(my_task.get_task_id())
-            my_retval = my_task.get_task_id()
+            try:
+                CmdProcessor.submit_cmd(my_task)
+                my_mesg = '[[ print "OK: started job stats {}" ]]'.format(my_task.get_task_id())
+                my_retval = my_task.get_task_id()
+            except Full:
+                my_mesg = CmdProcessor.QUEUE_FULL
         else:
             my_mesg = '[[ print "Error: action name is missing" ]]'
 
@@ -11,6 +11,7 @@ from .abstract_cmd import AbstractCmd
 from ...models.user import User
 from ...utils import get_padding, get_ago
 from ...db import get_db
+from ...globals.principal_cache import PrincipalCache
 from datetime import datetime
 
 
@@ -31,6 +32,7 @@ class UserDisableCmd(AbstractCmd):
                     get_db().session.add(my_tmp_user)
 
                 get_db().session.commit()
+                PrincipalCache.clear()
 
                 my_ret_val = True
                 my_ret_mesg = '[[ print "OK: all non admin users disabled" ]]'
@@ -42,6 +44,7 @@ class UserDisableCmd(AbstractCmd):
 
                     get_db().session.add(my_user)
                     get_db().session.commit()
+                    PrincipalCache.invalidate_user(my_user.id)
 
                     my_ret_val = True
                     my_ret_mesg = '[[ print "OK: user {} disabled" ]]'.format(a_params[0])
@@ -67,6 +70,7 @@ class UserRemoveCmd(AbstractCmd):
 
             if my_user is not None:
                 if not my_user.active:
+                    PrincipalCache.invalidate_user(my_user.id)
                     get_db().session.delete(my_user)
                     get_db().session.commit()
 
@@ -100,6 +104,7 @@ class UserEnableCmd(AbstractCmd):
                     get_db().session.add(my_tmp_user)
 
                 get_db().session.commit()
+                PrincipalCache.clear()
 
                 my_ret_val = True
                 my_ret_mesg = '[[ print "OK: all non admin users enabled" ]]'
@@ -110,6 +115,7 @@ class UserEnableCmd(AbstractCmd):
 
                     get_db().session.add(my_user)
                     get_db().session.commit()
+                    PrincipalCache.invalidate_user(my_user.id)
 
                     my_ret_val = True
                     my_ret_mesg = '[[ print "OK: user {} enabled" ]]'.format(a_params[0])
@@ -7,11 +7,16 @@ import tempfile
 import os
 import uuid
 import json
+import time
 from datetime import datetime
+from threading import Event
 from abc import ABC, abstractmethod
 from flask_login import current_user
 from os.path import exists
 
+from ...globals.job_events import JobEvents
+from ...globals.job_pool import JobPool
+
 
 class BaseJob(ABC):
     QUEUED = "QUEUED"
@@ -19,6 +24,9 @@ class BaseJob(ABC):
     STOPPED_STATUS = "STOPPED"
     DONE_STATUS = "DONE"
 
+    # jobs that set it run work() in the JobPool processes when JOB_PROCESS_POOL_SIZE > 0
+    CPU_BOUND = False
+
     _app = None
     _thread = None
     _task_id = None
@@ -28,9 +36,14 @@ class BaseJob(ABC):
     _executor_id = None
     _logfile = None
     _status = None
+    _cancelled = None
+    _persisted_progress = None
+    _persisted_at = 0
+    _relay = None
 
     def __init__(self, an_app, an_args):
         self._app = an_app._get_current_object()
+        self._cancelled = Event()
 
         if current_user._get_current_object() is not None and not current_user.is_anonymous:
             self._executor_id = current_user.id
@@ -41,6 +54,30 @@ class BaseJob(ABC):
     def set_executor_id(self, an_executor_id):
         self._executor_id = an_executor_id
 
+    def get_executor_id(self):
+        return self._executor_id
+
+    def set_relay(self, a_relay):
+        # queue to the parent process, set on jobs running in the JobPool
+        self._relay = a_relay
+
+    def publish(self, an_event, a_data, a_final=False):
+        if self._relay is not None:
+            self._relay.put((self._task_id, an_event, a_data, a_final))
+        else:
+            JobEvents.publish(self._task_id, an_event, a_data, a_final=a_final)
+
+    def relayed(self, an_event, a_data, a_final):
+        # event sent by this job running in the JobPool
+        if an_event == JobEvents.LOG:
+            self.write_log_line(a_data)
+            return
+
+        if an_event == JobEvents.PROGRESS:
+            self._progress = a_data
+
+        JobEvents.publish(self._task_id, an_event, a_data, a_final=a_final)
+
     def get_current_app(self):
         return self._app
 
@@ -57,21 +94,30 @@ class BaseJob(ABC):
         return self._args
 
     def write_to_log(self, a_message):
+        my_now = datetime.now()
+        my_message = "{} {}: {}".format(self._task_id,
+                                        my_now.strftime("%Y-%m-%d %H:%M:%S"),
+                                        a_message)
+
+        if self._relay is not None:
+            # the job in the parent process owns the logfile
+            self.publish(JobEvents.LOG, my_message)
+        else:
+            self.write_log_line(my_message)
+
+    def write_log_line(self, a_line):
         if self._logfile is not None and exists(self._logfile.name):
-            my_now = datetime.now()
-            my_message = "{} {}: {}\n".format(self._task_id,
-                                              my_now.strftime("%Y-%m-%d %H:%M:%S"),
-                                              a_message)
-            self._logfile.write(my_message)
+            self._logfile.write(a_line + "\n")
             self._logfile.flush()
+
+            self.publish(JobEvents.LOG, a_line)
         else:
             if self._logfile is None:
                 self._app.logger.error("Task {} cannot log {}. Logfile name is not set".format(self._task_id,
-                                                                                               a_message))
-            else:
-                if not exists(self._logfile.name):
-                    self._app.logger.error("Task {} cannot log {}. Logfile does not exist".format(self._task_id,
-                                                                                              a_message))
+                                                                                               a_line))
+            elif not exists(self._logfile.name):
+                self._app.logger.error("Task {} cannot log {}. Logfile does not exist".format(self._task_id,
+                                                                                          a_line))
 
     def write_to_audit(self, a_status, a_message):
         with self._app.app_context():
@@ -169,9 +215,38 @@ class BaseJob(ABC):
             self.write_to_log("done")
             self._logfile.close()
 
-    def set_progress(self, a_val):
+    def get_cancel_event(self):
+        if self._cancelled is None:
+            self._cancelled = Event()
+
+        return self._cancelled
+
+    def is_cancelled(self):
+        return self.get_cancel_event().is_set()
+
+    def set_progress(self, a_val, a_force=False):
+        # progress is kept in memory and written to the job table at most every JOB_PROGRESS_FLUSH_SECS,
+        # unless it moved by JOB_PROGRESS_MIN_DELTA or more; stops in this process arrive via _cancelled
         self._progress = a_val
+        self.publish(JobEvents.PROGRESS, a_val)
+
+        if self.is_cancelled():
+            self._app.logger.info("Task {} is {}".format(self._task_id, self._status))
+            raise SystemExit()
+
+        if a_force or self.progress_due(a_val):
+            self.persist_progress()
+
+    def progress_due(self, a_val):
+        if self._persisted_progress is None or a_val is None or a_val >= 100:
+            return True
 
+        if time.monotonic() - self._persisted_at >= self._app.config["JOB_PROGRESS_FLUSH_SECS"]:
+            return True
+
+        return abs(a_val - self._persisted_progress) >= self._app.config["JOB_PROGRESS_MIN_DELTA"]
+
+    def persist_progress(self):
         with self._app.app_context():
             from ...models.job import Job
             from ...db import get_db
@@ -183,10 +258,16 @@ class BaseJob(ABC):
                 get_db().session.add(my_trigger)
                 get_db().session.commit()
 
+                self._persisted_progress = self._progress
+                self._persisted_at = time.monotonic()
+
+                # the job may have been stopped by another process
                 if my_trigger.status == BaseJob.STOPPED_STATUS or my_trigger.status == BaseJob.DONE_STATUS:
-                    self._app.logger.info("Task {} is {}".format(self._task_id, BaseJob.STOPPED_STATUS))
+                    self.get_cancel_event().set()
+                    self._app.logger.info("Task {} is {}".format(self._task_id, my_trigger.status))
                     raise SystemExit()
             else:
+                self.get_cancel_event().set()
                 self._app.logger.info("Task {} not found".format(self._task_id))
                 raise SystemExit()
 
@@ -194,14 +275,17 @@ class BaseJob(ABC):
         self.write_to_log("start execution")
         self.set_progress(0)
         try:
-            self.work()
+            if self.CPU_BOUND and JobPool.is_running():
+                JobPool.run(self)
+            else:
+                self.work()
         except Exception as e:
             self.write_to_log("job execute error {}".format(e))
         finally:
             self.write_to_log("finally")
 
-        self.log_done(an_app)
         self.set_progress(100)
+        self.log_done(an_app)
         self._job_tracker.finish_job(self._task_id)
 
     def get_status(self):
@@ -210,6 +294,14 @@ class BaseJob(ABC):
     def set_status(self, a_status):
         self._status = a_status
 
+        if a_status in [BaseJob.STOPPED_STATUS, BaseJob.DONE_STATUS]:
+            self.get_cancel_event().set()
+
+        if self._job_tracker is not None:
+            self._job_tracker.job_status_changed(self, a_status)
+
+        self.publish(JobEvents.STATUS, a_status, a_final=a_status in [BaseJob.STOPPED_STATUS, BaseJob.DONE_STATUS])
+
         from ...models.job import Job
         from ...db import get_db
 
@@ -220,6 +312,10 @@ class BaseJob(ABC):
                 my_trigger.status = a_status
                 my_trigger.done = datetime.now()
 
+                if self._progress is not None:
+                    # last throttled progress value
+                    my_trigger.progress = self._progress
+
                 get_db().session.add(my_trigger)
                 get_db().session.commit()
             else:
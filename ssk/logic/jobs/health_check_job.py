@@ -4,25 +4,43 @@
 #
 
 import os
-from datetime import datetime
+import time
 
 import psutil
 import requests
-from _datetime import timedelta
 from flask import current_app
+from sqlalchemy import func
 
 from .base_job import BaseJob
 from ... import get_db
 from ...globals.api_gate import ApiGate
+from ...globals.presence_tracker import PresenceTracker
 
 
 class HealthCheckJob(BaseJob):
     def __init__(self, an_app, a_args):
         super(HealthCheckJob, self).__init__(an_app, a_args)
 
+    @staticmethod
+    def probe(a_url, a_timeout):
+        # response time of the own root url in seconds, -1 when it is down or too slow
+        my_ret_val = -1
+
+        try:
+            my_start = time.perf_counter()
+            my_response = requests.get(a_url, timeout=a_timeout)
+            if my_response.status_code == 200:
+                my_ret_val = time.perf_counter() - my_start
+        except requests.RequestException as e:
+            current_app.logger.warning("Health Check probe {} failed {}".format(a_url, e))
+
+        return my_ret_val
+
     def work(self):
         with self._app.app_context():
             try:
+                my_collect_start = time.perf_counter()
+
                 from ...models.status import Status
                 from ...models.user import User
                 from ...models.audit import Audit
@@ -42,32 +60,20 @@ class HealthCheckJob(BaseJob):
                 my_status.api_max_active = current_app.config["MAX_ACTIVE_KEYS"]
                 my_status.api_total = ApiGate.num_total_keys()
 
-                my_all_users = User.query.all()
-                last_15min = datetime.now() - timedelta(minutes=15)
-                my_loggedin_users = User.query.filter(User.last_access > last_15min).all()
-
-                my_status.users = len(my_all_users)
-                my_status.users_active = len(my_loggedin_users)
-
-                my_all_settings = Setting.query.all()
-                my_status.conf_keys = len(my_all_settings)
-
-                my_all_audit = Audit.query.all()
-                my_status.audit_cnt = len(my_all_audit)
+                my_status.users = get_db().session.query(func.count(User.id)).scalar()
+                my_status.users_active = PresenceTracker.num_active()
+                my_status.conf_keys = get_db().session.query(func.count(Setting.id)).scalar()
+                my_status.audit_cnt = get_db().session.query(func.count(Audit.id)).scalar()
 
                 my_url = current_app.config["ROOT_URL"]
 
-                my_resp_time = -1
+                my_resp_time = 0
                 if my_url != "":
-                    my_now = datetime.now()
-                    my_response = requests.get(my_url)
-                    if my_response.status_code == 200:
-                        my_resp_time = (datetime.now() - my_now).total_seconds()
-                else:
-                    my_resp_time = 0
+                    my_resp_time = HealthCheckJob.probe(my_url, current_app.config["HEALTH_PROBE_TIMEOUT"])
 
                 my_status.response_time = my_resp_time
                 my_status.mem = round(my_process.memory_info().rss / (1024 ** 2), 2)
+                my_status.collect_time = round(time.perf_counter() - my_collect_start, 3)
 
                 get_db().session.add(my_status)
                 get_db().session.commit()
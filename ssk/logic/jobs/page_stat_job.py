@@ -3,23 +3,76 @@
 # SPDX-License-Identifier: MIT
 #
 
-from datetime import timedelta
+from datetime import timedelta, date, datetime
 
 from flask import current_app
-from sqlalchemy import and_
+from sqlalchemy import and_, func, insert, update
 
 from .base_job import BaseJob
 from ... import get_db
 from ...models.access import Access
-from statistics import mean
 
 from ...utils import now
 
 
 class PageStatJob(BaseJob):
+    NOTOK_PAGE = "NOTOK"
+    CPU_BOUND = True
+
     def __init__(self, an_app, a_args):
         super(PageStatJob, self).__init__(an_app, a_args)
 
+    @staticmethod
+    def get_day(a_value):
+        # func.date returns a string on sqlite and a date elsewhere, stats keep the unpadded form
+        if not isinstance(a_value, (date, datetime)):
+            a_value = datetime.strptime(str(a_value)[:10], "%Y-%m-%d")
+
+        return "{}-{}-{}".format(a_value.year, a_value.month, a_value.day)
+
+    @staticmethod
+    def get_page(a_path, a_response):
+        if a_response != "200 OK":
+            return PageStatJob.NOTOK_PAGE
+
+        my_split = (a_path or "").split("/")
+        if len(my_split) > 1:
+            return my_split[1]
+
+        return my_split[0]
+
+    @staticmethod
+    def aggregate(an_admin_user, a_since, a_from_id, a_to_id):
+        # one grouped query over the new id range, folded into {(day, page): [hits, total, max]}
+        my_ok = Access.response == "200 OK"
+        my_response_time = func.coalesce(Access.response_time, 0)
+
+        my_rows = get_db().session.query(func.date(Access.created),
+                                         Access.path,
+                                         my_ok,
+                                         func.count(Access.id),
+                                         func.sum(my_response_time),
+                                         func.max(my_response_time)) \
+            .filter(and_(Access.id > a_from_id,
+                         Access.id <= a_to_id,
+                         Access.created > a_since,
+                         Access.user != an_admin_user)) \
+            .group_by(func.date(Access.created), Access.path, my_ok).all()
+
+        my_ret_val = {}
+        for my_tmp_day, my_tmp_path, my_tmp_ok, my_tmp_hits, my_tmp_total, my_tmp_max in my_rows:
+            my_page = PageStatJob.get_page(my_tmp_path, "200 OK" if my_tmp_ok else None)
+            if my_page.startswith("?"):
+                continue
+
+            my_key = (PageStatJob.get_day(my_tmp_day), my_page)
+            my_agg = my_ret_val.setdefault(my_key, [0, 0, 0])
+            my_agg[0] += my_tmp_hits
+            my_agg[1] += my_tmp_total or 0
+            my_agg[2] = max(my_agg[2], my_tmp_max or 0)
+
+        return my_ret_val
+
     def work(self):
         from ssk.models.stats import Stats
 
@@ -28,55 +81,50 @@ class PageStatJob(BaseJob):
                 my_admin_user = current_app.config["ADMIN_NAME"]
                 my_processed_id = Stats.get_last_processed_id()
 
-                my_since = now() - timedelta(days=7)
-
-                my_per_page = get_db().session.query(Access).filter(and_(Access.id > my_processed_id,
-                                                                         Access.created > my_since,
-                                                                         Access.user != my_admin_user)).all()
+                # rows flushed while the job runs are left for the next run
+                my_last_id = get_db().session.query(func.max(Access.id)).scalar()
+                if my_last_id is None or my_last_id <= my_processed_id:
+                    return
 
-                my_tmp_mean = {}
+                my_since = now() - timedelta(days=7)
+                my_new_stats = PageStatJob.aggregate(my_admin_user, my_since, my_processed_id, my_last_id)
+
+                my_days = set(my_tmp_day for my_tmp_day, _ in my_new_stats.keys())
+                my_existing = {}
+                if len(my_days) > 0:
+                    for my_tmp_stat in get_db().session.query(Stats).filter(Stats.day.in_(my_days)).all():
+                        my_existing[(my_tmp_stat.day, my_tmp_stat.path)] = my_tmp_stat
+
+                my_inserts = []
+                my_updates = []
+                for (my_tmp_day, my_tmp_page), (my_tmp_hits, my_tmp_total, my_tmp_max) in my_new_stats.items():
+                    my_stats_db = my_existing.get((my_tmp_day, my_tmp_page), None)
+
+                    if my_stats_db is None:
+                        my_inserts.append({"day": my_tmp_day,
+                                           "path": my_tmp_page,
+                                           "hits": my_tmp_hits,
+                                           "mean_response_time": my_tmp_total / my_tmp_hits,
+                                           "max_response_time": my_tmp_max,
+                                           "last_processed": my_last_id})
+                    elif (my_stats_db.last_processed or 0) < my_last_id:
+                        # running sum is mean * hits, so merging is O(1) per row
+                        my_hits = my_stats_db.hits or 0
+                        my_total = (my_stats_db.mean_response_time or 0) * my_hits + my_tmp_total
+
+                        my_updates.append({"id": my_stats_db.id,
+                                           "hits": my_hits + my_tmp_hits,
+                                           "mean_response_time": my_total / (my_hits + my_tmp_hits),
+                                           "max_response_time": max(my_stats_db.max_response_time or 0, my_tmp_max),
+                                           "last_processed": my_last_id})
 
                 my_db_session = get_db().session
-                for my_tmp_access in my_per_page:
-                    my_date = "{}-{}-{}".format(my_tmp_access.created.year, my_tmp_access.created.month, my_tmp_access.created.day)
-
-                    if my_tmp_access.response != "200 OK":
-                        my_page = "NOTOK"
-                    else:
-                        my_split = my_tmp_access.path.split("/")
-                        if len(my_split) > 0:
-                            my_page = my_split[1]
-
-                    if not my_page.startswith("?"):
-                        if my_date not in my_tmp_mean.keys():
-                            my_tmp_mean[my_date] = {}
-
-                        if my_page not in my_tmp_mean[my_date].keys():
-                            my_tmp_mean[my_date][my_page] = []
-
-                        my_stats_db = get_db().session.query(Stats).filter(and_(Stats.day == my_date, Stats.path == my_page)).first()
-                        if my_stats_db is None:
-                            my_stats_db = Stats()
-                            my_stats_db.day = my_date
-                            my_stats_db.path = my_page
-                            my_stats_db.hits = 0
-                            my_stats_db.last_processed = 0
-                            my_stats_db.mean_response_time = 0
-                            my_stats_db.max_response_time = 0
-
-                        if my_stats_db.last_processed < my_tmp_access.id:
-                            my_tmp_mean[my_date][my_page].append(my_tmp_access.response_time)
-
-                            my_stats_db.last_processed = my_tmp_access.id
-                            if my_tmp_access.response_time > my_stats_db.max_response_time:
-                                my_stats_db.max_response_time = my_tmp_access.response_time
-
-                            my_stats_db.mean_response_time = mean(my_tmp_mean[my_date][my_page])
-                            my_stats_db.hits += 1
-
-                        my_db_session.add(my_stats_db)
+                if len(my_inserts) > 0:
+                    my_db_session.execute(insert(Stats), my_inserts)
+                if len(my_updates) > 0:
+                    my_db_session.execute(update(Stats), my_updates)
 
                 my_db_session.commit()
-
             except Exception as problem:
+                get_db().session.rollback()
                 self.write_to_log("Page Stat Failed {}".format(problem))
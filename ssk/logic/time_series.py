@@ -0,0 +1,118 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import math
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, cast, Integer, Float
+
+from ..db import get_db
+
+
+class TimeSeries:
+    # bucketed min/avg/max over logdb.status and daily totals over logdb.stats
+    # the grouping happens in the db, so the number of returned points is bounded by the buckets
+    STATUS_METRICS = ["response_time", "mem", "users_active", "api_active_now", "collect_time"]
+    LABEL_FORMAT = "%Y-%m-%d %H:%M"
+
+    @staticmethod
+    def get_bucket_secs(a_from, a_to, a_bucket_secs, a_max_points):
+        # widens the bucket when the range would return more than a_max_points
+        my_range = max((a_to - a_from).total_seconds(), 1)
+        my_min_bucket = math.ceil(my_range / max(a_max_points, 1))
+
+        return max(int(a_bucket_secs), my_min_bucket, 1)
+
+    @staticmethod
+    def epoch(a_column, a_dialect):
+        if a_dialect == "sqlite":
+            return cast(func.strftime('%s', a_column), Integer)
+        if a_dialect == "mysql":
+            return func.unix_timestamp(a_column)
+
+        return func.extract('epoch', a_column)
+
+    @staticmethod
+    def status(a_from, a_to, a_bucket_secs, a_max_points, a_metrics=None):
+        from ..models.status import Status
+
+        if a_metrics is None:
+            a_metrics = TimeSeries.STATUS_METRICS
+        my_metrics = [my_tmp_metric for my_tmp_metric in a_metrics if my_tmp_metric in TimeSeries.STATUS_METRICS]
+
+        my_bucket_secs = TimeSeries.get_bucket_secs(a_from, a_to, a_bucket_secs, a_max_points)
+
+        my_session = get_db().session
+        my_dialect = my_session.get_bind(mapper=Status).dialect.name
+        my_bucket = func.floor(TimeSeries.epoch(Status.created, my_dialect) / my_bucket_secs)
+
+        my_columns = [my_bucket.label("bucket")]
+        for my_tmp_metric in my_metrics:
+            my_column = getattr(Status, my_tmp_metric)
+            my_columns.extend([func.min(my_column), func.avg(cast(my_column, Float)), func.max(my_column)])
+
+        my_rows = my_session.query(*my_columns) \
+            .filter(Status.created > a_from, Status.created <= a_to) \
+            .group_by(my_bucket).order_by(my_bucket.desc()).limit(a_max_points).all()
+        # a range not aligned to the buckets may hold one more, the oldest one is dropped
+        my_rows.reverse()
+
+        my_series = {my_tmp_metric: {"min": [], "avg": [], "max": []} for my_tmp_metric in my_metrics}
+        my_labels = []
+        for my_tmp_row in my_rows:
+            my_start = datetime.fromtimestamp(int(my_tmp_row[0]) * my_bucket_secs, timezone.utc)
+            my_labels.append(my_start.strftime(TimeSeries.LABEL_FORMAT))
+
+            for my_tmp_idx, my_tmp_metric in enumerate(my_metrics):
+                my_min, my_avg, my_max = my_tmp_row[1 + my_tmp_idx * 3: 4 + my_tmp_idx * 3]
+                my_series[my_tmp_metric]["min"].append(my_min)
+                my_series[my_tmp_metric]["avg"].append(round(my_avg, 2) if my_avg is not None else None)
+                my_series[my_tmp_metric]["max"].append(my_max)
+
+        return {"bucket_secs": my_bucket_secs, "labels": my_labels, "series": my_series}
+
+    @staticmethod
+    def get_days(a_to, a_days):
+        # stats.day is written unpadded by PageStatJob, older rows may be padded
+        my_ret_val = []
+        for my_tmp_offset in range(a_days - 1, -1, -1):
+            my_day = a_to - timedelta(days=my_tmp_offset)
+            my_ret_val.append("{}-{}-{}".format(my_day.year, my_day.month, my_day.day))
+            my_ret_val.append(my_day.strftime("%Y-%m-%d"))
+
+        return list(dict.fromkeys(my_ret_val))
+
+    @staticmethod
+    def page_stats(a_to, a_days):
+        # one point per day: hits, hit weighted mean and max response time over all pages
+        from ..models.stats import Stats
+
+        my_days = TimeSeries.get_days(a_to, a_days)
+        my_hits = func.sum(Stats.hits)
+        my_rows = get_db().session.query(Stats.day,
+                                         my_hits,
+                                         func.sum(Stats.mean_response_time * Stats.hits),
+                                         func.max(Stats.max_response_time)) \
+            .filter(Stats.day.in_(my_days)) \
+            .group_by(Stats.day).all()
+
+        my_per_day = {}
+        for my_tmp_day, my_tmp_hits, my_tmp_total, my_tmp_max in my_rows:
+            my_key = datetime.strptime(my_tmp_day, "%Y-%m-%d").date()
+            my_agg = my_per_day.setdefault(my_key, [0, 0, 0])
+            my_agg[0] += my_tmp_hits or 0
+            my_agg[1] += my_tmp_total or 0
+            my_agg[2] = max(my_agg[2], my_tmp_max or 0)
+
+        my_labels = []
+        my_series = {"hits": [], "mean_response_time": [], "max_response_time": []}
+        for my_tmp_day in sorted(my_per_day.keys()):
+            my_tmp_hits, my_tmp_total, my_tmp_max = my_per_day[my_tmp_day]
+            my_labels.append(my_tmp_day.strftime("%Y-%m-%d"))
+            my_series["hits"].append(my_tmp_hits)
+            my_series["mean_response_time"].append(round(my_tmp_total / my_tmp_hits, 2) if my_tmp_hits > 0 else 0)
+            my_series["max_response_time"].append(my_tmp_max)
+
+        return {"bucket_secs": 24 * 60 * 60, "labels": my_labels, "series": my_series}
@@ -10,6 +10,8 @@ from ..db import func_db, get_db
 class Access(func_db.Model):
     __tablename__ = 'access'
     __bind_key__ = 'logdb'
+    __table_args__ = (func_db.Index('ix_access_created', 'created'),
+                      func_db.Index('ix_access_user', 'user'))
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     remote_addr = func_db.Column(func_db.String(100))
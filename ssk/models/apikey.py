@@ -4,6 +4,7 @@
 #
 
 
+from sqlalchemy import and_, func
 from sqlalchemy.orm import relationship
 
 from .. import db
@@ -12,13 +13,16 @@ from ..db import func_db
 
 class ApiKey(func_db.Model):
     __tablename__ = 'apikey'
+    # workers poll for changed keys by updated
+    __table_args__ = (func_db.Index('ix_apikey_updated', 'updated'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     user_id = func_db.Column(func_db.Integer, func_db.ForeignKey('user.id'))
     active = func_db.Column('is_active', func_db.Boolean(), nullable=False, server_default='1')
     key = func_db.Column(func_db.String(50), unique=True, nullable=False)
 
-    updated = func_db.Column(func_db.DateTime(timezone=True), onupdate=func_db.func.current_timestamp())
+    updated = func_db.Column(func_db.DateTime(timezone=True), default=func_db.func.current_timestamp(),
+                             onupdate=func_db.func.current_timestamp())
     created = func_db.Column(func_db.DateTime(timezone=True), server_default=func_db.func.current_timestamp())
 
     owner = relationship("User", back_populates="api_keys")
@@ -29,6 +33,29 @@ class ApiKey(func_db.Model):
 
         return my_ret_val
 
+    @staticmethod
+    def get_subs(a_since=None, a_key=None):
+        # (key, id, active, subscription name, updated) rows, one per subscription of the owner
+        # all active keys by default, every key updated at or after a_since, or a_key only
+        from .user import Subs, UserSubs
+
+        my_query = db.get_db().session.query(ApiKey.key, ApiKey.id, ApiKey.active, Subs.name, ApiKey.updated) \
+            .outerjoin(UserSubs, UserSubs.user_id == ApiKey.user_id) \
+            .outerjoin(Subs, and_(Subs.id == UserSubs.subs_id, Subs.active == 1))
+
+        if a_key is not None:
+            my_query = my_query.filter(ApiKey.key == a_key)
+        elif a_since is not None:
+            my_query = my_query.filter(ApiKey.updated >= a_since)
+        else:
+            my_query = my_query.filter(ApiKey.active == 1)
+
+        return my_query.all()
+
+    @staticmethod
+    def get_last_update():
+        return db.get_db().session.query(func.max(ApiKey.updated)).scalar()
+
     @staticmethod
     def get_by_key(a_key):
         my_ret_val = db.get_db().session.query(ApiKey).filter(ApiKey.key == a_key).first()
@@ -9,6 +9,7 @@ from ..db import func_db
 
 class Audit(func_db.Model):
     __tablename__ = 'audit'
+    __table_args__ = (func_db.Index('ix_audit_created', 'created'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     by_user = func_db.Column(func_db.String(255), unique=False, nullable=True)
@@ -12,6 +12,7 @@ from ..db import func_db, get_db
 class DBStats(func_db.Model):
     __tablename__ = 'db_stats'
     __bind_key__ = 'logdb'
+    __table_args__ = (func_db.Index('ix_db_stats_created', 'created'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     type = func_db.Column(func_db.String(10))
@@ -11,6 +11,8 @@ from ..db import func_db, get_db
 
 class Job(func_db.Model):
     __tablename__ = 'job'
+    __table_args__ = (func_db.Index('ix_job_task_id', 'task_id'),
+                      func_db.Index('ix_job_user_id_status', 'user_id', 'status'))
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     task_id = func_db.Column(func_db.String(50), unique=False, nullable=False)
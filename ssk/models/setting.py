@@ -6,13 +6,14 @@
 
 from .. import db
 from sqlalchemy.orm import relationship
-from sqlalchemy import and_
+from sqlalchemy import and_, update, select
 
 from ..db import func_db
 
 
 class Setting(func_db.Model):
     __tablename__ = 'setting'
+    __table_args__ = (func_db.Index('ix_setting_user_id_key', 'user_id', 'key'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     user_id = func_db.Column(func_db.Integer, func_db.ForeignKey('user.id'))
@@ -33,6 +34,15 @@ class Setting(func_db.Model):
 
         return my_retval
 
+    @staticmethod
+    def get_by_owner_email_key(an_owners_email, a_key):
+        from .user import User
+
+        my_retval = db.get_db().session.query(Setting).join(User, Setting.user_id == User.id) \
+            .filter(and_(User.email == an_owners_email, Setting.key == a_key)).first()
+
+        return my_retval
+
     @staticmethod
     def get_global_by_key(a_key):
         my_retval = db.get_db().session.query(Setting).filter(and_(Setting.key == a_key,
@@ -48,3 +58,32 @@ class Setting(func_db.Model):
 
     def __repr__(self):
         return '<Setting %r>' % self.key
+
+
+class SettingVersion(func_db.Model):
+    # one row counting setting changes, workers compare it to drop their cached settings
+    __tablename__ = 'setting_version'
+
+    id = func_db.Column(func_db.Integer, primary_key=True)
+    version = func_db.Column(func_db.Integer, nullable=False, server_default='0')
+    updated = func_db.Column(func_db.DateTime(timezone=True), onupdate=func_db.func.current_timestamp())
+
+    @staticmethod
+    def get_version():
+        # own connection, a check in the middle of a request does not end its session transaction
+        with db.get_db().engine.connect() as my_connection:
+            my_retval = my_connection.execute(select(SettingVersion.version).where(SettingVersion.id == 1)).scalar()
+
+        return my_retval or 0
+
+    @staticmethod
+    def bump():
+        # incremented in sql, so concurrent workers do not lose a change;
+        # the row is seeded by db_init and the ver12 upgrade, bump only updates it
+        my_session = db.get_db().session
+        my_session.execute(update(SettingVersion).where(SettingVersion.id == 1)
+                           .values(version=SettingVersion.version + 1))
+        my_session.commit()
+
+    def __repr__(self):
+        return '<SettingVersion %r>' % self.version
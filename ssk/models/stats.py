@@ -4,7 +4,7 @@
 #
 
 
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func
 
 from ..db import func_db, get_db
 
@@ -12,6 +12,7 @@ from ..db import func_db, get_db
 class Stats(func_db.Model):
     __tablename__ = 'stats'
     __bind_key__ = 'logdb'
+    __table_args__ = (func_db.Index('ix_stats_day_path', 'day', 'path'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     day = func_db.Column(func_db.String(16))
@@ -28,12 +29,9 @@ class Stats(func_db.Model):
 
     @staticmethod
     def get_last_processed_id():
-        my_ret_val = 0
-        my_stats_db = get_db().session.query(Stats).order_by(desc(Stats.created)).first()
-        if my_stats_db is not None:
-            my_ret_val = my_stats_db.last_processed
+        my_ret_val = get_db().session.query(func.max(Stats.last_processed)).scalar()
 
-        return my_ret_val
+        return my_ret_val or 0
 
     @staticmethod
     def get_all():
@@ -10,6 +10,7 @@ from ..db import func_db
 class Status(func_db.Model):
     __tablename__ = 'status'
     __bind_key__ = 'logdb'
+    __table_args__ = (func_db.Index('ix_status_created', 'created'),)
 
     id = func_db.Column(func_db.Integer, primary_key=True)
     api_status = func_db.Column(func_db.String(100))
@@ -23,6 +24,7 @@ class Status(func_db.Model):
     audit_cnt = func_db.Column(func_db.Integer)
     response_time = func_db.Column(func_db.Integer)
     mem = func_db.Column(func_db.Float)
+    collect_time = func_db.Column(func_db.Float)
 
     created = func_db.Column(func_db.DateTime(timezone=True), server_default=func_db.func.current_timestamp())
 
@@ -6,6 +6,6 @@
 
 SSK_VER = '0.8.9'
 SSK_NAME = 'soseki'
-SSK_MODEL_VERSION = 8
+SSK_MODEL_VERSION = 12
 
 SSK_ADMIN_GROUP = 'root'
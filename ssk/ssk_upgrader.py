@@ -7,9 +7,9 @@ from datetime import datetime
 
 from flask import current_app
 from flask_user import user_manager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, update, func
 
-from ssk.db import get_db, get_version, set_ssk_version, func_db
+from ssk.db import get_db, get_version, set_ssk_version, func_db, create_missing_indexes
 from ssk.globals.setting_parser import SettingParser
 from ssk.models.setting import Setting
 from ssk.models.user import User
@@ -30,6 +30,10 @@ class SSKUpgrader:
         SSKUpgrader._to_skip.append(5)
         SSKUpgrader._to_skip.append(6)
         SSKUpgrader._to_skip.append(8)
+        SSKUpgrader._to_skip.append(9)
+        SSKUpgrader._to_skip.append(10)
+        SSKUpgrader._to_skip.append(11)
+        SSKUpgrader._to_skip.append(12)
 
         set_ssk_version(my_version)
 
@@ -161,9 +165,73 @@ class SSKUpgrader:
 
         set_ssk_version(my_version)
 
+    @staticmethod
+    def ver9():
+        my_version = 9
+        current_app.logger.info(SSKUpgrader.UPGRADING_MESG.format(my_version))
+
+        my_db_version = get_version()
+
+        if my_db_version.ssk_version < my_version and my_version not in SSKUpgrader._to_skip:
+            my_engine = create_engine(current_app.config['SQLALCHEMY_BINDS']['logdb'])
+            with my_engine.connect() as my_connection:
+                my_connection.execute(text('alter table status add column collect_time FLOAT'))
+                my_connection.commit()
+
+        set_ssk_version(my_version)
+
+    @staticmethod
+    def ver10():
+        my_version = 10
+        current_app.logger.info(SSKUpgrader.UPGRADING_MESG.format(my_version))
+
+        my_db_version = get_version()
+
+        if my_db_version.ssk_version < my_version and my_version not in SSKUpgrader._to_skip:
+            my_created = create_missing_indexes(["access", "audit", "db_stats", "job", "setting", "stats", "status"])
+            current_app.logger.info("indexes checked {}".format(", ".join(my_created)))
+
+        set_ssk_version(my_version)
+
+    @staticmethod
+    def ver11():
+        my_version = 11
+        current_app.logger.info(SSKUpgrader.UPGRADING_MESG.format(my_version))
+
+        my_db_version = get_version()
+
+        if my_db_version.ssk_version < my_version and my_version not in SSKUpgrader._to_skip:
+            my_created = create_missing_indexes(["apikey"])
+            current_app.logger.info("indexes checked {}".format(", ".join(my_created)))
+
+            # keys never changed have no updated, workers sync from it
+            from ssk.models.apikey import ApiKey
+            get_db().session.execute(update(ApiKey).where(ApiKey.updated.is_(None))
+                                     .values(updated=func.coalesce(ApiKey.created, func.current_timestamp())))
+            get_db().session.commit()
+
+        set_ssk_version(my_version)
+
+    @staticmethod
+    def ver12():
+        my_version = 12
+        current_app.logger.info(SSKUpgrader.UPGRADING_MESG.format(my_version))
+
+        my_db_version = get_version()
+
+        if my_db_version.ssk_version < my_version and my_version not in SSKUpgrader._to_skip:
+            from ssk.models.setting import SettingVersion
+            SettingVersion.__table__.create(bind=func_db.engine, checkfirst=True)
+            if get_db().session.get(SettingVersion, 1) is None:
+                get_db().session.add(SettingVersion(id=1, version=0))
+                get_db().session.commit()
+
+        set_ssk_version(my_version)
+
     @staticmethod
     def get_upgrade_functions():
         my_retval = [SSKUpgrader.ver1, SSKUpgrader.ver2, SSKUpgrader.ver3, SSKUpgrader.ver4, SSKUpgrader.ver5,
-                     SSKUpgrader.ver6, SSKUpgrader.ver7, SSKUpgrader.ver8]
+                     SSKUpgrader.ver6, SSKUpgrader.ver7, SSKUpgrader.ver8, SSKUpgrader.ver9, SSKUpgrader.ver10,
+                     SSKUpgrader.ver11, SSKUpgrader.ver12]
 
         return my_retval
@@ -0,0 +1,201 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+# benchmarks run only when SSK_BENCH is set, e.g.
+#   SSK_BENCH=1 pytest tests/benchmarks
+# SSK_BENCH_SCALE shrinks or grows the data sets (default 1.0)
+# SSK_BENCH_THRESHOLD is the allowed regression against the baseline (default 0.25, i.e. 25%)
+# SSK_BENCH_MIN_MS ignores regressions smaller than this many ms per call, timer noise (default 1.0)
+# SSK_BENCH_UPDATE=1 rewrites the baseline with the current results
+# SSK_BENCH_BASELINE points to the baseline file (default tests/benchmarks/baseline.json)
+
+import json
+import os
+import statistics
+import threading
+import time
+
+import pytest
+from flask import Flask, current_app
+
+import ssk as sut
+from ssk.logic.bus_logic import BusLogic
+from ssk.db import db_clean, get_version, set_version, db_create
+
+if os.getenv("SSK_BENCH", "") == "":
+    collect_ignore_glob = ["test_*.py"]
+
+BENCH_SCALE = float(os.getenv("SSK_BENCH_SCALE", "1.0"))
+BENCH_THRESHOLD = float(os.getenv("SSK_BENCH_THRESHOLD", "0.25"))
+BENCH_MIN_MS = float(os.getenv("SSK_BENCH_MIN_MS", "1.0"))
+BENCH_UPDATE = os.getenv("SSK_BENCH_UPDATE", "") != ""
+BENCH_BASELINE = os.getenv("SSK_BENCH_BASELINE", os.path.join(os.path.dirname(__file__), "baseline.json"))
+
+
+class DbUpgrader:
+    @staticmethod
+    def ver1():
+        my_version = 1
+        current_app.logger.info("upgrading to {}".format(my_version))
+
+        my_db_version = get_version()
+
+        if my_db_version.db_version < my_version:
+            set_version(my_version)
+
+    @staticmethod
+    def get_upgrade_functions():
+        my_retval = [DbUpgrader.ver1]
+
+        return my_retval
+
+
+class Bench:
+    def __init__(self, a_baseline):
+        self._baseline = a_baseline
+        self._results = {}
+
+    @staticmethod
+    def scaled(a_count):
+        return max(int(a_count * BENCH_SCALE), 1)
+
+    @staticmethod
+    def percentile(a_sorted, a_pct):
+        my_idx = min(int(round(a_pct / 100 * (len(a_sorted) - 1))), len(a_sorted) - 1)
+
+        return a_sorted[my_idx]
+
+    def run(self, a_name, a_func, an_iterations, a_threads=1, an_app=None, a_setup=None):
+        # calls a_func an_iterations times spread over a_threads threads
+        # a_setup runs before each call and is not timed
+        my_latencies = []
+        my_lock = threading.Lock()
+
+        def worker(a_count):
+            my_local = []
+
+            if an_app is not None:
+                my_ctx = an_app.app_context()
+                my_ctx.push()
+
+            try:
+                for _ in range(a_count):
+                    if a_setup is not None:
+                        a_setup()
+
+                    my_start = time.perf_counter()
+                    a_func()
+                    my_local.append(time.perf_counter() - my_start)
+            finally:
+                if an_app is not None:
+                    my_ctx.pop()
+
+            with my_lock:
+                my_latencies.extend(my_local)
+
+        my_per_thread = [an_iterations // a_threads + (1 if my_tmp_idx < an_iterations % a_threads else 0)
+                         for my_tmp_idx in range(a_threads)]
+
+        my_wall_start = time.perf_counter()
+        if a_threads == 1:
+            worker(an_iterations)
+        else:
+            my_workers = [threading.Thread(target=worker, args=(my_tmp_count,)) for my_tmp_count in my_per_thread]
+            for my_tmp_worker in my_workers:
+                my_tmp_worker.start()
+            for my_tmp_worker in my_workers:
+                my_tmp_worker.join()
+        my_wall = time.perf_counter() - my_wall_start
+
+        assert len(my_latencies) == an_iterations, "{} lost iterations".format(a_name)
+
+        my_sorted = sorted(my_latencies)
+        my_result = {"iterations": an_iterations,
+                     "threads": a_threads,
+                     "scale": BENCH_SCALE,
+                     "ops_per_sec": round(an_iterations / my_wall, 3),
+                     "mean_ms": round(statistics.mean(my_sorted) * 1000, 3),
+                     "p50_ms": round(Bench.percentile(my_sorted, 50) * 1000, 3),
+                     "p95_ms": round(Bench.percentile(my_sorted, 95) * 1000, 3),
+                     "p99_ms": round(Bench.percentile(my_sorted, 99) * 1000, 3)}
+        self._results[a_name] = my_result
+        print("\nbench {}: {}".format(a_name, my_result))
+
+        self.check(a_name, my_result)
+
+        return my_result
+
+    def check(self, a_name, a_result):
+        my_base = self._baseline.get(a_name, None)
+        if BENCH_UPDATE or my_base is None or my_base.get("scale") != a_result["scale"]:
+            return
+
+        my_slower = a_result["p95_ms"] > my_base["p95_ms"] * (1 + BENCH_THRESHOLD) and \
+            a_result["p95_ms"] - my_base["p95_ms"] > BENCH_MIN_MS
+
+        my_per_call_ms = 1000 / a_result["ops_per_sec"]
+        my_base_per_call_ms = 1000 / my_base["ops_per_sec"]
+        my_fewer = a_result["ops_per_sec"] < my_base["ops_per_sec"] / (1 + BENCH_THRESHOLD) and \
+            my_per_call_ms - my_base_per_call_ms > BENCH_MIN_MS
+
+        assert not (my_slower or my_fewer), \
+            "{} regressed: p95 {} ms vs {} ms, {} ops/s vs {} ops/s (threshold {:.0%})".format(a_name,
+                                                                                          a_result["p95_ms"],
+                                                                                          my_base["p95_ms"],
+                                                                                          a_result["ops_per_sec"],
+                                                                                          my_base["ops_per_sec"],
+                                                                                          BENCH_THRESHOLD)
+
+    def save(self):
+        # new scenarios are added, existing ones are only replaced with SSK_BENCH_UPDATE
+        my_changed = False
+        for my_tmp_name, my_tmp_result in self._results.items():
+            my_base = self._baseline.get(my_tmp_name, None)
+            if BENCH_UPDATE or my_base is None or my_base.get("scale") != my_tmp_result["scale"]:
+                self._baseline[my_tmp_name] = my_tmp_result
+                my_changed = True
+
+        if my_changed:
+            with open(BENCH_BASELINE, "w") as f:
+                json.dump(self._baseline, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope="session")
+def bench():
+    my_baseline = {}
+    if os.path.exists(BENCH_BASELINE):
+        with open(BENCH_BASELINE) as f:
+            my_baseline = json.load(f)
+
+    my_bench = Bench(my_baseline)
+
+    yield my_bench
+
+    my_bench.save()
+
+
+@pytest.fixture()
+def app():
+    my_app = Flask(__name__, instance_relative_config=True)
+    my_app = sut.init_ssk(my_app, BusLogic, DbUpgrader, True)
+    # api scenarios measure the handlers, the rate limiter has its own scenario
+    my_app.config["API_RATE_LIMITS"] = {}
+    my_app.config["API_RATE_LIMIT_DEFAULT"] = None
+
+    with my_app.app_context():
+        db_clean()
+        db_create()
+
+    sut.start_ssk(my_app, True)
+
+    yield my_app
+
+    with my_app.app_context():
+        db_clean()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
@@ -0,0 +1,88 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from datetime import timedelta
+from unittest import mock
+
+from sqlalchemy import insert
+
+from ssk import SSK_ADMIN_GROUP
+from ssk.blueprints.admin_handler import AdminHandler
+from ssk.db import get_db
+from ssk.logic.cmd.root_cmd import RootCmd
+from ssk.models.audit import Audit
+from ssk.models.db_stats import DBStats
+from ssk.models.job import Job
+from ssk.models.stats import Stats
+from ssk.utils import now
+
+
+def get_admin():
+    my_admin = mock.Mock(is_authenticated=True, is_anonymous=False, id=1, email='admin@soseki.io',
+                         roles=[SSK_ADMIN_GROUP])
+    my_admin.is_admin.return_value = True
+
+    return my_admin
+
+
+@mock.patch('flask_login.utils._get_user')
+def test_system_stats(current_user, bench, app):
+    current_user.return_value = get_admin()
+
+    with app.app_context():
+        my_now = now()
+        my_days = [my_now - timedelta(days=my_tmp_idx) for my_tmp_idx in range(bench.scaled(365))]
+
+        get_db().session.execute(insert(Stats), [{"day": "{}-{}-{}".format(my_tmp_day.year, my_tmp_day.month, my_tmp_day.day),
+                                                  "path": "page{}".format(my_tmp_page),
+                                                  "hits": 100,
+                                                  "mean_response_time": 50.0,
+                                                  "max_response_time": 300,
+                                                  "last_processed": 0}
+                                                 for my_tmp_day in my_days for my_tmp_page in range(50)])
+        get_db().session.execute(insert(DBStats), [{"type": "count", "table": "table{}".format(my_tmp_table),
+                                                    "period": "day", "counter": 1000, "created": my_tmp_day}
+                                                   for my_tmp_day in my_days[:21] for my_tmp_table in range(20)])
+        get_db().session.commit()
+
+        def system_stats():
+            my_file, _ = AdminHandler.system_stats()
+            assert my_file == AdminHandler.PAGE_SYSTEM_STATS
+
+        bench.run("admin_system_stats", system_stats, bench.scaled(200))
+
+
+@mock.patch('flask_login.utils._get_user')
+def test_terminal_jobs_list(current_user, bench, app):
+    current_user.return_value = get_admin()
+
+    with app.app_context():
+        get_db().session.execute(insert(Job), [{"task_id": "bench-{}".format(my_tmp_idx), "name": "bench",
+                                                "action": "bench", "status": "DONE", "progress": 100, "user_id": 1}
+                                               for my_tmp_idx in range(bench.scaled(1000))])
+        get_db().session.commit()
+
+        def jobs_list():
+            my_ok, _ = RootCmd().exec(["admin", "jobs", "list"])
+            assert my_ok
+
+        bench.run("terminal_jobs_list", jobs_list, bench.scaled(100))
+
+
+@mock.patch('flask_login.utils._get_user')
+def test_terminal_tail_audit(current_user, bench, app):
+    current_user.return_value = get_admin()
+
+    with app.app_context():
+        get_db().session.execute(insert(Audit), [{"by_user": "bench", "category": "BENCH", "status": "OK",
+                                                  "description": "bench entry {}".format(my_tmp_idx)}
+                                                 for my_tmp_idx in range(bench.scaled(100000))])
+        get_db().session.commit()
+
+        def tail_audit():
+            my_ok, _ = RootCmd().exec(["admin", "tail", "audit"])
+            assert my_ok
+
+        bench.run("terminal_tail_audit", tail_audit, bench.scaled(100))
@@ -0,0 +1,82 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import itertools
+import time
+from unittest import mock
+
+from flask import current_app
+
+from ssk.blueprints.api_handler import ApiHandler
+from ssk.globals.api_gate import ApiGate
+from ssk.globals.api_gate_store import LocalApiGateStore
+from ssk.globals.app_settings import AppSettings
+from ssk.globals.rate_limiter import RateLimiter
+
+API_THREADS = 8
+
+
+def get_key(an_app):
+    with an_app.app_context():
+        my_api_gate = ApiGate()
+        my_api_gate.init()
+        my_api_gate.load()
+        my_api_gate.set_open(True)
+
+        return my_api_gate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+
+def test_api_status(bench, app):
+    my_key = get_key(app)
+
+    def status():
+        _, my_ret_val = ApiHandler.status("1", my_key)
+        assert my_ret_val == 200
+
+    bench.run("api_status", status, bench.scaled(5000), a_threads=API_THREADS, an_app=app)
+
+
+def test_api_echo(bench, app):
+    my_key = get_key(app)
+
+    my_request_mock = mock.Mock()
+    my_request_mock.json = {"echo": "hello there"}
+
+    def echo():
+        _, my_ret_val = ApiHandler.echo(my_request_mock, "1", my_key)
+        assert my_ret_val == 200
+
+    bench.run("api_echo", echo, bench.scaled(5000), a_threads=API_THREADS, an_app=app)
+
+
+def test_api_num_active_keys(bench, app):
+    # admission control after many keys were seen, the older half of them expired
+    my_store = LocalApiGateStore()
+    my_keys = bench.scaled(50000)
+
+    with app.app_context():
+        my_now = time.time()
+        my_timeout = AppSettings().get_setting("API_ACTIVE_NOW")
+        for my_tmp_idx in range(my_keys):
+            my_store.touch("key{}".format(my_tmp_idx), my_now - my_timeout * (2 if my_tmp_idx < my_keys // 2 else 0.5))
+
+        ApiGate.init(my_store)
+
+    bench.run("api_num_active_keys", ApiGate.num_active_keys, bench.scaled(5000), a_threads=API_THREADS, an_app=app)
+    assert my_store.eviction_stats()["evicted"] == my_keys // 2
+
+
+def test_api_rate_limiter(bench, app):
+    # token checks from many threads over many keys, every bucket stays full enough to admit
+    my_keys = ["key{}".format(my_tmp_idx) for my_tmp_idx in range(1000)]
+    RateLimiter.init({"Pro": {"rate": 1000000, "burst": 1000000}}, None, {"status": {"rate": 1000000, "burst": 1000000}})
+    RateLimiter.set_tiers({my_tmp_key: ["Pro"] for my_tmp_key in my_keys})
+
+    my_counter = itertools.count()
+
+    def take():
+        assert RateLimiter.take(my_keys[next(my_counter) % len(my_keys)], "status").allowed
+
+    bench.run("api_rate_limiter", take, bench.scaled(20000), a_threads=API_THREADS)
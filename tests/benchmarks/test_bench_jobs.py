@@ -0,0 +1,66 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, delete
+
+from ssk.db import get_db
+from ssk.globals.job_mgr import JobMgr
+from ssk.logic.jobs.base_job import BaseJob
+from ssk.logic.jobs.page_stat_job import PageStatJob
+from ssk.models.access import Access
+from ssk.models.job import Job
+from ssk.models.stats import Stats
+
+INSERT_CHUNK = 50000
+
+
+def insert_rows(a_model, a_rows):
+    for my_tmp_idx in range(0, len(a_rows), INSERT_CHUNK):
+        get_db().session.execute(insert(a_model), a_rows[my_tmp_idx:my_tmp_idx + INSERT_CHUNK])
+    get_db().session.commit()
+
+
+def test_job_mgr_load(bench, app):
+    with app.app_context():
+        my_count = bench.scaled(10000)
+        insert_rows(Job, [{"task_id": "bench-{}".format(my_tmp_idx),
+                           "name": "bench",
+                           "action": "bench",
+                           "status": BaseJob.QUEUED if my_tmp_idx % 2 == 0 else BaseJob.IN_PROG_STATUS,
+                           "progress": 0} for my_tmp_idx in range(my_count)])
+
+        def load():
+            JobMgr.reset()
+            my_job_mgr = JobMgr()
+            assert my_job_mgr.total_active() + my_job_mgr.total_queued() == my_count
+
+        bench.run("job_mgr_load", load, 3)
+
+        JobMgr.reset()
+
+
+def test_page_stat_job(bench, app):
+    with app.app_context():
+        my_count = bench.scaled(1000000)
+        my_now = datetime.now()
+        insert_rows(Access, [{"path": "/page{}/item".format(my_tmp_idx % 50),
+                              "response": "200 OK" if my_tmp_idx % 20 else "404 NOT FOUND",
+                              "response_time": my_tmp_idx % 300,
+                              "user": "user{}".format(my_tmp_idx % 100),
+                              "created": my_now - timedelta(minutes=my_tmp_idx % (3 * 24 * 60))}
+                             for my_tmp_idx in range(my_count)])
+
+        def reset_stats():
+            get_db().session.execute(delete(Stats))
+            get_db().session.commit()
+
+        def work():
+            PageStatJob(current_app, a_args=["stats"]).work()
+            assert Stats.get_last_processed_id() > 0
+
+        bench.run("page_stat_job", work, 3, a_setup=reset_stats)
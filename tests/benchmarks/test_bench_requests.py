@@ -0,0 +1,40 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from flask import current_app
+
+from ssk.globals.access_log import AccessLog
+from ssk.globals.api_gate import ApiGate
+
+
+def run_requests(a_bench, an_app, a_client, a_name):
+    with an_app.app_context():
+        my_api_gate = ApiGate()
+        my_api_gate.init()
+        my_api_gate.load()
+        my_api_gate.set_open(True)
+        my_key = my_api_gate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+    # a template free route, so only every_request, after_request and the api handler are measured
+    def post_status():
+        my_response = a_client.post('/api/1/status/{}'.format(my_key))
+        assert my_response.status_code == 200
+
+    a_bench.run(a_name, post_status, a_bench.scaled(2000))
+
+    with an_app.app_context():
+        AccessLog.flush()
+
+
+def test_requests_log_all_off(bench, app, client):
+    app.config["LOG_ALL_REQUESTS"] = False
+    run_requests(bench, app, client, "requests_log_all_off")
+
+
+def test_requests_log_all_on(bench, app, client):
+    # every request is slow enough to be logged
+    app.config["LOG_ALL_REQUESTS"] = True
+    app.config["LOG_SLOWER_THAN"] = -1
+    run_requests(bench, app, client, "requests_log_all_on")
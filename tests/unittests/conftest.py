@@ -3,10 +3,14 @@
 # SPDX-License-Identifier: MIT
 #
 
+import time
+
 import pytest
 from flask import Flask, current_app
 
 import ssk as sut
+from ssk.globals.cmd_processor import CmdProcessor
+from ssk.globals.cmd_queue import CmdQueue
 from ssk.logic.bus_logic import BusLogic
 from ssk.db import db_clean, get_version, set_version, db_create
 
@@ -46,6 +50,23 @@ def app():
         db_clean()
 
 
+@pytest.fixture(autouse=True)
+def cmd_queue():
+    # the command queue is process wide, every test starts with an empty one and no workers
+    CmdProcessor._cmd_queue = CmdQueue()
+
+    yield CmdProcessor._cmd_queue
+
+    if CmdProcessor.pool_size() > 0:
+        CmdProcessor.stop()
+    # workers retire within POLL_SECS, they keep taking commands from the queue they started with
+    my_deadline = time.monotonic() + 5 * CmdProcessor.POLL_SECS
+    while CmdProcessor.pool_size() > 0 and time.monotonic() < my_deadline:
+        time.sleep(0.05)
+
+    CmdProcessor._cmd_queue = CmdQueue()
+
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
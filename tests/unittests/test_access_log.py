@@ -0,0 +1,81 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from ssk.db import get_db
+from ssk.globals.access_log import AccessLog
+from ssk.models.access import Access
+
+
+def get_record(a_path):
+    return {"remote_addr": "127.0.0.1",
+            "method": "GET",
+            "protocol": "http",
+            "path": a_path,
+            "response": "404 NOT FOUND",
+            "response_time": 12,
+            "user": ""}
+
+
+def test_flush_bulk_insert(app):
+    with app.app_context():
+        AccessLog.flush()
+        my_before = get_db().session.query(Access).count()
+
+        for my_tmp_idx in range(5):
+            assert AccessLog.log(get_record("/ssk/missing{}".format(my_tmp_idx)))
+
+        AccessLog.flush()
+        assert AccessLog.buffer_len() == 0
+        assert get_db().session.query(Access).count() == my_before + 5
+
+
+def test_buffer_full_drops(app):
+    with app.app_context():
+        AccessLog.flush()
+        my_max = AccessLog._max_size
+        my_dropped = AccessLog.stats()["dropped"]
+
+        try:
+            AccessLog._max_size = 2
+            assert AccessLog.log(get_record("/a"))
+            assert AccessLog.log(get_record("/b"))
+            assert not AccessLog.log(get_record("/c"))
+            assert AccessLog.stats()["dropped"] == my_dropped + 1
+        finally:
+            AccessLog._max_size = my_max
+
+        AccessLog.flush()
+        assert AccessLog.buffer_len() == 0
+
+
+def test_after_request_enqueues(app, client):
+    with app.app_context():
+        AccessLog.flush()
+        my_enqueued = AccessLog.stats()["enqueued"]
+
+        with patch('ssk.render_template', return_value='<html>Error</html>'):
+            client.get('/ssk/does_not_exist')
+
+        assert AccessLog.stats()["enqueued"] == my_enqueued + 1
+        AccessLog.flush()
+        assert get_db().session.query(Access).filter(Access.path.like('/ssk/does_not_exist%')).count() == 1
+
+
+def test_created_at_log_time(app):
+    with app.app_context():
+        AccessLog.flush()
+
+        # flushed later, the row keeps the time the request was logged
+        my_logged = datetime.now() - timedelta(minutes=10)
+        with patch('ssk.globals.access_log.datetime') as my_datetime_mock:
+            my_datetime_mock.now.return_value = my_logged
+            assert AccessLog.log(get_record("/ssk/created"))
+
+        AccessLog.flush()
+        my_row = get_db().session.query(Access).filter(Access.path == "/ssk/created").one()
+        assert my_row.created.replace(tzinfo=None) == my_logged
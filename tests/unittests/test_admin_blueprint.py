@@ -193,3 +193,29 @@ def test_system_perf(app, client):
                 assert response.status_code == 200
                 mock_system_stats.assert_called_once()
                 mock_render.assert_called_once()
+
+
+def test_system_series(app, client):
+    """Test system series json route"""
+    with app.app_context():
+        with patch('flask_login.utils._get_user') as current_user_mock:
+            current_user_mock.return_value = Mock(
+                is_authenticated=True,
+                is_anonymous=False,
+                id=1,
+                email='admin@soseki.io',
+                roles=[SSK_ADMIN_GROUP],
+                username='admin_user'
+            )
+            current_user_mock.return_value.is_admin.return_value = True
+
+            with patch('ssk.blueprints.admin_handler.AdminHandler.system_series') as mock_system_series, \
+                 patch('flask_user.decorators.current_user', current_user_mock.return_value):
+
+                mock_system_series.return_value = {'bucket_secs': 60, 'labels': ['2024-01-01 00:00'], 'series': {}}
+
+                response = client.get('/admin/system_series?source=status&minutes=60')
+                assert response.status_code == 200
+                assert response.mimetype == 'application/json'
+                assert response.json['labels'] == ['2024-01-01 00:00']
+                assert mock_system_series.call_args[0][0]['minutes'] == '60'
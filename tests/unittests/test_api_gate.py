@@ -0,0 +1,204 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import time
+from unittest.mock import patch
+
+from flask import current_app
+
+from ssk.globals.api_gate import ApiGate
+from ssk.globals.api_gate_store import LocalApiGateStore, SqliteApiGateStore
+
+
+def run_store(a_store, a_peer):
+    # a_peer is what another worker sees, the same object for the local store
+    a_store.load_keys({"k1": "key driver 1", "k2": "key driver 2"})
+    assert a_peer.has_key("k1")
+    assert a_peer.num_keys() == 2
+
+    a_store.add_key("k3", "key driver 3")
+    a_store.remove_key("k1")
+    assert not a_peer.has_key("k1")
+    assert a_peer.has_key("k3")
+
+    a_store.touch("k2", 100.0)
+    assert a_peer.last_seen("k2") == 100.0
+    assert a_peer.active_since(50.0) == [100.0]
+    assert a_peer.num_active(50.0) == 1
+
+    # expired keys are evicted and counted
+    assert a_peer.num_active(150.0) == 0
+    assert a_peer.last_seen("k2") is None
+    assert a_peer.active_since(50.0) == []
+
+    assert not a_peer.is_open()
+    a_store.set_open(True)
+    assert a_peer.is_open()
+    a_store.set_open(False)
+    assert not a_peer.is_open()
+
+
+def test_local_store():
+    my_store = LocalApiGateStore()
+    run_store(my_store, my_store)
+
+
+def test_shared_store(tmp_path):
+    my_path = str(tmp_path / "api_gate.sqlite")
+
+    run_store(SqliteApiGateStore(my_path), SqliteApiGateStore(my_path, a_count_secs=0))
+
+
+def test_local_store_eviction():
+    my_store = LocalApiGateStore()
+
+    for my_tmp_idx in range(10000):
+        my_store.touch("key{}".format(my_tmp_idx), float(my_tmp_idx))
+
+    # touching moves a key to the back, so it outlives the ones touched before
+    my_store.touch("key0", 20000.0)
+
+    assert my_store.num_active(4999.0) == 5001
+    assert my_store.last_seen("key0") == 20000.0
+    assert my_store.last_seen("key4999") is None
+    assert my_store.eviction_stats()["evicted"] == 4999
+
+    assert my_store.num_active(19999.0) == 1
+    assert my_store.eviction_stats()["evicted"] == 9999
+    assert my_store.eviction_stats()["per_minute"] == round(9999 / 5, 2)
+
+
+def test_shared_store_touch_coalesced(tmp_path):
+    my_store = SqliteApiGateStore(str(tmp_path / "api_gate.sqlite"))
+
+    my_store.touch("k1", 100.0)
+    my_store.touch("k1", 100.5)
+    assert my_store.last_seen("k1") == 100.0
+
+    my_store.touch("k1", 101.5)
+    assert my_store.last_seen("k1") == 101.5
+
+
+def test_shared_store_lookup_time(tmp_path):
+    my_store = SqliteApiGateStore(str(tmp_path / "api_gate.sqlite"))
+    my_store.load_keys({"key{}".format(my_tmp_idx): "key driver" for my_tmp_idx in range(1000)})
+
+    my_start = time.perf_counter()
+    for my_tmp_idx in range(1000):
+        assert my_store.has_key("key{}".format(my_tmp_idx))
+    my_mean = (time.perf_counter() - my_start) / 1000
+
+    assert my_mean < 0.001
+
+
+def test_api_gate_shared_between_workers(app, tmp_path):
+    my_path = str(tmp_path / "api_gate.sqlite")
+
+    with app.app_context():
+        try:
+            my_worker = SqliteApiGateStore(my_path)
+            ApiGate.init(SqliteApiGateStore(my_path, a_count_secs=0))
+            ApiGate.load()
+
+            my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+            assert my_worker.has_key(my_key)
+
+            # api close in one worker closes it in all of them
+            my_worker.set_open(True)
+            assert ApiGate.is_open()
+            assert ApiGate.is_valid(current_app, my_key)
+
+            my_worker.set_open(False)
+            assert not ApiGate.is_valid(current_app, my_key)
+
+            # activity seen by another worker counts against MAX_ACTIVE_KEYS
+            assert ApiGate.num_active_keys() == 1
+            my_worker.touch("other_worker_key", time.time())
+            assert ApiGate.num_active_keys() == 2
+        finally:
+            ApiGate.init(LocalApiGateStore())
+            ApiGate.load()
+
+
+def test_api_gate_starts_closed(app, tmp_path):
+    my_path = str(tmp_path / "api_gate.sqlite")
+
+    with app.app_context():
+        try:
+            SqliteApiGateStore(my_path).set_open(True)
+
+            # the flag is kept in the file, a restart closes the api again
+            ApiGate.init(SqliteApiGateStore(my_path))
+            assert not ApiGate.is_open()
+            assert not SqliteApiGateStore(my_path).is_open()
+        finally:
+            ApiGate.init(LocalApiGateStore())
+            ApiGate.load()
+
+
+def test_api_gate_sync(app):
+    from ssk.db import get_db
+    from ssk.models.apikey import ApiKey
+
+    with app.app_context():
+        ApiGate.init()
+        ApiGate.load()
+        my_total = ApiGate.num_total_keys()
+
+        with patch.object(ApiGate, "load") as my_load_mock:
+            my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+            my_load_mock.assert_not_called()
+        assert ApiGate.num_total_keys() == my_total + 1
+
+        # another worker disables the key, this one finds it on its next sync
+        my_api_key = ApiKey.get_by_key(my_key)
+        my_api_key.active = False
+        get_db().session.commit()
+        assert ApiGate.is_valid(current_app, my_key, ignore_open=True)
+
+        assert ApiGate.sync() >= 1
+        assert not ApiGate.is_valid(current_app, my_key, ignore_open=True)
+        assert ApiGate.num_total_keys() == my_total
+
+        my_api_key.active = True
+        get_db().session.commit()
+        ApiGate.sync()
+        assert ApiGate.is_valid(current_app, my_key, ignore_open=True)
+
+        # sync_if_due polls at most every API_GATE_SYNC_SECS
+        with patch.object(ApiGate, "sync") as my_sync_mock:
+            ApiGate.sync_if_due()
+            my_sync_mock.assert_not_called()
+
+
+def test_watermark_tz():
+    from datetime import datetime, timezone, timedelta
+
+    my_naive = datetime(1970, 1, 1)
+    my_aware = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+
+    assert ApiGate.get_later(my_naive, my_aware) == my_aware
+    assert ApiGate.get_later(my_aware, datetime(2024, 1, 1, 9)) == datetime(2024, 1, 1, 10)
+    assert ApiGate.get_later(my_naive, None) == my_naive
+
+
+def test_upgrade_backfills_updated(app):
+    from unittest.mock import Mock
+    from ssk.db import get_db
+    from ssk.models.apikey import ApiKey
+    from ssk.ssk_upgrader import SSKUpgrader
+
+    with app.app_context():
+        my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+        get_db().session.execute(ApiKey.__table__.update().where(ApiKey.key == my_key).values(updated=None))
+        get_db().session.commit()
+
+        with patch("ssk.ssk_upgrader.get_version", return_value=Mock(ssk_version=10)), \
+                patch("ssk.ssk_upgrader.set_ssk_version"), \
+                patch.object(SSKUpgrader, "_to_skip", []):
+            SSKUpgrader.ver11()
+
+        get_db().session.expire_all()
+        assert ApiKey.get_by_key(my_key).updated is not None
@@ -2,10 +2,14 @@
 # Copyright (c) 2023 Michał Świtała / CodingMinds.io
 # SPDX-License-Identifier: MIT
 #
+from unittest.mock import patch
+
 from flask import current_app
 
+from ssk.db import get_db
 from ssk.globals.setting_parser import SettingParser
 from ssk.globals.app_settings import AppSettings
+from ssk.models.setting import Setting, SettingVersion
 
 
 def test_parse(app):
@@ -46,3 +50,50 @@ def test_setting_mgmt(app):
         assert my_sut.set_global(my_setting_key, False)
 
 
+
+
+def test_setting_cache(app):
+    with app.app_context():
+        my_sut = AppSettings()
+        assert my_sut.get_setting("WEBSITE_OPEN") == current_app.config["WEBSITE_OPEN"]
+
+        # served from memory until the version check is due
+        with patch.object(Setting, "get_by_key") as my_query_mock, \
+                patch.object(SettingVersion, "get_version") as my_version_mock:
+            assert my_sut.get_setting("WEBSITE_OPEN") == current_app.config["WEBSITE_OPEN"]
+            assert my_sut.get_setting("LOGIN_OFF") is None
+            assert my_sut.get_setting("LOGIN_OFF") is None
+            my_query_mock.assert_called_once()
+            my_version_mock.assert_not_called()
+
+        # another worker changes a setting, the counter row is seeded with the db
+        assert get_db().session.get(SettingVersion, 1) is not None
+        my_setting = Setting.get_by_key("MAX_ACTIVE_KEYS")
+        my_old_value = my_sut.get_setting("MAX_ACTIVE_KEYS")
+        my_setting.value = str(my_old_value + 1)
+        get_db().session.commit()
+        SettingVersion.bump()
+
+        assert my_sut.get_setting("MAX_ACTIVE_KEYS") == my_old_value
+        assert AppSettings.check_version(a_force=True)
+        assert my_sut.get_setting("MAX_ACTIVE_KEYS") == my_old_value + 1
+        assert not AppSettings.check_version(a_force=True)
+
+
+def test_user_setting_lru(app):
+    with app.app_context():
+        AppSettings.init(a_check_ms=1000, a_max_users=2)
+        my_sut = AppSettings()
+
+        my_admin_email = app.config["ADMIN_EMAIL"]
+        for my_tmp_key in ["K1", "K2", "K3"]:
+            assert my_sut.set_setting(my_admin_email, my_tmp_key, SettingParser.INT_TYPE, "7")[0]
+
+        for my_tmp_key in ["K1", "K2", "K3"]:
+            assert my_sut.get_setting(my_tmp_key, my_admin_email) == 7
+
+        assert list(AppSettings._users.keys()) == [(my_admin_email, "K2"), (my_admin_email, "K3")]
+
+        # typed after set_global too
+        assert my_sut.set_global("K1", True)[0]
+        assert my_sut.get_setting("K1") == 7
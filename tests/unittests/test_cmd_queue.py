@@ -0,0 +1,194 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import time
+from queue import Full
+from threading import Thread
+from unittest import mock
+
+import pytest
+from flask import current_app
+
+from ssk import SSK_ADMIN_GROUP
+from ssk.globals.cmd_processor import CmdProcessor
+from ssk.globals.cmd_queue import CmdQueue
+from ssk.globals.job_mgr import JobMgr
+from ssk.logic.jobs.empty_job import EmptyJob
+from ssk.logic.cmd.db_cleanup_cmd import DbCleanupCmd
+from ssk.logic.cmd.job_cmd import JobCmd
+
+
+def test_priority_and_fair_share():
+    my_queue = CmdQueue()
+
+    # user 1 floods the queue before user 2 and the admin submit
+    for my_tmp_idx in range(5):
+        my_queue.put("u1-{}".format(my_tmp_idx), CmdQueue.USER, 1)
+    my_queue.put("u2-0", CmdQueue.USER, 2)
+    my_queue.put("u2-1", CmdQueue.USER, 2)
+    my_queue.put("a-0", CmdQueue.ADMIN, 3)
+    my_queue.put("s-0", CmdQueue.SYSTEM, None)
+
+    assert my_queue.qsize() == 9
+
+    my_order = [my_queue.get() for _ in range(9)]
+    assert my_order == ["s-0", "a-0", "u1-0", "u2-0", "u1-1", "u2-1", "u1-2", "u1-3", "u1-4"]
+
+    assert my_queue.get(a_timeout=0.01) is None
+
+    my_stats = my_queue.get_stats()
+    assert my_stats["user"]["served"] == 7
+    assert my_stats["user"]["queued"] == 0
+    assert my_stats["system"]["served"] == 1
+    assert my_stats["admin"]["wait_max"] >= 0
+
+
+def test_max_depth():
+    my_queue = CmdQueue(a_max_depth=3)
+
+    my_queue.reserve(CmdQueue.USER)
+    my_queue.put("u1-0", CmdQueue.USER, 1, a_reserved=True)
+    my_queue.put("a-0", CmdQueue.ADMIN, 2)
+
+    # a reserved slot counts before its command is put
+    my_queue.reserve(CmdQueue.USER)
+    with pytest.raises(Full):
+        my_queue.reserve(CmdQueue.USER)
+    with pytest.raises(Full):
+        my_queue.reserve(CmdQueue.ADMIN)
+
+    # system jobs always get in
+    my_queue.reserve(CmdQueue.SYSTEM)
+    my_queue.release()
+
+    assert my_queue.get_stats()["user"]["rejected"] == 1
+    assert my_queue.get_stats()["admin"]["rejected"] == 1
+
+    my_queue.release()
+    my_queue.reserve(CmdQueue.USER)
+    my_queue.put("u1-1", CmdQueue.USER, 1, a_reserved=True)
+    assert my_queue.qsize() == 3
+
+    my_queue.get()
+    my_queue.reserve(CmdQueue.USER)
+
+
+def test_concurrent_submits():
+    my_queue = CmdQueue(a_max_depth=5)
+    my_accepted = []
+
+    def submit(a_idx):
+        try:
+            my_queue.reserve(CmdQueue.USER)
+        except Full:
+            return
+        time.sleep(0.01)
+        my_queue.put("u-{}".format(a_idx), CmdQueue.USER, a_idx, a_reserved=True)
+        my_accepted.append(a_idx)
+
+    my_threads = [Thread(target=submit, args=(my_tmp_idx,)) for my_tmp_idx in range(20)]
+    for my_tmp_thread in my_threads:
+        my_tmp_thread.start()
+    for my_tmp_thread in my_threads:
+        my_tmp_thread.join()
+
+    assert len(my_accepted) == 5
+    assert my_queue.qsize() == 5
+
+
+@mock.patch('flask_login.utils._get_user')
+def run_queue_cmd(current_user):
+    attrs = {
+        'id': 1,
+        'email': 'admin@soseki.io',
+        'name': 'Soseki Admin',
+        'roles': [SSK_ADMIN_GROUP]
+    }
+    current_user.return_value = mock.Mock(is_authenticated=True,
+                                          is_anonymous=False, **attrs)
+    current_user.return_value.is_admin.return_value = True
+
+    my_ok, my_mesg = JobCmd().exec(["q"])
+
+    assert my_ok
+    for my_tmp_name in CmdQueue.CLASSES:
+        assert my_tmp_name in my_mesg
+    assert "max depth" in my_mesg
+
+
+def test_queue_cmd(app):
+    with app.app_context():
+        run_queue_cmd()
+
+
+@mock.patch('flask_login.utils._get_user')
+def run_submit_full(current_user):
+    attrs = {
+        'id': 1,
+        'email': 'admin@soseki.io',
+        'name': 'Soseki Admin',
+        'roles': [SSK_ADMIN_GROUP]
+    }
+    current_user.return_value = mock.Mock(is_authenticated=True,
+                                          is_anonymous=False, **attrs)
+    current_user.return_value.is_admin.return_value = True
+
+    my_job_mgr = JobMgr()
+    CmdProcessor.start(a_job_mgr=my_job_mgr,
+                       a_logger=current_app.logger,
+                       a_max_collectors=0,
+                       a_max_depth=1)
+
+    my_task = EmptyJob(current_app, a_args=['name'])
+    assert CmdProcessor.get_priority(my_task) == CmdQueue.ADMIN
+    CmdProcessor.submit_cmd(my_task)
+
+    my_rejected = EmptyJob(current_app, a_args=['name'])
+    with pytest.raises(Full):
+        CmdProcessor.submit_cmd(my_rejected)
+    assert not my_job_mgr.is_queued(my_rejected.get_task_id())
+
+    my_job_mgr.stop_job(my_task.get_task_id())
+    my_job_mgr.delete_job(my_task.get_task_id())
+
+    CmdProcessor.stop()
+
+
+def test_submit_full(app):
+    with app.app_context():
+        run_submit_full()
+
+
+@mock.patch('flask_login.utils._get_user')
+def run_cleanup_full(current_user):
+    attrs = {
+        'id': 1,
+        'email': 'admin@soseki.io',
+        'name': 'Soseki Admin',
+        'roles': [SSK_ADMIN_GROUP]
+    }
+    current_user.return_value = mock.Mock(is_authenticated=True,
+                                          is_anonymous=False, **attrs)
+    current_user.return_value.is_admin.return_value = True
+
+    my_job_mgr = JobMgr()
+    CmdProcessor.start(a_job_mgr=my_job_mgr,
+                       a_logger=current_app.logger,
+                       a_max_collectors=0,
+                       a_max_depth=1)
+
+    current_app.config["DB_CLEANUP"] = {"access": 30, "audit": 30}
+    my_task_id, my_mesg = DbCleanupCmd().action([])
+    assert "queued 1 of 2 tables: access" in my_mesg
+
+    my_job_mgr.stop_job(my_task_id)
+    my_job_mgr.delete_job(my_task_id)
+
+    CmdProcessor.stop()
+
+
+def test_cleanup_full(app):
+    with app.app_context():
+        run_cleanup_full()
@@ -0,0 +1,118 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import time
+from threading import Event
+
+from flask import current_app
+
+from ssk import CmdProcessor
+from ssk.globals.app_settings import AppSettings
+from ssk.globals.job_mgr import JobMgr
+from ssk.logic.cmd.job_cmd import JobCmd
+from ssk.logic.jobs.base_job import BaseJob
+
+GATE = Event()
+
+
+class GateJob(BaseJob):
+    def __init__(self, an_app, a_args):
+        super(GateJob, self).__init__(an_app, a_args)
+
+    def work(self):
+        GATE.wait(timeout=10)
+
+
+def wait_for(a_check, a_timeout=5):
+    my_deadline = time.monotonic() + a_timeout
+    while not a_check() and time.monotonic() < my_deadline:
+        time.sleep(0.05)
+
+    return a_check()
+
+
+def test_autoscale(app):
+    with app.app_context():
+        GATE.clear()
+        CmdProcessor.start(a_job_mgr=JobMgr(),
+                           a_logger=current_app.logger,
+                           a_max_collectors=3,
+                           a_min_collectors=1,
+                           an_idle_secs=0.5)
+        assert CmdProcessor.pool_size() == 1
+
+        for _ in range(4):
+            CmdProcessor.submit_cmd(GateJob(current_app, a_args=["gate"]))
+
+        # one worker per waiting command, up to the maximum
+        assert CmdProcessor.pool_size() == 3
+        assert wait_for(lambda: CmdProcessor.pool_stats()["busy"] == 3)
+        assert CmdProcessor.cmd_queue_len() == 1
+
+        GATE.set()
+        assert wait_for(lambda: CmdProcessor.cmd_queue_len() == 0 and CmdProcessor.pool_stats()["busy"] == 0)
+
+        # idle workers above the minimum retire
+        assert wait_for(lambda: CmdProcessor.pool_size() == 1)
+        my_worker = CmdProcessor.pool_stats()["workers"][0]
+        assert not my_worker["busy"]
+        assert my_worker["processed"] >= 1
+
+        CmdProcessor.stop()
+        assert wait_for(lambda: CmdProcessor.pool_size() == 0)
+
+
+def test_resize_from_setting(app):
+    with app.app_context():
+        CmdProcessor.start(a_job_mgr=JobMgr(),
+                           a_logger=current_app.logger,
+                           a_max_collectors=2)
+        assert CmdProcessor.pool_size() == 2
+
+        AppSettings.listen("MAX_COLLECTORS", CmdProcessor.resize)
+        try:
+            my_ok, _ = AppSettings().set_setting(current_app.config["ADMIN_EMAIL"], "MAX_COLLECTORS", "int", "4")
+            assert my_ok
+            assert CmdProcessor.pool_stats()["max"] == 4
+            assert CmdProcessor.pool_size() == 2
+
+            CmdProcessor.resize(1, 1)
+            assert wait_for(lambda: CmdProcessor.pool_size() == 1)
+
+            my_ok, my_mesg = JobCmd().get_cmd("workers").action([])
+            assert my_ok
+            assert "#workers: 1 busy: 0 min: 1 max: 1" in my_mesg
+        finally:
+            AppSettings._listeners.pop("MAX_COLLECTORS", None)
+            AppSettings().set_setting(current_app.config["ADMIN_EMAIL"], "MAX_COLLECTORS", "int",
+                                      str(current_app.config["MAX_COLLECTORS"]))
+            CmdProcessor.stop()
+
+        assert wait_for(lambda: CmdProcessor.pool_size() == 0)
+
+
+def test_start_cmd_processor(app):
+    from unittest.mock import patch
+    from ssk import start_cmd_processor, resize_cmd_processor
+
+    with app.app_context():
+        # no workers configured, the processor is not started
+        with patch.object(AppSettings, "get_setting", return_value=0), \
+                patch.object(CmdProcessor, "start") as my_start_mock, \
+                patch.object(AppSettings, "listen") as my_listen_mock:
+            start_cmd_processor()
+        my_start_mock.assert_not_called()
+        my_listen_mock.assert_not_called()
+
+        with patch.object(AppSettings, "get_setting", return_value=2), \
+                patch.object(CmdProcessor, "start") as my_start_mock, \
+                patch.object(AppSettings, "listen") as my_listen_mock:
+            start_cmd_processor()
+        assert my_start_mock.call_args[1]["a_max_collectors"] == 2
+        my_listen_mock.assert_called_once_with("MAX_COLLECTORS", resize_cmd_processor)
+
+        with patch.object(CmdProcessor, "resize") as my_resize_mock:
+            resize_cmd_processor(None)
+            my_resize_mock.assert_called_once_with(current_app.config["MAX_COLLECTORS"])
@@ -0,0 +1,42 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from ssk.db import find_missing_indexes, create_missing_indexes, get_indexed_tables
+
+
+def test_indexes_created(app):
+    with app.app_context():
+        assert find_missing_indexes() == []
+
+
+def test_missing_index_restored(app):
+    with app.app_context():
+        for my_tmp_engine, my_tmp_table in get_indexed_tables():
+            if my_tmp_table.name == "access":
+                for my_tmp_index in my_tmp_table.indexes:
+                    my_tmp_index.drop(bind=my_tmp_engine)
+
+        assert sorted(find_missing_indexes()) == ["ix_access_created", "ix_access_user"]
+
+        create_missing_indexes()
+        assert find_missing_indexes() == []
+
+
+def test_upgrade_steps_own_indexes(app):
+    from unittest.mock import Mock, patch
+    from ssk.ssk_upgrader import SSKUpgrader
+
+    with app.app_context():
+        with patch("ssk.ssk_upgrader.get_version", return_value=Mock(ssk_version=9)), \
+                patch("ssk.ssk_upgrader.set_ssk_version"), \
+                patch.object(SSKUpgrader, "_to_skip", []), \
+                patch("ssk.ssk_upgrader.create_missing_indexes", return_value=[]) as my_create_mock:
+            SSKUpgrader.ver10()
+            SSKUpgrader.ver11()
+
+        my_ver10_tables = my_create_mock.call_args_list[0][0][0]
+        my_ver11_tables = my_create_mock.call_args_list[1][0][0]
+        assert "apikey" not in my_ver10_tables
+        assert my_ver11_tables == ["apikey"]
@@ -5,7 +5,10 @@
 
 from datetime import datetime, timedelta
 from unittest.mock import patch
+from flask import current_app
+from werkzeug.datastructures import MultiDict
 from ssk.blueprints.admin_handler import AdminHandler
+from ssk.logic.time_series import TimeSeries
 from ssk import SSK_ADMIN_GROUP, AppSettings, get_db
 from ssk.models.status import Status
 from ssk.models.stats import Stats
@@ -160,7 +163,46 @@ def run_system_stats_closed(current_user):
         assert my_stats == {"labels": [], "datasets": [{}, {}, {}]}
 
 
+@mock.patch('flask_login.utils._get_user')
+def run_system_series(current_user):
+    """Test bucketed status and stats series"""
+    current_user.return_value = mock.Mock(is_authenticated=True, is_anonymous=False, id=1,
+                                          roles=[SSK_ADMIN_GROUP])
+
+    session = get_db().session
+    # a minute back, so no row is newer than the end of the range
+    now = datetime.now().replace(second=30, microsecond=0) - timedelta(minutes=1)
+    for i in range(6):
+        session.add(Status(created=now - timedelta(minutes=i % 2), response_time=10 * (i + 1), mem=100.0, users_active=i))
+    session.add(Stats(path='a', day="{}-{}-{}".format(now.year, now.month, now.day), hits=1, mean_response_time=10.0,
+                      max_response_time=10))
+    session.add(Stats(path='b', day="{}-{}-{}".format(now.year, now.month, now.day), hits=3, mean_response_time=30.0,
+                      max_response_time=50))
+    session.commit()
+
+    my_series = AdminHandler.system_series(MultiDict({"minutes": "10", "bucket": "60", "metrics": "response_time,mem"}))
+
+    assert my_series["bucket_secs"] == 60
+    assert len(my_series["labels"]) == 2
+    assert list(my_series["series"].keys()) == ["response_time", "mem"]
+    assert my_series["series"]["response_time"]["min"] == [20, 10]
+    assert my_series["series"]["response_time"]["max"] == [60, 50]
+    assert my_series["series"]["response_time"]["avg"] == [40, 30]
 
+    # when the limit cuts buckets, e.g. a range not aligned to them, the newest ones are kept
+    with patch.object(TimeSeries, 'get_bucket_secs', return_value=60):
+        my_series = TimeSeries.status(now - timedelta(minutes=2), now + timedelta(seconds=1), 60, 1, ["response_time"])
+    assert len(my_series["labels"]) == 1
+    assert my_series["series"]["response_time"]["max"] == [50]
+
+    # the bucket is widened to stay under TIME_SERIES_MAX_POINTS
+    my_series = AdminHandler.system_series(MultiDict({"minutes": "100000", "bucket": "1"}))
+    assert my_series["bucket_secs"] * current_app.config["TIME_SERIES_MAX_POINTS"] >= 100000 * 60
+
+    my_series = AdminHandler.system_series(MultiDict({"source": "stats", "days": "7"}))
+    assert my_series["series"]["hits"] == [4]
+    assert my_series["series"]["mean_response_time"] == [25]
+    assert my_series["series"]["max_response_time"] == [50]
 
 
 def test_system_chart_with_data(app):
@@ -181,6 +223,12 @@ def test_system_stats_with_data(app):
         run_system_stats_with_data()
 
 
+def test_system_series(app):
+    """Test time series for the admin charts"""
+    with app.app_context():
+        run_system_series()
+
+
 def test_system_stats_closed(app):
     """Test system stats when system is closed"""
     with app.app_context():
@@ -2,6 +2,7 @@
 # Copyright (c) 2023 Michał Świtała / CodingMinds.io
 # SPDX-License-Identifier: MIT
 #
+import json
 from unittest.mock import patch
 from flask import current_app
 from ssk.blueprints.api_handler import ApiHandler
@@ -97,3 +98,63 @@ def test_status(app):
             my_data, my_ret_val = ApiHandler.status("1", my_new_key)
             assert my_ret_val == 200
 
+
+
+def get_open_key():
+    my_api_gate = ApiGate()
+    my_api_gate.init()
+    my_api_gate.load()
+    my_api_gate.set_open(True)
+
+    return my_api_gate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+
+def test_batch(app, client):
+    with app.app_context():
+        my_key = get_open_key()
+
+    my_calls = {"calls": [{"id": 1, "call": "echo", "params": {"echo": "one"}},
+                          {"id": 2, "call": "status"},
+                          {"id": 3, "call": "missing"},
+                          {"id": 4, "call": "tst_fail"}]}
+
+    with patch.dict(ApiHandler._batch_handlers, {"tst_fail": mock.Mock(side_effect=Exception("boom"))}), \
+            patch("ssk.globals.api_gate.ApiGate.is_valid", wraps=ApiGate.is_valid) as my_valid_mock:
+        my_response = client.post('/api/1/batch/{}'.format(my_key), json=my_calls)
+        # results are streamed, the calls run while the body is read
+        my_results = json.loads(my_response.data)["results"]
+        assert my_valid_mock.call_count <= 1
+
+    assert my_response.status_code == 200
+    assert my_response.mimetype == APPLICATION_JSON
+
+    assert [my_tmp_result["id"] for my_tmp_result in my_results] == [1, 2, 3, 4]
+    assert my_results[0]["code"] == 200 and my_results[0]["data"] == "one"
+    assert my_results[1]["code"] == 200 and "mem" in my_results[1]["data"]
+    assert my_results[2]["code"] == 404
+    assert my_results[3]["code"] == 500
+
+    my_response = client.post('/api/1/batch/wrong_key', json=my_calls)
+    assert my_response.status_code == 400
+
+    my_response = client.post('/api/1/batch/{}'.format(my_key), json={"calls": []})
+    assert my_response.status_code == 400
+
+    my_too_many = {"calls": [{"call": "echo"}] * (app.config["API_BATCH_MAX_CALLS"] + 1)}
+    my_response = client.post('/api/1/batch/{}'.format(my_key), json=my_too_many)
+    assert my_response.status_code == 400
+
+
+def test_batch_stream(app, client):
+    with app.app_context():
+        my_key = get_open_key()
+
+    my_calls = {"calls": [{"id": my_tmp_idx, "call": "echo", "params": {"echo": str(my_tmp_idx)}}
+                          for my_tmp_idx in range(3)]}
+    my_response = client.post('/api/1/batch/{}?stream=1'.format(my_key), json=my_calls)
+
+    assert my_response.status_code == 200
+    assert my_response.mimetype == "application/x-ndjson"
+
+    my_lines = my_response.data.decode().splitlines()
+    assert [json.loads(my_tmp_line)["data"] for my_tmp_line in my_lines] == ["0", "1", "2"]
@@ -351,3 +351,29 @@ def test_post_contact_closed(app, client):
 
 
 
+
+
+def test_tasks_list(app, client):
+    """Test the streamed /ssk/tasks_list json route"""
+    from datetime import datetime
+    from ssk.db import get_db
+    from ssk.models.job import Job
+
+    with app.app_context():
+        for my_tmp_idx in range(3):
+            get_db().session.add(Job(task_id="tl{}".format(my_tmp_idx), name="job", action="act", status="DONE",
+                                     progress=100, user_id=4242, started=datetime(2024, 1, 1)))
+        get_db().session.commit()
+
+        with patch('flask_login.utils._get_user') as current_user_mock:
+            current_user_mock.return_value = Mock(is_authenticated=True, is_anonymous=False, id=4242)
+
+            response = client.get('/ssk/tasks_list')
+
+            assert response.status_code == 200
+            assert response.mimetype == 'application/json'
+            assert sorted(my_tmp_task["tid"] for my_tmp_task in response.json["tasks"]) == ["tl0", "tl1", "tl2"]
+            assert response.json["tasks"][0]["details"] == "01-Jan-2024 00:00:00"
+
+            current_user_mock.return_value = Mock(is_authenticated=False, is_anonymous=True)
+            assert client.get('/ssk/tasks_list').json == {"tasks": []}
@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from unittest.mock import patch, MagicMock
+
+from ssk.globals.job_events import JobEvents
+
+
+def test_publish_and_wait():
+    JobEvents.publish("je_task1", JobEvents.PROGRESS, 10)
+    JobEvents.publish("je_task1", JobEvents.LOG, "step one")
+
+    my_events, my_finished = JobEvents.wait("je_task1", 0, 0.1)
+    assert [my_tmp_event[1:] for my_tmp_event in my_events] == [("message", 10), ("log", "step one")]
+    assert not my_finished
+
+    # resume after the first event
+    my_events, my_finished = JobEvents.wait("je_task1", my_events[0][0], 0.1)
+    assert [my_tmp_event[1:] for my_tmp_event in my_events] == [("log", "step one")]
+
+    JobEvents.publish("je_task1", JobEvents.STATUS, "DONE", a_final=True)
+    my_events, my_finished = JobEvents.wait("je_task1", 2, 0.1)
+    assert my_events[-1][1:] == ("status", "DONE")
+    assert my_finished
+
+
+def test_wait_unknown_topic():
+    assert JobEvents.wait("je_missing", 0, 0.1) == ([], True)
+
+
+def test_stream_cap():
+    my_max = JobEvents._max_streams
+    my_streams = JobEvents.num_streams()
+
+    try:
+        JobEvents._max_streams = my_streams + 1
+        assert JobEvents.open_stream()
+        assert not JobEvents.open_stream()
+        JobEvents.close_stream()
+    finally:
+        JobEvents._max_streams = my_max
+
+    assert JobEvents.num_streams() == my_streams
+
+
+def test_progress_stream_events(client):
+    JobEvents.publish("je_task2", JobEvents.PROGRESS, 50)
+    JobEvents.publish("je_task2", JobEvents.STATUS, "DONE", a_final=True)
+
+    my_job_mgr = MagicMock()
+    my_job_mgr.get_progress.return_value = 50
+
+    with patch('ssk.blueprints.home.get_logic') as my_get_logic:
+        my_get_logic.return_value.get_job_mgr.return_value = my_job_mgr
+
+        with client.get('/ssk/progress/je_task2', headers={"Last-Event-ID": "1"}) as response:
+            assert response.status_code == 200
+            assert response.headers["Cache-Control"] == "no-cache"
+            assert b'data:50' in response.data
+            assert b'event: message\n' not in response.data
+            assert b'id: 2\nevent: status\ndata: DONE' in response.data
+
+
+def test_progress_stream_busy(client):
+    my_max = JobEvents._max_streams
+
+    try:
+        JobEvents._max_streams = JobEvents.num_streams()
+        response = client.get('/ssk/progress/je_task3')
+    finally:
+        JobEvents._max_streams = my_max
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
+
+
+def test_progress_stream_head(client):
+    my_streams = JobEvents.num_streams()
+
+    with patch('ssk.blueprints.home.get_logic') as my_get_logic:
+        my_get_logic.return_value.get_job_mgr.return_value.get_progress.return_value = 0
+
+        # the server closes every response, the body of a HEAD never runs
+        for _ in range(3):
+            with client.head('/ssk/progress/je_task4') as response:
+                assert response.status_code == 200
+
+        with client.get('/ssk/progress/je_task4') as response:
+            assert b'data:0' in response.data
+
+    assert JobEvents.num_streams() == my_streams
@@ -0,0 +1,153 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from threading import Thread
+
+import pytest
+from flask import current_app
+
+from ssk.globals.job_events import JobEvents
+from ssk.globals.job_mgr import JobMgr
+from ssk.globals.job_pool import JobPool
+from ssk.logic.jobs.base_job import BaseJob
+from ssk.models.job import Job
+
+
+class SumJob(BaseJob):
+    CPU_BOUND = True
+
+    def __init__(self, an_app, a_args):
+        super(SumJob, self).__init__(an_app, a_args)
+
+    def work(self):
+        self.write_to_log("pid {}".format(os.getpid()))
+
+        my_total = 0
+        for my_tmp_step in range(1, 5):
+            my_total += sum(range(10000 * my_tmp_step))
+            self.set_progress(my_tmp_step * 20, a_force=True)
+
+        self.write_to_log("total {}".format(my_total))
+
+
+class SpinJob(BaseJob):
+    CPU_BOUND = True
+
+    def __init__(self, an_app, a_args):
+        super(SpinJob, self).__init__(an_app, a_args)
+
+    def work(self):
+        for my_tmp_step in range(1, 300):
+            time.sleep(0.1)
+            self.set_progress(my_tmp_step % 100, a_force=True)
+
+
+@pytest.fixture()
+def job_pool(app):
+    with app.app_context():
+        JobPool.start(current_app._get_current_object(), 1)
+
+    yield
+
+    JobPool.stop()
+
+
+def read_log(a_task_id):
+    with open(Job.get_by_key(a_task_id).logfile) as my_file:
+        return my_file.read()
+
+
+def test_cpu_bound_job(app, job_pool):
+    with app.app_context():
+        my_job_mgr = JobMgr()
+        my_job = SumJob(current_app, a_args=["sum"])
+        my_job_mgr.queue_job(my_job)
+        my_job_mgr.start_job(my_job)
+
+        my_db_job = Job.get_by_key(my_job.get_task_id())
+        assert my_db_job.status == BaseJob.DONE_STATUS
+        assert my_db_job.progress == 100
+
+        # work ran in the pool, its log lines went to the same file
+        my_log = read_log(my_job.get_task_id())
+        assert "pid {}".format(os.getpid()) not in my_log
+        assert "pid " in my_log
+        assert "total {}".format(sum(sum(range(10000 * my_tmp_step)) for my_tmp_step in range(1, 5))) in my_log
+
+        # and its events were relayed to this process
+        my_events, my_finished = JobEvents.wait(my_job.get_task_id(), 0, 0)
+        assert my_finished
+        my_total_idx = [my_tmp_idx for my_tmp_idx, my_tmp_event in enumerate(my_events)
+                        if my_tmp_event[1] == JobEvents.LOG and "total" in my_tmp_event[2]]
+        my_done_idx = [my_tmp_idx for my_tmp_idx, my_tmp_event in enumerate(my_events)
+                       if my_tmp_event[1] == JobEvents.STATUS and my_tmp_event[2] == BaseJob.DONE_STATUS]
+        assert my_total_idx[0] < my_done_idx[0]
+
+        my_progress = [my_tmp_event[2] for my_tmp_event in my_events if my_tmp_event[1] == JobEvents.PROGRESS]
+        assert 40 in my_progress
+        assert my_progress[-1] == 100
+
+
+def test_cpu_bound_stop(app, job_pool):
+    with app.app_context():
+        my_job_mgr = JobMgr()
+        my_job = SpinJob(current_app, a_args=["spin"])
+        my_job_mgr.queue_job(my_job)
+
+        def run():
+            # stopped jobs end with SystemExit, as on the CmdProcessor threads
+            try:
+                my_job_mgr.start_job(my_job)
+            except SystemExit:
+                pass
+
+        my_runner = Thread(target=run)
+        my_runner.start()
+
+        my_deadline = time.monotonic() + 10
+        while not my_job.get_progress() and time.monotonic() < my_deadline:
+            time.sleep(0.1)
+        assert my_job.get_progress() > 0
+
+        my_job_mgr.stop_job(my_job.get_task_id())
+        my_runner.join(timeout=10)
+
+        assert not my_runner.is_alive()
+        assert Job.get_by_key(my_job.get_task_id()).status == BaseJob.STOPPED_STATUS
+
+
+class CrashJob(BaseJob):
+    CPU_BOUND = True
+
+    def __init__(self, an_app, a_args):
+        super(CrashJob, self).__init__(an_app, a_args)
+
+    def work(self):
+        os._exit(1)
+
+
+def test_broken_pool_restarts_once(app, job_pool):
+    with app.app_context():
+        my_broken = JobPool._executor
+        my_job = CrashJob(current_app, a_args=["crash"])
+        JobMgr().queue_job(my_job)
+
+        with pytest.raises(BrokenProcessPool):
+            JobPool.run(my_job)
+
+        my_executor = JobPool._executor
+        assert my_executor is not my_broken
+        assert JobPool.is_running()
+
+        # later waiters on the broken pool leave the new one alone
+        JobPool.restart(my_broken, my_job.get_task_id())
+        assert JobPool._executor is my_executor
+
+        my_job = SumJob(current_app, a_args=["sum"])
+        JobMgr().queue_job(my_job)
+        assert JobPool.run(my_job) == BaseJob.DONE_STATUS
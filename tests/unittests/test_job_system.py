@@ -4,6 +4,7 @@
 #
 
 import pytest
+import requests
 import uuid
 from datetime import datetime
 from unittest.mock import patch, Mock
@@ -670,6 +671,45 @@ class TestBaseJob:
                 with pytest.raises(SystemExit):
                     job.set_progress(75)
     
+    def test_set_progress_throttled(self, app):
+        """Test small progress steps are kept in memory between writes"""
+        with app.app_context():
+            with patch('ssk.db.get_db') as mock_get_db:
+                mock_db_job = Mock()
+                mock_db_job.status = BaseJob.IN_PROG_STATUS
+
+                mock_query = Mock()
+                mock_query.filter_by.return_value.first.return_value = mock_db_job
+                mock_get_db.return_value.session.query.return_value = mock_query
+
+                job = MockJob(app, ['test'])
+                job.set_progress(10)
+                job.set_progress(11)
+                job.set_progress(12)
+
+                assert job.get_progress() == 12
+                assert mock_db_job.progress == 10
+                assert mock_get_db.return_value.session.commit.call_count == 1
+
+                job.set_progress(20)
+                assert mock_db_job.progress == 20
+
+                job.set_progress(21, a_force=True)
+                assert mock_db_job.progress == 21
+
+    def test_set_progress_cancelled(self, app):
+        """Test a job stopped in this process exits without reading the job table"""
+        with app.app_context():
+            with patch('ssk.db.get_db') as mock_get_db:
+                job = MockJob(app, ['test'])
+                job.get_cancel_event().set()
+
+                with pytest.raises(SystemExit):
+                    job.set_progress(50)
+
+                assert job.get_progress() == 50
+                mock_get_db.return_value.session.query.assert_not_called()
+
     def test_execute_success(self, app):
         """Test successful job execution"""
         with app.app_context():
@@ -776,6 +816,28 @@ class TestHealthCheckJob:
                 assert "Health Check Failed" in job.write_to_log.call_args[0][0]
 
 
+    def test_health_check_job_counts(self, app):
+        """Test HealthCheckJob stores counts, probe timeout and collect time"""
+        with app.app_context():
+            from flask import current_app
+            from ssk.models.status import Status
+            from ssk.models.user import User
+
+            app.config["ROOT_URL"] = "http://localhost:5000/"
+            job = HealthCheckJob(current_app, ['health_check'])
+
+            with patch('ssk.logic.jobs.health_check_job.requests.get',
+                       side_effect=requests.exceptions.ConnectTimeout("too slow")) as mock_get:
+                job.work()
+
+            assert mock_get.call_args.kwargs["timeout"] == app.config["HEALTH_PROBE_TIMEOUT"]
+
+            my_status = Status.query.order_by(Status.id.desc()).first()
+            assert my_status.users == User.query.count()
+            assert my_status.response_time == -1
+            assert my_status.collect_time >= 0
+
+
 class TestDbCleanupJob:
     """Test suite for DbCleanupJob implementation"""
     
@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import json
+
+from ssk.json_codec import JsonCodec
+
+PAYLOAD = {"code": 0, "mesg": "zażółć", "items": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+
+def test_encoders_agree():
+    my_fast = JsonCodec.is_fast()
+
+    try:
+        JsonCodec.init(JsonCodec.STDLIB)
+        assert not JsonCodec.is_fast()
+        # the fallback keeps the stdlib defaults
+        my_stdlib = JsonCodec.encode(PAYLOAD)
+        assert my_stdlib == json.dumps(PAYLOAD).encode("utf-8")
+        assert JsonCodec.loads(my_stdlib) == PAYLOAD
+
+        JsonCodec.init(JsonCodec.AUTO)
+        assert JsonCodec.loads(JsonCodec.encode(PAYLOAD)) == PAYLOAD
+        assert json.loads(JsonCodec.encode(PAYLOAD)) == json.loads(my_stdlib)
+    finally:
+        JsonCodec._fast = my_fast
+
+    assert isinstance(JsonCodec.dumps(PAYLOAD), str)
+
+
+def test_response(app):
+    with app.test_request_context():
+        my_response = JsonCodec.response(PAYLOAD, 201, {"X-Test": "1"})
+        assert my_response.status_code == 201
+        assert my_response.mimetype == JsonCodec.MIMETYPE
+        assert my_response.headers["X-Test"] == "1"
+        assert json.loads(my_response.get_data()) == PAYLOAD
+
+        # encoded bodies are passed through
+        my_response = JsonCodec.response('{"code":0}')
+        assert my_response.get_data() == b'{"code":0}'
+
+
+def test_stream(app):
+    with app.test_request_context():
+        my_response = JsonCodec.stream_object("results", (my_tmp_idx for my_tmp_idx in range(5)))
+        assert my_response.mimetype == JsonCodec.MIMETYPE
+        assert json.loads(my_response.get_data()) == {"results": [0, 1, 2, 3, 4]}
+
+        my_response = JsonCodec.stream_object("results", [])
+        assert json.loads(my_response.get_data()) == {"results": []}
+
+        my_response = JsonCodec.stream_lines([{"a": 1}, {"b": 2}])
+        assert my_response.mimetype == JsonCodec.NDJSON_MIMETYPE
+        assert [json.loads(my_tmp_line) for my_tmp_line in my_response.get_data().splitlines()] == [{"a": 1}, {"b": 2}]
+
+
+def test_constants_follow_encoder():
+    from ssk.globals.api_gate import ApiGate
+    from ssk.blueprints.api_handler import ApiHandler
+
+    my_fast = JsonCodec.is_fast()
+
+    try:
+        JsonCodec.init(JsonCodec.STDLIB)
+        assert ApiGate.DONE == json.dumps(ApiGate.RESPONSES["DONE"])
+        assert ApiGate.RATE_LIMITED == json.dumps(ApiGate.RATE_LIMITED_CODE)
+        assert ApiHandler.INVALID_BATCH == json.dumps(ApiHandler.RESPONSES["INVALID_BATCH"])
+
+        JsonCodec.init(JsonCodec.AUTO)
+        assert json.loads(ApiGate.DONE) == ApiGate.RESPONSES["DONE"]
+    finally:
+        JsonCodec.init(JsonCodec.AUTO if my_fast else JsonCodec.STDLIB)
+
+
+def test_stream_nested(app):
+    with app.test_request_context():
+        my_response = JsonCodec.stream(PAYLOAD)
+        assert my_response.mimetype == JsonCodec.MIMETYPE
+        assert json.loads(my_response.get_data()) == PAYLOAD
+
+        # lists are written item by item
+        assert list(JsonCodec.encode_chunks({"labels": ["a", "b"]})) == [b'{', b'"labels":', b'[', b'"a"', b',', b'"b"', b']', b'}']
@@ -0,0 +1,46 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from unittest.mock import patch
+
+from flask import current_app
+
+import ssk as sut
+from ssk.db import get_version, set_version
+
+
+def test_meta_cached(app):
+    with app.test_request_context("/"):
+        # no db query and no business logic built to render a template
+        with patch("ssk.get_db") as mock_db, \
+             patch("ssk.logic.bus_logic.BusLogic.get_instance") as mock_logic:
+            my_meta = sut.set_meta()["meta"]
+            assert sut.set_meta()["meta"] is my_meta
+
+            mock_db.assert_not_called()
+            mock_logic.assert_not_called()
+
+        assert my_meta["LG_VERSION"] == 0
+        assert my_meta["DB_VERSION"] == get_version().db_version
+        assert my_meta["SSK_DB_VERSION"] == current_app.config["SSK_DB_MODEL_VERSION"]
+
+
+def test_meta_after_upgrade(app):
+    with app.test_request_context("/"):
+        my_version = get_version().db_version
+        assert sut.set_meta()["meta"]["DB_VERSION"] == my_version
+
+        set_version(my_version + 1)
+        assert sut.set_meta()["meta"]["DB_VERSION"] == my_version + 1
+
+
+def test_meta_app_logic(app):
+    from app.logic.app_logic import AppLogic
+
+    with app.test_request_context("/"):
+        with patch.object(current_app, "bus_logic", AppLogic), \
+             patch.object(AppLogic, "get_instance") as mock_logic:
+            assert sut.get_logic_id() == AppLogic.LG_ID
+            mock_logic.assert_not_called()
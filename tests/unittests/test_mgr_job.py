@@ -100,6 +100,39 @@ def test_page_stat_job_startstop(app):
         my_page_stat.work()
 
 
+def test_page_stat_job_running_mean(app):
+    from sqlalchemy import insert
+    from ssk.db import get_db
+    from ssk.models.access import Access
+    from ssk.models.stats import Stats
+
+    def add_access(a_times):
+        get_db().session.execute(insert(Access), [{"path": "/pstat/page", "response": "200 OK",
+                                                   "response_time": my_tmp_time, "user": "tester"}
+                                                  for my_tmp_time in a_times])
+        get_db().session.commit()
+
+    with app.app_context():
+        add_access([10, 20, 30])
+        PageStatJob(current_app, a_args=["stats"]).work()
+
+        my_stat = get_db().session.query(Stats).filter(Stats.path == "pstat").first()
+        assert my_stat.hits == 3
+        assert my_stat.mean_response_time == 20
+        assert my_stat.max_response_time == 30
+
+        add_access([60])
+        PageStatJob(current_app, a_args=["stats"]).work()
+        # nothing new, nothing counted twice
+        PageStatJob(current_app, a_args=["stats"]).work()
+
+        get_db().session.refresh(my_stat)
+        assert my_stat.hits == 4
+        assert my_stat.mean_response_time == 30
+        assert my_stat.max_response_time == 60
+        assert my_stat.last_processed == Stats.get_last_processed_id()
+
+
 def test_health_check_job_startstop(app):
     with app.app_context():
         my_health = HealthCheckJob(current_app, a_args=["health"])
@@ -109,3 +142,86 @@ def test_health_check_job_startstop(app):
 def test_job_queuestop(app):
     with app.app_context():
         run_queue_job()
+
+
+def test_registry_is_shared(app):
+    with app.app_context():
+        my_first = JobMgr()
+        my_second = JobMgr()
+
+        my_job = mock.Mock()
+        my_job.get_task_id.return_value = 'shared-123'
+        my_first.queue_job(my_job)
+
+        assert my_second.is_queued('shared-123')
+
+        my_second.job_status_changed(my_job, "IN PROGRESS")
+        assert my_first.is_active('shared-123')
+        assert not my_first.is_queued('shared-123')
+
+        my_second.job_status_changed(my_job, "DONE")
+        assert not my_first.is_active('shared-123')
+        assert my_first.get_job('shared-123') is None
+
+
+def test_stop_job_of_other_worker(app):
+    with app.app_context():
+        from ssk.logic.jobs.base_job import BaseJob
+        from ssk.models.job import Job
+
+        my_job_mgr = JobMgr()
+        my_task = EmptyJob(current_app, a_args=['name'])
+        my_job_mgr.queue_job(my_task)
+
+        # the job was queued by another worker, this one only has the row
+        with JobMgr._lock:
+            JobMgr._queued_jobs.clear()
+        assert not my_job_mgr.is_queued(my_task.get_task_id())
+
+        my_ok, my_mesg = my_job_mgr.delete_job(my_task.get_task_id())
+        assert not my_ok
+
+        my_ok, my_mesg = my_job_mgr.stop_job(my_task.get_task_id())
+        assert my_ok
+        assert Job.get_by_key(my_task.get_task_id()).status == BaseJob.STOPPED_STATUS
+
+        my_ok, _ = my_job_mgr.stop_job(my_task.get_task_id())
+        assert not my_ok
+
+        my_ok, _ = my_job_mgr.delete_job(my_task.get_task_id())
+        assert my_ok
+
+
+def test_recovered_job_follows_job_table(app):
+    with app.app_context():
+        from ssk.db import get_db
+        from ssk.logic.jobs.base_job import BaseJob
+        from ssk.models.job import Job
+
+        my_task = EmptyJob(current_app, a_args=['name'])
+        JobMgr().queue_job(my_task)
+        my_task_id = my_task.get_task_id()
+
+        # another worker runs it, this one loads the row at start
+        my_row = Job.get_by_key(my_task_id)
+        my_row.status = BaseJob.IN_PROG_STATUS
+        my_row.progress = 40
+        get_db().session.commit()
+        JobMgr.reset()
+
+        with mock.patch.object(BaseJob, "persist_progress") as my_persist_mock:
+            my_job_mgr = JobMgr()
+            my_persist_mock.assert_not_called()
+
+        assert my_job_mgr.is_active(my_task_id)
+        assert my_job_mgr.get_progress(my_task_id) == 40
+
+        # the other worker finishes it
+        my_row.status = BaseJob.DONE_STATUS
+        my_row.progress = 100
+        get_db().session.commit()
+
+        assert not my_job_mgr.is_active(my_task_id)
+        assert my_job_mgr.get_job(my_task_id) is None
+        my_ok, _ = my_job_mgr.delete_job(my_task_id)
+        assert my_ok
@@ -0,0 +1,112 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import os
+from unittest.mock import patch
+
+from jinja2 import FileSystemLoader
+
+from ssk.globals.notes_catalogue import NotesCatalogue
+
+
+def write_meta(a_path, a_count):
+    my_lines = ["seq,note,title,subtitle,created,labels"]
+    for my_tmp_idx in range(a_count):
+        my_labels = "even" if my_tmp_idx % 2 == 0 else "odd"
+        if my_tmp_idx % 10 == 0:
+            my_labels += "|tens"
+        my_lines.append("{0},note{0},Title {0},about number {0},2024-01-{1:02d},{2}".format(my_tmp_idx,
+                                                                                          my_tmp_idx % 28 + 1,
+                                                                                          my_labels))
+    a_path.write_text("\n".join(my_lines) + "\n")
+
+
+def test_catalogue(tmp_path):
+    my_meta = tmp_path / "meta.csv"
+    write_meta(my_meta, 100)
+    NotesCatalogue.load(str(my_meta))
+
+    assert NotesCatalogue.size() == 100
+    assert NotesCatalogue.get("note42")["title"] == "Title 42"
+    assert NotesCatalogue.get("missing") is None
+    assert NotesCatalogue.get_all_labels() == ["even", "odd", "tens"]
+
+    # pages keep the meta.csv order
+    my_page, my_total = NotesCatalogue.find(a_page=2, a_per_page=20)
+    assert my_total == 100
+    assert [my_tmp_note["note"] for my_tmp_note in my_page] == ["note{}".format(my_tmp_idx) for my_tmp_idx in range(20, 40)]
+
+    my_page, my_total = NotesCatalogue.find(a_page=6, a_per_page=20)
+    assert my_page == []
+    assert my_total == 100
+
+    my_page, my_total = NotesCatalogue.find(a_label="tens", a_per_page=3)
+    assert my_total == 10
+    assert [my_tmp_note["note"] for my_tmp_note in my_page] == ["note0", "note10", "note20"]
+
+    my_page, my_total = NotesCatalogue.find(a_query="Number 7")
+    assert [my_tmp_note["note"] for my_tmp_note in my_page] == ["note7"]
+
+    my_page, my_total = NotesCatalogue.find(a_from="2024-01-27", a_to="2024-01-28")
+    assert my_total == 6
+    assert all(my_tmp_note["created"] >= "2024-01-27" for my_tmp_note in my_page)
+
+    my_page, my_total = NotesCatalogue.find(a_label="odd", a_from="2024-01-27")
+    assert [my_tmp_note["note"] for my_tmp_note in my_page] == ["note27", "note55", "note83"]
+
+    # reloaded when the file changes
+    write_meta(my_meta, 5)
+    my_mtime = os.path.getmtime(my_meta) + 10
+    os.utime(my_meta, (my_mtime, my_mtime))
+    NotesCatalogue.load(str(my_meta))
+    assert NotesCatalogue.size() == 5
+    assert NotesCatalogue.get("note42") is None
+
+
+def test_blog_posts_paging(app, client, tmp_path):
+    my_notes = tmp_path / "local" / "notes"
+    my_notes.mkdir(parents=True)
+    write_meta(my_notes / "meta.csv", 50)
+    app.jinja_loader = FileSystemLoader(str(tmp_path))
+
+    with patch('ssk.blueprints.home.WebGate.is_closed', return_value=False), \
+         patch('ssk.blueprints.home.render_template', return_value='<html>Posts</html>') as mock_render:
+        my_response = client.get('/ssk/blog_posts?page=2&per_page=10&label=even')
+        assert my_response.status_code == 200
+
+        my_kwargs = mock_render.call_args[1]
+        assert [my_tmp_note["note"] for my_tmp_note in my_kwargs["posts"]] == \
+               ["note{}".format(my_tmp_idx) for my_tmp_idx in range(20, 40, 2)]
+        assert my_kwargs["total"] == 25
+        assert my_kwargs["pages"] == 3
+        assert my_kwargs["filters"] == {"label": "even"}
+
+        # bad and oversized values fall back to the defaults and limits
+        client.get('/ssk/blog_posts?page=x&per_page=1000')
+        my_kwargs = mock_render.call_args[1]
+        assert my_kwargs["page"] == 1
+        assert my_kwargs["per_page"] == 100
+        assert len(my_kwargs["posts"]) == 50
+
+
+def test_blog_posts_cache_key(app, client, tmp_path):
+    my_notes = tmp_path / "local" / "notes"
+    my_notes.mkdir(parents=True)
+    write_meta(my_notes / "meta.csv", 50)
+    app.jinja_loader = FileSystemLoader(str(tmp_path))
+
+    with patch('ssk.blueprints.home.WebGate.is_closed', return_value=False), \
+         patch('ssk.blueprints.home.render_template', return_value='<html>Posts</html>') as mock_render:
+        client.get('/ssk/blog_posts?label=even&page=2')
+        client.get('/ssk/blog_posts?page=2&label=even&x=1')
+        client.get('/ssk/blog_posts?page=2&label=even&x=2&per_page=20')
+        assert mock_render.call_count == 1
+
+        client.get('/ssk/blog_posts?q=Number+7')
+        client.get('/ssk/blog_posts?q=7+number&y=1')
+        assert mock_render.call_count == 2
+
+        client.get('/ssk/blog_posts?page=3&label=even')
+        assert mock_render.call_count == 3
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import os
+from unittest.mock import patch
+
+from jinja2 import FileSystemLoader
+
+from ssk.globals.page_cache import PageCache
+
+
+def make_notes(a_path):
+    my_notes = a_path / "local" / "notes"
+    my_notes.mkdir(parents=True)
+    (my_notes / "first.html").write_text("<p>first</p>")
+    (my_notes / "meta.csv").write_text("seq,note,title,subtitle,created,labels\n1,first,First,sub,2024-02-09,test\n")
+
+    return my_notes
+
+
+def test_note_cache(app, client, tmp_path):
+    my_notes = make_notes(tmp_path)
+    app.jinja_loader = FileSystemLoader(str(tmp_path))
+
+    with patch('ssk.blueprints.home.WebGate.is_closed', return_value=False), \
+         patch('ssk.blueprints.home.render_template', return_value='<html>Note</html>') as mock_render:
+        my_first = client.get('/ssk/blog/first')
+        my_second = client.get('/ssk/blog/first')
+
+        # the second view is served without rendering
+        assert mock_render.call_count == 1
+        assert my_second.status_code == 200
+        assert my_second.data == my_first.data
+        assert my_second.headers["ETag"] == my_first.headers["ETag"]
+        assert my_second.headers["Last-Modified"] is not None
+
+        my_etag = my_first.headers["ETag"]
+        my_response = client.get('/ssk/blog/first', headers={"If-None-Match": my_etag})
+        assert my_response.status_code == 304
+        assert my_response.data == b""
+
+        my_response = client.get('/ssk/blog/first',
+                                 headers={"If-Modified-Since": my_first.headers["Last-Modified"]})
+        assert my_response.status_code == 304
+
+        # a new version of the note is rendered again
+        my_mtime = os.path.getmtime(my_notes / "first.html") + 10
+        os.utime(my_notes / "first.html", (my_mtime, my_mtime))
+        my_response = client.get('/ssk/blog/first', headers={"If-None-Match": my_etag})
+        assert my_response.status_code == 200
+        assert my_response.headers["ETag"] != my_etag
+        assert mock_render.call_count == 2
+
+        # missing notes are not cached
+        client.get('/ssk/blog/missing')
+        client.get('/ssk/blog/missing')
+        assert mock_render.call_count == 4
+
+
+def test_posts_cache(app, client, tmp_path):
+    make_notes(tmp_path)
+    app.jinja_loader = FileSystemLoader(str(tmp_path))
+
+    with patch('ssk.blueprints.home.WebGate.is_closed', return_value=False), \
+         patch('ssk.blueprints.home.render_template', return_value='<html>Posts</html>') as mock_render:
+        client.get('/ssk/blog_posts')
+        my_response = client.get('/ssk/blog_posts')
+
+        assert my_response.status_code == 200
+        assert b'Posts' in my_response.data
+        assert mock_render.call_count == 1
+        assert mock_render.call_args[1]['posts'][0]['note'] == 'first'
+
+
+def test_cache_size():
+    PageCache.init(a_max_pages=2)
+    try:
+        PageCache.put("a", 1, "a")
+        PageCache.put("b", 1, "b")
+        assert PageCache.get("a", 1) is not None
+        PageCache.put("c", 1, "c")
+
+        # b was used least recently
+        assert PageCache.get("b", 1) is None
+        assert PageCache.get("a", 1).body == "a"
+        assert PageCache.get("a", 2) is None
+    finally:
+        PageCache.init(a_max_pages=256)
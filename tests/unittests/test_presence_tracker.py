@@ -0,0 +1,39 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ssk.db import get_db
+from ssk.globals.presence_tracker import PresenceTracker
+from ssk.models.user import User
+
+
+def test_touch_and_flush(app):
+    with app.app_context():
+        my_admin = User.get_by_email(current_app.config["ADMIN_EMAIL"])
+        my_when = datetime.now().replace(microsecond=0)
+
+        PresenceTracker.touch(my_admin.id, my_when)
+        assert PresenceTracker.last_seen(my_admin.id) == my_when
+        assert PresenceTracker.num_active() >= 1
+
+        PresenceTracker.flush()
+        get_db().session.expire_all()
+
+        my_admin = User.get_by_email(current_app.config["ADMIN_EMAIL"])
+        assert my_admin.last_access.replace(tzinfo=None) == my_when
+
+
+def test_idle_users_evicted(app):
+    with app.app_context():
+        my_free = User.get_by_email(current_app.config["USER_FREE_EMAIL"])
+        my_long_ago = datetime.now() - timedelta(minutes=PresenceTracker.ACTIVE_MINUTES + 1)
+
+        PresenceTracker.touch(my_free.id, my_long_ago)
+        PresenceTracker.flush()
+
+        assert PresenceTracker.last_seen(my_free.id) is None
@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+from flask import current_app
+
+from ssk import SSK_ADMIN_GROUP
+from ssk.globals.principal_cache import Principal, PrincipalCache
+from ssk.logic.cmd.group_cmd import GroupCmd
+from ssk.logic.cmd.user_cmd import UserCmd
+from ssk.models.user import User
+
+
+def get_admin_token():
+    with current_app.app_context():
+        return User.get_by_email(current_app.config["ADMIN_EMAIL"]).get_id()
+
+
+def test_principal_cache(app):
+    with app.app_context():
+        my_token = get_admin_token()
+
+    PrincipalCache.clear()
+    with app.test_request_context("/", method="GET"):
+        # the first request loads the user, the next ones are served from the cache
+        assert isinstance(PrincipalCache.load(my_token), User)
+
+        my_principal = PrincipalCache.load(my_token)
+        assert isinstance(my_principal, Principal)
+        assert my_principal.is_authenticated
+        assert not my_principal.is_anonymous
+        assert my_principal.is_active
+        assert my_principal.is_admin()
+        assert my_principal.has_roles(SSK_ADMIN_GROUP)
+        assert my_principal.has_roles((SSK_ADMIN_GROUP, "other"))
+        assert not my_principal.has_roles(SSK_ADMIN_GROUP, "other")
+        assert my_principal.email == current_app.config["ADMIN_EMAIL"]
+        assert my_principal.get_id() == my_token
+
+        # other attributes come from the user row
+        assert my_principal.created is not None
+
+    with app.test_request_context("/", method="POST"):
+        assert isinstance(PrincipalCache.load(my_token), User)
+
+
+def test_principal_invalidate(app):
+    with app.app_context():
+        my_token = get_admin_token()
+        my_email = current_app.config["ADMIN_EMAIL"]
+
+    PrincipalCache.clear()
+    with app.test_request_context("/", method="GET"):
+        PrincipalCache.load(my_token)
+        assert PrincipalCache.size() == 1
+
+        my_ok, _ = GroupCmd().get_cmd("delete").action([my_email, SSK_ADMIN_GROUP])
+        assert my_ok
+        assert PrincipalCache.size() == 0
+
+        assert isinstance(PrincipalCache.load(my_token), User)
+        assert not PrincipalCache.load(my_token).is_admin()
+
+        my_ok, _ = GroupCmd().get_cmd("add").action([my_email, SSK_ADMIN_GROUP])
+        assert my_ok
+        assert PrincipalCache.size() == 0
+
+        PrincipalCache.load(my_token)
+        assert PrincipalCache.load(my_token).is_admin()
+
+        my_ok, _ = UserCmd().get_cmd("disable").action(["all"])
+        assert my_ok
+        assert PrincipalCache.size() == 0
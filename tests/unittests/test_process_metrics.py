@@ -0,0 +1,60 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import json
+from unittest.mock import patch
+
+import pytest
+from flask import current_app
+
+from ssk.globals.api_gate import ApiGate
+from ssk.globals.process_metrics import ProcessMetrics
+
+
+@pytest.fixture()
+def no_sampler():
+    # samples are taken by the tests only, start_ssk starts the sampler again
+    ProcessMetrics.stop()
+
+
+def test_snapshot(no_sampler):
+    my_snapshot = ProcessMetrics.sample()
+
+    assert set(my_snapshot.data.keys()) == {"ts", "mem", "cpu", "threads", "cmd_queue", "jobs_active", "jobs_queued"}
+    assert my_snapshot.data["mem"] > 0
+    assert json.loads(my_snapshot.body) == my_snapshot.data
+
+    # served from the last sample until the next tick
+    with patch("psutil.Process.memory_info") as my_memory_mock:
+        assert ProcessMetrics.get_snapshot() is my_snapshot
+        my_memory_mock.assert_not_called()
+
+    assert ProcessMetrics.sample().etag != my_snapshot.etag
+
+
+def test_status_conditional_get(app, client, no_sampler):
+    with app.app_context():
+        ApiGate.init()
+        ApiGate.load()
+        ApiGate.set_open(True)
+        my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+    my_url = '/api/1/status/{}'.format(my_key)
+    my_response = client.get(my_url)
+    assert my_response.status_code == 200
+    assert "ts" in json.loads(my_response.data)
+    my_etag = my_response.headers["ETag"]
+
+    my_response = client.get(my_url, headers={"If-None-Match": my_etag})
+    assert my_response.status_code == 304
+
+    # POST always gets the body
+    my_response = client.post(my_url, headers={"If-None-Match": my_etag})
+    assert my_response.status_code == 200
+
+    ProcessMetrics.sample()
+    my_response = client.get(my_url, headers={"If-None-Match": my_etag})
+    assert my_response.status_code == 200
+    assert my_response.headers["ETag"] != my_etag
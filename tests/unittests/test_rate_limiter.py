@@ -0,0 +1,145 @@
+#
+# Copyright (c) 2023 Michał Świtała / CodingMinds.io
+# SPDX-License-Identifier: MIT
+#
+
+import json
+import threading
+
+from flask import current_app
+
+from ssk.globals.api_gate import ApiGate
+from ssk.globals.rate_limiter import RateLimiter
+
+FREE = {"rate": 1, "burst": 3}
+PRO = {"rate": 10, "burst": 30}
+
+
+def test_burst_and_refill():
+    RateLimiter.init({"Free": FREE, "Pro": PRO}, None, {})
+    RateLimiter.set_tiers({"k1": ["Free"]})
+
+    for my_tmp_idx in range(3):
+        my_decision = RateLimiter.take("k1", "echo", a_now=100.0)
+        assert my_decision.allowed
+        assert my_decision.remaining == 2 - my_tmp_idx
+
+    my_decision = RateLimiter.take("k1", "echo", a_now=100.0)
+    assert not my_decision.allowed
+    assert my_decision.retry_after == 1
+    assert my_decision.reset == 3
+    assert RateLimiter.get_headers(my_decision) == {"X-RateLimit-Limit": "3",
+                                                    "X-RateLimit-Remaining": "0",
+                                                    "X-RateLimit-Reset": "3",
+                                                    "Retry-After": "1"}
+
+    # one token per second
+    assert RateLimiter.take("k1", "echo", a_now=101.0).allowed
+    assert not RateLimiter.take("k1", "echo", a_now=101.5).allowed
+
+    # keys without a tier are unlimited when there is no default
+    assert RateLimiter.take("k2", "echo", a_now=101.5) == (True, None, None, 0, 0)
+    assert RateLimiter.get_headers(RateLimiter.take("k2", "echo")) == {}
+
+
+def test_best_tier():
+    RateLimiter.init({"Free": FREE, "Pro": PRO}, FREE, {})
+    RateLimiter.set_tiers({"k1": ["Free", "Pro"], "k2": [], "k3": ["Unknown"]})
+
+    assert RateLimiter.take("k1", "echo", a_now=100.0).limit == 30
+    assert RateLimiter.take("k2", "echo", a_now=100.0).limit == 3
+    assert RateLimiter.take("k3", "echo", a_now=100.0).limit == 3
+
+
+def test_route_bucket():
+    # the route bucket is shared, a rejected call takes no token from the key bucket
+    RateLimiter.init({"Pro": PRO}, None, {"echo": {"rate": 1, "burst": 2}})
+    RateLimiter.set_tiers({"k1": ["Pro"], "k2": ["Pro"]})
+
+    assert RateLimiter.take("k1", "echo", a_now=100.0).allowed
+    assert RateLimiter.take("k2", "echo", a_now=100.0).allowed
+
+    my_decision = RateLimiter.take("k1", "echo", a_now=100.0)
+    assert not my_decision.allowed
+    assert my_decision.remaining == 29
+    assert my_decision.retry_after == 1
+
+    assert RateLimiter.take("k1", "status", a_now=100.0).allowed
+
+
+def test_threads():
+    RateLimiter.init({"Free": {"rate": 0, "burst": 1000}}, None, {})
+    RateLimiter.set_tiers({"k{}".format(my_tmp_idx): ["Free"] for my_tmp_idx in range(4)})
+
+    my_allowed = []
+
+    def worker():
+        my_count = 0
+        for _ in range(600):
+            for my_tmp_idx in range(4):
+                if RateLimiter.take("k{}".format(my_tmp_idx), "echo", a_now=100.0).allowed:
+                    my_count += 1
+        my_allowed.append(my_count)
+
+    my_workers = [threading.Thread(target=worker) for _ in range(4)]
+    for my_tmp_worker in my_workers:
+        my_tmp_worker.start()
+    for my_tmp_worker in my_workers:
+        my_tmp_worker.join()
+
+    # no token is handed out twice
+    assert sum(my_allowed) == 4 * 1000
+
+
+def test_api_rate_headers(app, client):
+    app.config["API_RATE_LIMITS"] = {"Free": FREE}
+
+    with app.app_context():
+        ApiGate.init()
+        ApiGate.load()
+        ApiGate.set_open(True)
+        my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+    for my_tmp_idx in range(3):
+        my_response = client.post('/api/1/echo/{}'.format(my_key), json={"echo": "hello"})
+        assert my_response.status_code == 200
+        assert my_response.headers["X-RateLimit-Limit"] == "3"
+        assert my_response.headers["X-RateLimit-Remaining"] == str(2 - my_tmp_idx)
+
+    my_response = client.post('/api/1/echo/{}'.format(my_key), json={"echo": "hello"})
+    assert my_response.status_code == 429
+    assert int(my_response.headers["Retry-After"]) >= 1
+    assert json.loads(my_response.data)["code"] == 40
+
+    # invalid keys are not rate limited
+    my_response = client.post('/api/1/echo/wrong_key', json={"echo": "hello"})
+    assert my_response.status_code == 400
+    assert "X-RateLimit-Limit" not in my_response.headers
+
+
+def test_batch_rate_headers(app, client):
+    app.config["API_RATE_LIMITS"] = {"Free": FREE}
+
+    with app.app_context():
+        ApiGate.init()
+        ApiGate.load()
+        ApiGate.set_open(True)
+        my_key = ApiGate.add_api_key(current_app.config["USER_FREE_EMAIL"])
+
+    # a batch takes one key token per call up front, streamed responses carry the headers too
+    my_calls = {"calls": [{"id": my_tmp_idx, "call": "echo", "params": {"echo": "hello"}} for my_tmp_idx in range(2)]}
+    my_response = client.post('/api/1/batch/{}?stream=1'.format(my_key), json=my_calls)
+    assert my_response.status_code == 200
+    assert my_response.headers["X-RateLimit-Limit"] == "3"
+    assert my_response.headers["X-RateLimit-Remaining"] == "1"
+    assert [json.loads(my_tmp_line)["code"] for my_tmp_line in my_response.data.decode().splitlines()] == [200, 200]
+
+    my_response = client.post('/api/1/batch/{}'.format(my_key), json=my_calls)
+    assert my_response.status_code == 429
+    assert int(my_response.headers["Retry-After"]) >= 1
+    assert json.loads(my_response.data)["code"] == 40
+
+    # larger than the burst, never admitted
+    my_calls = {"calls": [{"call": "echo", "params": {"echo": "hello"}}] * 4}
+    my_response = client.post('/api/1/batch/{}'.format(my_key), json=my_calls)
+    assert my_response.status_code == 429